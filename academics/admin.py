@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import GradingScheme
 
-# Register your models here.
+
+@admin.register(GradingScheme)
+class GradingSchemeAdmin(admin.ModelAdmin):
+    """Admin for configurable grading schemes"""
+
+    list_display = ('name', 'academic_year', 'class_level', 'pass_mark', 'is_active', 'updated_at')
+    list_filter = ('is_active', 'academic_year', 'class_level')
+    search_fields = ('name',)
@@ -0,0 +1,238 @@
+"""
+    Grading engine — grade boundaries held as a sorted table.
+
+    A single score is graded with a bisect lookup, a list or NumPy array of scores
+    in one pass, and the same table can be turned into SQL CASE expressions so
+    grades can be recomputed by the database with a single UPDATE.
+
+    Grading schemes configured in the database (GradingScheme) are compiled into
+    tables once and cached in-process; the cache is dropped whenever a scheme or
+    term is saved or deleted (see academics/signals.py), in other worker processes
+    through the shared 'grading' version counter.
+"""
+from bisect import bisect_right
+from decimal import Decimal
+from django.db.models import Case, When, Value, CharField, DecimalField
+from core.cache import VersionWatch, bump
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, lists are graded without it
+    np = None
+
+
+DEFAULT_PASS_MARK = Decimal('50')
+
+# (minimum score, grade, grade point) — the built-in bands, used when no GradingScheme applies
+DEFAULT_BANDS = [
+    (90, 'A+', 4.0),
+    (80, 'A', 4.0),
+    (75, 'B+', 3.5),
+    (70, 'B', 3.0),
+    (65, 'C+', 2.5),
+    (60, 'C', 2.0),
+    (55, 'D+', 1.5),
+    (50, 'D', 1.0),
+    (35, 'E', 0.5),
+    (0, 'F', 0.0),
+]
+
+
+def default_bands():
+    """DEFAULT_BANDS as stored in GradingScheme.bands"""
+    return [
+        {'min_score': min_score, 'grade': grade, 'grade_point': grade_point}
+        for min_score, grade, grade_point in DEFAULT_BANDS
+    ]
+
+
+class GradeTable:
+    """Grade boundaries sorted ascending by minimum score"""
+
+    def __init__(self, bands):
+        ordered = sorted(bands, key=lambda band: Decimal(str(band[0])))
+        if not ordered:
+            raise ValueError("A grade table needs at least one band.")
+
+        self.boundaries = [Decimal(str(band[0])) for band in ordered]
+        self.grades = [band[1] for band in ordered]
+        self.points = [Decimal(str(band[2])) for band in ordered]
+
+    def _index(self, score):
+        # Scores below the lowest boundary get the lowest grade
+        return max(bisect_right(self.boundaries, score) - 1, 0)
+
+    def grade_order(self):
+        """Grades from best to worst"""
+        return list(reversed(self.grades))
+
+    def choices(self):
+        """Choices list in the form [('A+', 'A+ (90-100)'), ...], best grade first"""
+        choices = []
+        upper = Decimal('100')
+        for boundary, grade in reversed(list(zip(self.boundaries, self.grades))):
+            choices.append((grade, f"{grade} ({boundary:g}-{upper:g})"))
+            upper = boundary - 1
+        return choices
+
+    def grade(self, score):
+        """(grade, grade point) for one score"""
+        i = self._index(Decimal(str(score)))
+        return self.grades[i], self.points[i]
+
+    def grade_many(self, scores):
+        """
+            Grade many scores in one pass. Returns (grades, grade points).
+            NumPy arrays come back as arrays (vectorised searchsorted), anything else as lists.
+        """
+        if np is not None and isinstance(scores, np.ndarray):
+            boundaries = np.array([float(b) for b in self.boundaries])
+            indexes = np.clip(np.searchsorted(boundaries, scores, side='right') - 1, 0, None)
+            return (
+                np.array(self.grades, dtype=object)[indexes],
+                np.array([float(p) for p in self.points])[indexes],
+            )
+
+        grades = []
+        points = []
+        for score in scores:
+            grade, point = self.grade(score)
+            grades.append(grade)
+            points.append(point)
+        return grades, points
+
+    def _case(self, values, field, output_field):
+        # Highest boundary first so the first matching WHEN wins
+        whens = [
+            When(**{f'{field}__gte': boundary}, then=Value(value))
+            for boundary, value in reversed(list(zip(self.boundaries, values)))
+        ]
+        return Case(*whens, default=Value(values[0]), output_field=output_field)
+
+    def grade_case(self, field='score'):
+        """SQL CASE expression giving the grade for `field`"""
+        return self._case(self.grades, field, CharField(max_length=2))
+
+    def grade_point_case(self, field='score'):
+        """SQL CASE expression giving the grade point for `field`"""
+        return self._case(self.points, field, DecimalField(max_digits=3, decimal_places=2))
+
+    def regrade(self, queryset, field='score'):
+        """Recompute grade and grade_point for every scored row of a Result queryset in one UPDATE"""
+        return queryset.filter(**{f'{field}__isnull': False}).update(
+            grade=self.grade_case(field),
+            grade_point=self.grade_point_case(field),
+        )
+
+
+DEFAULT_TABLE = GradeTable(DEFAULT_BANDS)
+
+
+class CompiledScheme:
+    """A grading scheme ready for lookups: its grade table and pass mark"""
+
+    def __init__(self, table, pass_mark, name='Default'):
+        self.table = table
+        self.pass_mark = Decimal(str(pass_mark))
+        self.name = name
+
+    def grade(self, score):
+        return self.table.grade(score)
+
+    def fingerprint(self):
+        """Stable string identifying the bands and pass mark, for cache keys"""
+        bands = zip(self.table.boundaries, self.table.grades, self.table.points)
+        return f"{self.name}|{self.pass_mark}|" + ";".join(f"{b}:{g}:{p}" for b, g, p in bands)
+
+    def sort_grades(self, rows, key='grade'):
+        """Order grade-distribution rows best grade first instead of alphabetically"""
+        order = {grade: i for i, grade in enumerate(self.table.grade_order())}
+        return sorted(rows, key=lambda row: order.get(row[key], len(order)))
+
+
+DEFAULT_SCHEME = CompiledScheme(DEFAULT_TABLE, DEFAULT_PASS_MARK)
+
+# In-process cache: {(academic_year_id, class_level_id): CompiledScheme} and {term_id: academic_year_id}
+_schemes = None
+_term_years = None
+_watch = VersionWatch('grading')
+
+
+def _drop_local():
+    global _schemes, _term_years
+    _schemes = None
+    _term_years = None
+
+
+def invalidate_schemes():
+    """
+        Drop the compiled schemes, here at once and in every other process when the
+        transaction commits; they are rebuilt on the next lookup
+    """
+    _drop_local()
+    bump('grading')
+
+
+def _load_schemes():
+    global _schemes
+    if _watch.changed():
+        _drop_local()
+    if _schemes is None:
+        _watch.mark()
+        from .models import GradingScheme
+
+        _schemes = {
+            (scheme.academic_year_id, scheme.class_level_id): scheme.compile()
+            for scheme in GradingScheme.objects.filter(is_active=True)
+        }
+    return _schemes
+
+
+def _term_academic_year(term_id):
+    global _term_years
+    if _term_years is None:
+        from .models import Term
+
+        _term_years = dict(Term.objects.values_list('id', 'academic_year_id'))
+    return _term_years.get(term_id)
+
+
+def get_scheme(academic_year_id=None, class_level_id=None):
+    """
+        The scheme that applies to an academic year / class level.
+        Most specific wins: year + class, then year, then class, then a global scheme,
+        then the built-in bands.
+    """
+    schemes = _load_schemes()
+    if not schemes:
+        return DEFAULT_SCHEME
+
+    academic_year_id = int(academic_year_id) if academic_year_id else None
+    class_level_id = int(class_level_id) if class_level_id else None
+
+    for key in (
+        (academic_year_id, class_level_id),
+        (academic_year_id, None),
+        (None, class_level_id),
+        (None, None),
+    ):
+        if key in schemes:
+            return schemes[key]
+    return DEFAULT_SCHEME
+
+
+def get_scheme_for_term(term_id, class_level_id=None):
+    """Scheme for a term (through its academic year) and class level"""
+    schemes = _load_schemes()
+    if not schemes:
+        return DEFAULT_SCHEME
+
+    term_id = int(term_id) if term_id else None
+    return get_scheme(_term_academic_year(term_id) if term_id else None, class_level_id)
+
+
+def get_scheme_for_filters(academic_year_id=None, class_level_id=None, term_id=None):
+    """Scheme for the academic year / class level / term filters used by the analysis pages"""
+    if term_id:
+        return get_scheme_for_term(term_id, class_level_id)
+    return get_scheme(academic_year_id, class_level_id)
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from academics.models import Result
+from academics.utils.ranking import compute_positions
+
+
+class Command(BaseCommand):
+    help = "Compute subject and overall class positions from published results"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, help="Only rank this term id (default: every term with published results)")
+        parser.add_argument('--class-level', type=int, help="Only rank this class level id")
+
+    def handle(self, *args, **options):
+        if options['term']:
+            term_ids = [options['term']]
+        else:
+            term_ids = Result.objects.filter(is_published=True).order_by().values_list('term_id', flat=True).distinct()
+        class_level_ids = [options['class_level']] if options['class_level'] else None
+
+        started = time.monotonic()
+        students = sum(compute_positions(term_id, class_level_ids) for term_id in term_ids)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"Ranked {students} student(s) in {elapsed:.2f}s"))
@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from academics.utils.result_aggregates import rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ResultAggregate rollup table from the results table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, help="Only rebuild this term id")
+
+    def handle(self, *args, **options):
+        filters = {'term_id': options['term']} if options['term'] else {}
+
+        started = time.monotonic()
+        rows = rebuild_aggregates(**filters)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} aggregate row(s) in {elapsed:.2f}s"))
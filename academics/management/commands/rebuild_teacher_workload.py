@@ -0,0 +1,14 @@
+import time
+from django.core.management.base import BaseCommand
+from academics.utils.teacher_workload import rebuild_workload
+
+
+class Command(BaseCommand):
+    help = "Rebuild the TeacherWorkload summary table from class subject assignments"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = rebuild_workload()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt workload for {rows} teacher(s) in {elapsed:.2f}s"))
@@ -0,0 +1,119 @@
+import time
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, When
+from django.utils import timezone
+from academics.grading import get_scheme
+from academics.models import AcademicYear, ClassLevel, Result, Subject, Term
+from academics.utils.result_aggregates import refresh_aggregates_for
+from academics.utils.ranking import compute_positions_for
+
+
+def _lookup(model, value, field=None):
+    """Find an object by primary key or by a natural field such as name or code"""
+    lookups = [{'pk': value}]
+    if field:
+        lookups.append({field: value})
+    for lookup in lookups:
+        try:
+            return model.objects.get(**lookup)
+        except (model.DoesNotExist, ValueError, ValidationError):
+            continue
+    raise CommandError(f"{model._meta.verbose_name} '{value}' not found")
+
+
+class Command(BaseCommand):
+    help = "Recompute score, grade and grade point for results using set-based updates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--academic-year', help="Academic year id or name (e.g. 2024-2025)")
+        parser.add_argument('--term', help="Term id")
+        parser.add_argument('--class-level', help="Class level id or name")
+        parser.add_argument('--subject', help="Subject id or code")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would change without writing anything")
+
+    def get_queryset(self, options):
+        results = Result.objects.all()
+        if options['academic_year']:
+            results = results.filter(term__academic_year=_lookup(AcademicYear, options['academic_year'], 'name'))
+        if options['term']:
+            results = results.filter(term=_lookup(Term, options['term']))
+        if options['class_level']:
+            results = results.filter(class_level=_lookup(ClassLevel, options['class_level'], 'name'))
+        if options['subject']:
+            results = results.filter(subject=_lookup(Subject, options['subject'], 'code'))
+        return results.order_by()
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        results = self.get_queryset(options)
+        started = time.monotonic()
+
+        # Score as apply_calculations() would set it
+        system_score = Q(use_system_calculation=True, class_score__isnull=False, exam_score__isnull=False)
+        new_score = F('class_score') + F('exam_score')
+
+        scanned = 0
+        score_changes = 0
+        grade_changes = 0
+        transitions = {}
+
+        # Each academic year / class level can have its own grading scheme
+        groups = results.values_list('term__academic_year_id', 'class_level_id').distinct()
+
+        with transaction.atomic():
+            for academic_year_id, class_level_id in groups:
+                table = get_scheme(academic_year_id, class_level_id).table
+                group = results.filter(term__academic_year_id=academic_year_id, class_level_id=class_level_id)
+                scanned += group.count()
+
+                # Diff summary: old grade -> new grade for every row whose grading changes
+                diff = (
+                    group.annotate(new_score=Case(When(system_score, then=new_score), default=F('score')))
+                    .filter(new_score__isnull=False)
+                    .annotate(
+                        new_grade=table.grade_case('new_score'),
+                        new_point=table.grade_point_case('new_score'),
+                    )
+                    .exclude(grade=F('new_grade'), grade_point=F('new_point'))
+                    .values('grade', 'new_grade')
+                    .annotate(rows=Count('id'))
+                )
+                for row in diff:
+                    if row['grade'] != row['new_grade']:
+                        key = (row['grade'] or '-', row['new_grade'])
+                        transitions[key] = transitions.get(key, 0) + row['rows']
+
+                stale_scores = group.filter(system_score).filter(Q(score__isnull=True) | ~Q(score=new_score))
+                if dry_run:
+                    score_changes += stale_scores.count()
+                    grade_changes += sum(row['rows'] for row in diff)
+                    continue
+
+                now = timezone.now()
+                score_changes += stale_scores.update(score=new_score, last_modified=now)
+                grade_changes += (
+                    group.filter(score__isnull=False)
+                    .exclude(grade=table.grade_case(), grade_point=table.grade_point_case())
+                    .update(grade=table.grade_case(), grade_point=table.grade_point_case(), last_modified=now)
+                )
+
+            if not dry_run and (score_changes or grade_changes):
+                refresh_aggregates_for(results)
+                compute_positions_for(results)
+
+        elapsed = time.monotonic() - started
+        rate = scanned / elapsed if elapsed else scanned
+
+        prefix = "[dry run] " if dry_run else ""
+        verb = "would change" if dry_run else "changed"
+        self.stdout.write(f"{prefix}Scanned {scanned} result(s) in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+        self.stdout.write(f"{prefix}Scores {verb}: {score_changes}")
+        self.stdout.write(f"{prefix}Grades/grade points {verb}: {grade_changes}")
+        for (old, new), rows in sorted(transitions.items()):
+            self.stdout.write(f"  {old} -> {new}: {rows}")
+
+        if not dry_run:
+            self.stdout.write(self.style.SUCCESS("Results recomputed"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from academics.utils.enrollment_counts import reconcile_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored class and subject enrollment counters from student profiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted counters without fixing them")
+
+    def handle(self, *args, **options):
+        drift = reconcile_counts(dry_run=options['dry_run'])
+
+        for label, stored, actual in drift:
+            self.stdout.write(f"{label}: stored {stored}, actual {actual}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All enrollment counters are correct"))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} counter(s) out of date (dry run, nothing changed)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} counter(s)"))
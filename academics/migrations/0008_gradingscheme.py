@@ -0,0 +1,36 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:28
+
+import academics.grading
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_alter_term_academic_year'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingScheme',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('pass_mark', models.DecimalField(decimal_places=2, default=50, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('bands', models.JSONField(default=academics.grading.default_bands, help_text='List of {"min_score": 90, "grade": "A+", "grade_point": 4.0}')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grading_schemes', to='academics.academicyear')),
+                ('class_level', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='grading_schemes', to='academics.classlevel')),
+            ],
+            options={
+                'verbose_name': 'Grading Scheme',
+                'verbose_name_plural': 'Grading Schemes',
+                'db_table': 'grading_schemes',
+                'unique_together': {('academic_year', 'class_level')},
+            },
+        ),
+    ]
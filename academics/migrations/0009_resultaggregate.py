@@ -0,0 +1,91 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+
+
+def build_aggregates(apps, schema_editor):
+    """Fill the rollup table from the results that already exist"""
+    Result = apps.get_model('academics', 'Result')
+    ResultAggregate = apps.get_model('academics', 'ResultAggregate')
+    GradingScheme = apps.get_model('academics', 'GradingScheme')
+    Term = apps.get_model('academics', 'Term')
+
+    pass_marks = {
+        (scheme.academic_year_id, scheme.class_level_id): scheme.pass_mark
+        for scheme in GradingScheme.objects.filter(is_active=True)
+    }
+    term_years = dict(Term.objects.values_list('id', 'academic_year_id'))
+
+    def pass_mark(term_id, class_level_id):
+        year_id = term_years.get(term_id)
+        for key in ((year_id, class_level_id), (year_id, None), (None, class_level_id), (None, None)):
+            if key in pass_marks:
+                return pass_marks[key]
+        return Decimal('50')
+
+    rows = {}
+    for result in Result.objects.order_by().values(
+        'term_id', 'class_level_id', 'subject_id', 'is_published', 'score', 'grade'
+    ).iterator(chunk_size=2000):
+        key = (result['term_id'], result['class_level_id'], result['subject_id'], result['is_published'])
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = ResultAggregate(
+                term_id=key[0], class_level_id=key[1], subject_id=key[2], is_published=key[3],
+                score_sum=Decimal(0), score_sum_squares=Decimal(0), grade_histogram=defaultdict(int),
+            )
+        row.result_count += 1
+        if result['grade']:
+            row.grade_histogram[result['grade']] += 1
+        score = result['score']
+        if score is not None:
+            row.score_count += 1
+            row.score_sum += score
+            row.score_sum_squares += score * score
+            row.min_score = score if row.min_score is None else min(row.min_score, score)
+            row.max_score = score if row.max_score is None else max(row.max_score, score)
+            if score >= pass_mark(key[0], key[1]):
+                row.pass_count += 1
+
+    for row in rows.values():
+        row.grade_histogram = dict(row.grade_histogram)
+    ResultAggregate.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0008_gradingscheme'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_published', models.BooleanField(default=False)),
+                ('result_count', models.PositiveIntegerField(default=0)),
+                ('score_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('score_sum_squares', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('min_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('max_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('grade_histogram', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_aggregates', to='academics.classlevel')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_aggregates', to='academics.subject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_aggregates', to='academics.term')),
+            ],
+            options={
+                'verbose_name': 'Result Aggregate',
+                'verbose_name_plural': 'Result Aggregates',
+                'db_table': 'result_aggregates',
+                'unique_together': {('term', 'class_level', 'subject', 'is_published')},
+            },
+        ),
+        migrations.RunPython(build_aggregates, migrations.RunPython.noop),
+    ]
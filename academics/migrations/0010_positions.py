@@ -0,0 +1,43 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('academics', '0009_resultaggregate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='subject_position',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TermPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average_score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('subject_count', models.PositiveIntegerField(default=0)),
+                ('position', models.PositiveIntegerField()),
+                ('class_size', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('class_level', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_positions', to='academics.classlevel')),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, related_name='term_positions', to=settings.AUTH_USER_MODEL)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='academics.term')),
+            ],
+            options={
+                'verbose_name': 'Term Position',
+                'verbose_name_plural': 'Term Positions',
+                'db_table': 'term_positions',
+                'ordering': ['term', 'class_level', 'position'],
+                'indexes': [models.Index(fields=['term', 'class_level', 'position'], name='term_positi_term_id_fe94d8_idx')],
+                'unique_together': {('student', 'term', 'class_level')},
+            },
+        ),
+    ]
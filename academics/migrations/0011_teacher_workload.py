@@ -0,0 +1,71 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import defaultdict
+from django.db.models import Count
+
+
+def build_workload(apps, schema_editor):
+    """Fill the summary table from the existing assignments"""
+    ClassSubject = apps.get_model('academics', 'ClassSubject')
+    StudentProfile = apps.get_model('accounts', 'StudentProfile')
+    TeacherWorkload = apps.get_model('academics', 'TeacherWorkload')
+
+    counts = defaultdict(int)
+    subjects = defaultdict(set)
+    classes = defaultdict(set)
+    for teacher_id, subject_id, class_level_id in ClassSubject.objects.filter(
+        teacher__isnull=False
+    ).values_list('teacher_id', 'subject_id', 'class_level_id'):
+        counts[teacher_id] += 1
+        subjects[teacher_id].add(subject_id)
+        classes[teacher_id].add(class_level_id)
+
+    class_sizes = dict(
+        StudentProfile.objects.filter(is_active=True, current_class__isnull=False)
+        .values('current_class_id').annotate(count=Count('id')).values_list('current_class_id', 'count')
+    )
+
+    TeacherWorkload.objects.bulk_create([
+        TeacherWorkload(
+            teacher_id=teacher_id,
+            assignments=count,
+            subjects=len(subjects[teacher_id]),
+            classes=len(classes[teacher_id]),
+            students=sum(class_sizes.get(class_level_id, 0) for class_level_id in classes[teacher_id]),
+        )
+        for teacher_id, count in counts.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('academics', '0010_positions'),
+        ('accounts', '0003_remove_teacherprofile_is_class_teacher'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherWorkload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assignments', models.PositiveIntegerField(default=0)),
+                ('subjects', models.PositiveIntegerField(default=0)),
+                ('classes', models.PositiveIntegerField(default=0)),
+                ('students', models.PositiveIntegerField(default=0, help_text="Active students in the teacher's classes")),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('teacher', models.OneToOneField(limit_choices_to={'role': 'teacher'}, on_delete=django.db.models.deletion.CASCADE, related_name='workload', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Teacher Workload',
+                'verbose_name_plural': 'Teacher Workloads',
+                'db_table': 'teacher_workloads',
+                'indexes': [models.Index(fields=['-assignments'], name='teacher_wor_assignm_1a66ee_idx')],
+            },
+        ),
+        migrations.RunPython(build_workload, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:47
+
+from collections import defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_enrollments(apps, schema_editor):
+    """Fill the counters from the existing student profiles"""
+    StudentProfile = apps.get_model('accounts', 'StudentProfile')
+    ClassLevel = apps.get_model('academics', 'ClassLevel')
+    ClassSubject = apps.get_model('academics', 'ClassSubject')
+    Subject = apps.get_model('academics', 'Subject')
+
+    class_counts = dict(
+        StudentProfile.objects.filter(is_active=True, current_class__isnull=False)
+        .values('current_class_id').annotate(count=Count('id')).values_list('current_class_id', 'count')
+    )
+    for class_level_id, count in class_counts.items():
+        ClassLevel.objects.filter(id=class_level_id).update(student_count=count)
+
+    classes_by_subject = defaultdict(set)
+    for subject_id, class_level_id in ClassSubject.objects.values_list('subject_id', 'class_level_id').distinct():
+        classes_by_subject[subject_id].add(class_level_id)
+    for subject_id, class_level_ids in classes_by_subject.items():
+        Subject.objects.filter(id=subject_id).update(
+            student_count=sum(class_counts.get(class_level_id, 0) for class_level_id in class_level_ids)
+        )
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0011_teacher_workload'),
+        ('accounts', '0003_remove_teacherprofile_is_class_teacher'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classlevel',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Active students in this class (academics/utils/enrollment_counts.py)'),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Active students in the classes offering this subject (academics/utils/enrollment_counts.py)'),
+        ),
+        migrations.RunPython(count_enrollments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.26 on 2026-10-18 05:36
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_enrollment_counters'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='gradingscheme',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='gradingscheme',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Coalesce('academic_year', models.Value(0)), django.db.models.functions.comparison.Coalesce('class_level', models.Value(0)), name='unique_grading_scheme_scope', violation_error_message='A grading scheme already exists for this academic year and class level.'),
+        ),
+    ]
@@ -1,7 +1,25 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.exceptions import ValidationError
 from django.utils import timezone
+from decimal import Decimal
 import uuid
+from .grading import DEFAULT_TABLE, GradeTable, CompiledScheme, default_bands, get_scheme_for_term
+
+COUNTER_FIELDS = ('student_count',)
+
+
+def _fields_without_counters(instance):
+    """
+        Fields written by a plain save() of an existing row. Counters are maintained with
+        F() updates, so a full save from a stale instance must not overwrite them.
+    """
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in COUNTER_FIELDS
+    ]
+
 
 class AcademicYear(models.Model):
     """
@@ -42,6 +60,10 @@ class Subject(models.Model):
     description = models.TextField(blank=True, null=True)
     category = models.CharField(max_length=20, choices=SUBJECT_CATEGORY_CHOICES, default='core')
     is_active = models.BooleanField(default=False)
+    student_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Active students in the classes offering this subject (academics/utils/enrollment_counts.py)"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -59,11 +81,16 @@ class Subject(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.code})"
-    
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = _fields_without_counters(self)
+        super().save(*args, **kwargs)
+
     @property
     def enrolled_students_count(self):
         """Get number of students enrolled in this subject"""
-        return self.enrollments.filter(is_active=True).count()
+        return self.student_count
 
 
 class ClassLevel(models.Model):
@@ -77,6 +104,10 @@ class ClassLevel(models.Model):
     capacity = models.PositiveIntegerField(default=30)
     display_order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    student_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Active students in this class (academics/utils/enrollment_counts.py)"
+    )
     
     form_teacher = models.ForeignKey(
         'accounts.User',
@@ -104,11 +135,16 @@ class ClassLevel(models.Model):
 
     def __str__(self):
         return self.name
-    
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = _fields_without_counters(self)
+        super().save(*args, **kwargs)
+
     @property
     def current_students_count(self):
         """Get number of students currently in this class"""
-        return self.students.filter(is_active=True).count()
+        return self.student_count
     
     @property
     def available_seats(self):
@@ -166,6 +202,80 @@ class Term(models.Model):
         return f"{self.name} - {self.academic_year.name}"
 
 
+class GradingScheme(models.Model):
+    """
+        Grade bands and pass mark, optionally scoped to an academic year and/or class level.
+        The most specific active scheme applies; the built-in bands are used when none match.
+    """
+    name = models.CharField(max_length=100)
+    academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='grading_schemes'
+    )
+    class_level = models.ForeignKey(
+        ClassLevel,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='grading_schemes'
+    )
+    pass_mark = models.DecimalField(
+        max_digits=5, decimal_places=2,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        default=50
+    )
+    bands = models.JSONField(
+        default=default_bands,
+        help_text='List of {"min_score": 90, "grade": "A+", "grade_point": 4.0}'
+    )
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'grading_schemes'
+        verbose_name = 'Grading Scheme'
+        verbose_name_plural = 'Grading Schemes'
+        constraints = [
+            # NULL never equals NULL in a unique index, so an empty scope compares as 0:
+            # one global scheme, one per year, one per class and one per year and class
+            models.UniqueConstraint(
+                Coalesce('academic_year', models.Value(0)),
+                Coalesce('class_level', models.Value(0)),
+                name='unique_grading_scheme_scope',
+                violation_error_message="A grading scheme already exists for this academic year and class level.",
+            ),
+        ]
+
+    def __str__(self):
+        scope = " / ".join(str(s) for s in (self.academic_year, self.class_level) if s) or "All classes"
+        return f"{self.name} ({scope})"
+
+    def clean(self):
+        if not isinstance(self.bands, list) or not self.bands:
+            raise ValidationError({'bands': "At least one grade band is required."})
+
+        for band in self.bands:
+            if not isinstance(band, dict) or not {'min_score', 'grade', 'grade_point'} <= set(band):
+                raise ValidationError({'bands': "Each band needs min_score, grade and grade_point."})
+            if len(str(band['grade'])) > 2:
+                raise ValidationError({'bands': f"Grade '{band['grade']}' is longer than 2 characters."})
+
+        if not any(float(band['min_score']) <= 0 for band in self.bands):
+            raise ValidationError({'bands': "One band must start at 0."})
+
+    def compile(self):
+        """Turn the stored bands into a lookup table"""
+        table = GradeTable([
+            (band['min_score'], band['grade'], band['grade_point']) for band in self.bands
+        ])
+        return CompiledScheme(table, self.pass_mark, self.name)
+
+
 class Result(models.Model):
     """
         Result model — teacher uploads, student views
@@ -178,18 +288,7 @@ class Result(models.Model):
         ("3rd", "Third Term")
     ]
     
-    GRADE_CHOICES = [
-        ("A+", "A+ (90-100)"),
-        ("A", "A (80-89)"),
-        ("B+", "B+ (75-79)"),
-        ("B", "B (70-74)"),
-        ("C+", "C+ (65-69)"),
-        ("C", "C (60-64)"),
-        ("D+", "D+ (55-59)"),
-        ("D", "D (50-54)"),
-        ("E", "E (35-49)"),
-        ("F", "F (0-34)"),
-    ]
+    GRADE_CHOICES = DEFAULT_TABLE.choices()
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student = models.ForeignKey(
@@ -229,6 +328,8 @@ class Result(models.Model):
 
     is_published = models.BooleanField(default=False)
     published_date = models.DateTimeField(blank=True, null=True)
+    # Dense rank in the class for this subject and term, set when results are published
+    subject_position = models.PositiveIntegerField(blank=True, null=True)
     uploaded_by = models.ForeignKey(
         'accounts.User',
         on_delete=models.SET_NULL,
@@ -252,34 +353,43 @@ class Result(models.Model):
         ]
         ordering = ['student', 'subject',]
 
+    # What a result contributes to its ResultAggregate row
+    AGGREGATE_FIELDS = ('term_id', 'class_level_id', 'subject_id', 'is_published', 'score', 'grade')
+
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.subject.name} ({self.term}) - {self.score}%"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so saving can move this row between aggregates without a query
+        if not instance.get_deferred_fields().intersection(cls.AGGREGATE_FIELDS):
+            instance._aggregate_state = instance.aggregate_state
+        return instance
+
+    @property
+    def aggregate_state(self):
+        # A score assigned as a float (the single-result form does) is summed as a Decimal
+        return tuple(
+            self._meta.get_field('score').to_python(self.score) if field == 'score' else getattr(self, field)
+            for field in self.AGGREGATE_FIELDS
+        )
+
+    @property
+    def grading_scheme(self):
+        """Grading scheme for this result's academic year and class (cached, no query per row)"""
+        return get_scheme_for_term(self.term_id, self.class_level_id)
+
     def calculate_grade(self):
         """Calculate grade based on total score"""
-        if self.score >= 90:
-            return "A+", 4.0
-        elif self.score >= 80:
-            return "A", 4.0
-        elif self.score >= 75:
-            return "B+", 3.5
-        elif self.score >= 70:
-            return "B", 3.0
-        elif self.score >= 65:
-            return "C+", 2.5
-        elif self.score >= 60:
-            return "C", 2.0
-        elif self.score >= 55:
-            return "D+", 1.5
-        elif self.score >= 50:
-            return "D", 1.0
-        elif self.score >= 35:
-            return "E", 0.5
-        else:
-            return "F", 0.0
+        return self.grading_scheme.grade(self.score)
 
-    def save(self, *args, **kwargs):
-    # Only calculate score if system calculation is selected
+    def apply_calculations(self):
+        """
+            Fill in score, grade, grade point and published date.
+            save() runs this, bulk writes call it directly since bulk_create/bulk_update skip save().
+        """
+        # Only calculate score if system calculation is selected
         if self.use_system_calculation:
             if self.class_score is not None and self.exam_score is not None:
                 self.score = self.class_score + self.exam_score
@@ -290,6 +400,113 @@ class Result(models.Model):
                 
         if self.is_published and not self.published_date:
             self.published_date = timezone.now()
-                
+
+    def save(self, *args, **kwargs):
+        self.apply_calculations()
         super().save(*args, **kwargs)
 
+
+class ResultAggregate(models.Model):
+    """
+        Pre-aggregated statistics of the results for one term, class level and subject.
+        Kept up to date from Result saves/deletes and bulk writes (academics/utils/result_aggregates.py)
+        so the analysis pages read these rows instead of scanning the results table.
+    """
+    term = models.ForeignKey(Term, on_delete=models.CASCADE, related_name='result_aggregates')
+    class_level = models.ForeignKey(ClassLevel, on_delete=models.CASCADE, related_name='result_aggregates')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='result_aggregates')
+    is_published = models.BooleanField(default=False)
+
+    result_count = models.PositiveIntegerField(default=0)
+    score_count = models.PositiveIntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    score_sum_squares = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    min_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    max_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    pass_count = models.PositiveIntegerField(default=0)
+    grade_histogram = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'result_aggregates'
+        verbose_name = 'Result Aggregate'
+        verbose_name_plural = 'Result Aggregates'
+        unique_together = ['term', 'class_level', 'subject', 'is_published']
+
+    def __str__(self):
+        return f"{self.class_level_id}/{self.subject_id} ({self.term_id}) - {self.result_count} results"
+
+    @property
+    def average_score(self):
+        return self.score_sum / self.score_count if self.score_count else None
+
+    @property
+    def std_deviation(self):
+        if not self.score_count:
+            return None
+        mean = self.score_sum / self.score_count
+        variance = max(self.score_sum_squares / self.score_count - mean * mean, Decimal(0))
+        return variance.sqrt()
+
+
+class TermPosition(models.Model):
+    """
+        A student's overall position in their class for a term (dense rank of the average score),
+        computed when the term's results are published (academics/utils/ranking.py)
+    """
+    student = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        limit_choices_to={'role': 'student'},
+        related_name='term_positions'
+    )
+    term = models.ForeignKey(Term, on_delete=models.CASCADE, related_name='positions')
+    class_level = models.ForeignKey(ClassLevel, on_delete=models.CASCADE, related_name='term_positions')
+    average_score = models.DecimalField(max_digits=5, decimal_places=2)
+    subject_count = models.PositiveIntegerField(default=0)
+    position = models.PositiveIntegerField()
+    class_size = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'term_positions'
+        verbose_name = 'Term Position'
+        verbose_name_plural = 'Term Positions'
+        unique_together = ['student', 'term', 'class_level']
+        indexes = [
+            models.Index(fields=['term', 'class_level', 'position']),
+        ]
+        ordering = ['term', 'class_level', 'position']
+
+    def __str__(self):
+        return f"{self.student_id} - {self.term} - {self.position}/{self.class_size}"
+
+
+class TeacherWorkload(models.Model):
+    """
+        Per-teacher summary of ClassSubject assignments, kept up to date by signals when
+        assignments or class enrollments change (academics/utils/teacher_workload.py).
+        Teachers without assignments have no row.
+    """
+    teacher = models.OneToOneField(
+        'accounts.User',
+        on_delete=models.CASCADE,
+        limit_choices_to={'role': 'teacher'},
+        related_name='workload'
+    )
+    assignments = models.PositiveIntegerField(default=0)
+    subjects = models.PositiveIntegerField(default=0)
+    classes = models.PositiveIntegerField(default=0)
+    students = models.PositiveIntegerField(default=0, help_text="Active students in the teacher's classes")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'teacher_workloads'
+        verbose_name = 'Teacher Workload'
+        verbose_name_plural = 'Teacher Workloads'
+        indexes = [
+            models.Index(fields=['-assignments']),
+        ]
+
+    def __str__(self):
+        return f"{self.teacher_id}: {self.assignments} assignments"
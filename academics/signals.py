@@ -0,0 +1,141 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from accounts.models import StudentProfile
+from .grading import invalidate_schemes
+from .models import ClassSubject, GradingScheme, Result, Term
+from .utils.result_aggregates import rebuild_aggregates, update_aggregates
+from .utils.teacher_workload import refresh_workload, refresh_workload_for_classes
+from .utils.enrollment_counts import adjust_class_counts, enrollment_deltas, refresh_subject_counts
+
+
+@receiver([post_save, post_delete], sender=GradingScheme)
+@receiver([post_save, post_delete], sender=Term)
+def clear_grading_scheme_cache(sender, **kwargs):
+    """Compiled schemes (and the term -> academic year map) are rebuilt on next use"""
+    invalidate_schemes()
+
+
+@receiver(pre_save, sender=GradingScheme)
+def remember_scheme_scope(sender, instance, raw, **kwargs):
+    """The scope a scheme covered before this save, its aggregates need rebuilding too"""
+    if raw or instance._state.adding:
+        return
+    instance._previous_scope = GradingScheme.objects.filter(pk=instance.pk).values_list(
+        'academic_year_id', 'class_level_id'
+    ).first()
+
+
+@receiver([post_save, post_delete], sender=GradingScheme)
+def rebuild_pass_counts(sender, instance, raw=False, **kwargs):
+    """Pass counts in the aggregates depend on the scheme's pass mark; rebuild the scope it covers"""
+    if raw:
+        return
+    scopes = {(instance.academic_year_id, instance.class_level_id)}
+    if getattr(instance, '_previous_scope', None):
+        scopes.add(instance._previous_scope)
+
+    for academic_year_id, class_level_id in scopes:
+        filters = {}
+        if academic_year_id:
+            filters['term__academic_year_id'] = academic_year_id
+        if class_level_id:
+            filters['class_level_id'] = class_level_id
+        rebuild_aggregates(**filters)
+
+
+@receiver(pre_save, sender=Result)
+def remember_result_state(sender, instance, raw, **kwargs):
+    """Old values of a result that was not loaded through from_db (or had deferred fields)"""
+    if raw or hasattr(instance, '_aggregate_state'):
+        return
+    if instance._state.adding:
+        instance._aggregate_state = None
+    else:
+        instance._aggregate_state = Result.objects.filter(pk=instance.pk).values_list(*Result.AGGREGATE_FIELDS).first()
+
+
+@receiver(post_save, sender=Result)
+def update_result_aggregates(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    new_state = instance.aggregate_state
+    update_aggregates(instance._aggregate_state, new_state)
+    instance._aggregate_state = new_state
+
+
+@receiver(post_delete, sender=Result)
+def remove_result_from_aggregates(sender, instance, **kwargs):
+    update_aggregates(getattr(instance, '_aggregate_state', instance.aggregate_state), None)
+
+
+@receiver(pre_save, sender=ClassSubject)
+def remember_class_subject_teacher(sender, instance, raw, **kwargs):
+    previous = None
+    if not raw and not instance._state.adding:
+        previous = ClassSubject.objects.filter(pk=instance.pk).values_list('teacher_id', 'subject_id', 'class_level_id').first()
+    instance._previous_teacher_id = previous[0] if previous else None
+    instance._previous_offering = previous[1:] if previous else None
+
+
+@receiver(post_save, sender=ClassSubject)
+def update_teacher_workload(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    refresh_workload({instance.teacher_id, getattr(instance, '_previous_teacher_id', None)})
+
+
+@receiver(post_delete, sender=ClassSubject)
+def remove_from_teacher_workload(sender, instance, **kwargs):
+    refresh_workload({instance.teacher_id})
+
+
+@receiver(pre_save, sender=StudentProfile)
+def remember_student_class(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_class = None
+    else:
+        instance._previous_class = StudentProfile.objects.filter(pk=instance.pk).values_list('current_class_id', 'is_active').first()
+
+
+@receiver(post_save, sender=StudentProfile)
+def update_class_teacher_reach(sender, instance, raw, **kwargs):
+    """Student counts in the workload follow enrollments and class changes"""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_class', None)
+    if previous == (instance.current_class_id, instance.is_active):
+        return
+    refresh_workload_for_classes({instance.current_class_id, previous[0] if previous else None})
+
+
+@receiver(post_delete, sender=StudentProfile)
+def remove_from_class_teacher_reach(sender, instance, **kwargs):
+    refresh_workload_for_classes({instance.current_class_id})
+
+
+@receiver(post_save, sender=ClassSubject)
+def update_subject_enrollment_count(sender, instance, raw, **kwargs):
+    if raw or getattr(instance, '_previous_offering', None) == (instance.subject_id, instance.class_level_id):
+        return
+    previous = getattr(instance, '_previous_offering', None)
+    refresh_subject_counts({instance.subject_id, previous[0] if previous else None})
+
+
+@receiver(post_delete, sender=ClassSubject)
+def remove_from_subject_enrollment_count(sender, instance, **kwargs):
+    refresh_subject_counts({instance.subject_id})
+
+
+@receiver(post_save, sender=StudentProfile)
+def update_enrollment_counts(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    adjust_class_counts(enrollment_deltas(
+        getattr(instance, '_previous_class', None),
+        (instance.current_class_id, instance.is_active),
+    ))
+
+
+@receiver(post_delete, sender=StudentProfile)
+def remove_from_enrollment_counts(sender, instance, **kwargs):
+    adjust_class_counts(enrollment_deltas((instance.current_class_id, instance.is_active), None))
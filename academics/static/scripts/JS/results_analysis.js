@@ -595,6 +595,12 @@ async function exportAnalysis(format = 'pdf') {
             exportUrl += `&${key}=${filters[key]}`;
         }
     });
+
+    // Raw exports can be large: let the browser download the stream straight to disk
+    if (format === 'raw') {
+        window.location.href = exportUrl;
+        return;
+    }
     
     // Show loading state on all export buttons
     const exportOptions = document.querySelectorAll('.export-option');
@@ -0,0 +1,92 @@
+import os
+import shutil
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from core.jobs import register_task, set_progress, job_file_path
+from core.activity import record_results_published
+from .models import Subject, Term, ClassLevel, Result
+from .utils.result_import import import_results
+from .utils.result_aggregates import refresh_aggregates_for
+from .utils.ranking import compute_positions_for
+from .utils.report_cards import build_report_cards
+from .utils.result_export import raw_results, write_raw_workbook
+
+
+@register_task('export_analysis_report')
+def export_analysis_report_task(job, format='pdf', academic_year=None, class_level=None, term=None, subject=None):
+    """Render the analysis report to a file"""
+    from .views import analysis_report_file
+
+    if format == 'raw':
+        set_progress(job.id, 10, 'Writing results')
+        path = job_file_path(job.id, '.xlsx')
+        write_raw_workbook(raw_results(academic_year, class_level, term, subject), path)
+        return {'file': path, 'filename': 'results_raw_export.xlsx'}
+
+    set_progress(job.id, 10, 'Rendering report')
+    cached_path = analysis_report_file(format, academic_year, class_level, term)
+
+    # Copy out of the report cache, which may evict its file while the job output is still needed
+    extension = os.path.splitext(cached_path)[1]
+    path = job_file_path(job.id, extension)
+    shutil.copyfile(cached_path, path)
+    return {'file': path, 'filename': f"results_analysis_report{extension}"}
+
+
+@register_task('import_results')
+def import_results_task(job, path, filename, subject, term, uploaded_by, is_published=False):
+    """Import a results file that was saved to disk by the upload view"""
+    subject = Subject.objects.get(id=subject)
+    term = Term.objects.get(id=term)
+    user = User.objects.get(id=uploaded_by)
+    size = os.path.getsize(path) or 1
+
+    try:
+        with open(path, 'rb') as file_obj:
+            def progress(summary):
+                # File position is a good enough estimate of how far through we are
+                percent = min(99, int(file_obj.tell() * 100 / size))
+                set_progress(job.id, percent, f"{summary['total_rows']} rows processed")
+
+            summary = import_results(file_obj, filename, subject, term, user, is_published=is_published, progress=progress)
+    finally:
+        os.remove(path)
+
+    summary['error_report_url'] = None
+    if summary['error_report']:
+        summary['error_report_url'] = reverse('download_import_errors', args=[summary['error_report']])
+    return summary
+
+
+@register_task('publish_results')
+def publish_results_task(job, result_ids, publish=True, uploaded_by=None):
+    """Publish or unpublish a large set of results"""
+    results = Result.objects.filter(id__in=result_ids)
+    if uploaded_by:
+        results = results.filter(uploaded_by_id=uploaded_by)
+
+    updated_count = results.update(is_published=publish, last_modified=timezone.now())
+    refresh_aggregates_for(results)
+    compute_positions_for(results)
+    actor = job.created_by
+    record_results_published(updated_count, publish, actor=actor, details=f"By {actor.get_full_name() or actor.username}" if actor else '')
+    return {'updated_count': updated_count}
+
+
+@register_task('generate_report_cards')
+def generate_report_cards_task(job, term, class_level):
+    """Render the report cards of a whole class into one ZIP"""
+    term = Term.objects.select_related('academic_year').get(id=term)
+    class_level = ClassLevel.objects.get(id=class_level)
+    path = job_file_path(job.id, '.zip')
+
+    def progress(done, total):
+        set_progress(job.id, done * 99 / total, f"{done} of {total} report cards rendered")
+
+    count = build_report_cards(term, class_level, path, progress=progress)
+    if not count:
+        raise ValueError(f"No published results for {class_level.name} in {term.name}")
+
+    filename = f"report_cards_{class_level.name}_{term.name}.zip".replace(' ', '_')
+    return {'file': path, 'filename': filename, 'report_cards': count}
@@ -15,6 +15,7 @@ urlpatterns = [
     path('classes/<str:class_id>/delete/', views.class_delete, name='class_delete'),
     path('classes/<str:class_id>/data/', views.get_class_data, name='get_class_data'),
     path('api/teachers/', views.get_teachers_list, name='get_teachers_list'),
+    path('api/typeahead/<str:role>/', views.people_typeahead, name='people_typeahead'),
     path('api/subjects/', views.get_subjects_list, name='get_subjects_list'),
     path('classes/<str:class_id>/assign-teacher/', views.assign_teacher_to_class, name='assign_teacher_to_class'),
     path('classes/<str:class_id>/assign-subjects/', views.assign_subjects_to_class, name='assign_subjects_to_class'),
@@ -35,6 +36,10 @@ urlpatterns = [
     path('results/', views.results_dashboard, name='results_dashboard'),
     path('results/upload/', views.upload_results_form, name='upload_results'),
     path('results/upload/result/new/', views.upload_results_submit, name='upload_results_form'),
+    path('results/upload/bulk/', views.upload_results_bulk, name='upload_results_bulk'),
+    path('results/import/', views.import_results_file, name='import_results_file'),
+    path('results/import/<uuid:report_id>/errors/', views.download_import_errors, name='download_import_errors'),
+    path('results/report-cards/', views.generate_report_cards, name='generate_report_cards'),
     path('results/analysis/', views.results_analysis, name='results_analysis'),
     path('results/<uuid:result_id>/', views.result_detail, name='result_detail'),
     path('results/<uuid:result_id>/publish/', views.publish_results, name='publish_result'),
@@ -42,6 +47,7 @@ urlpatterns = [
     path('api/results/students/', views.get_students_for_results, name='get_students_for_results'),
     path('api/results/existing/', views.get_existing_results, name='get_existing_results'),
     path('api/results/publish-bulk/', views.publish_results, name='publish_results_bulk'),
+    path('api/results/export/', views.export_results_stream, name='export_results_stream'),
     path('api/terms/', views.get_terms_for_academic_year, name='get_terms_for_academic_year'),
     path('results/analysis/export/', views.export_analysis_report, name='export_analysis_report'),
     path("terms/all", views.terms_list, name="terms_list"),
@@ -0,0 +1,174 @@
+from decimal import Decimal, InvalidOperation
+import uuid
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import User
+from academics.models import Result
+from academics.utils.result_aggregates import refresh_aggregates
+from academics.utils.ranking import compute_positions
+from core.activity import record_activity
+from core.sqlite import retry_on_locked
+
+
+# Fields written back by bulk_update (bulk_update skips auto_now, so last_modified is set by hand)
+RESULT_UPDATE_FIELDS = [
+    'class_level', 'class_score', 'exam_score', 'score', 'grade', 'grade_point',
+    'remarks', 'use_system_calculation', 'is_published', 'published_date',
+    'uploaded_by', 'last_modified',
+]
+
+
+def _to_score(value, label):
+    """Convert a raw score to Decimal and check it is within 0-100"""
+    try:
+        score = Decimal(str(value if value not in (None, '') else 0))
+        # NaN/Infinity parse fine but cannot be range-checked or stored
+        if not score.is_finite():
+            raise InvalidOperation
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid {label} format.")
+
+    if not (0 <= score <= 100):
+        raise ValueError(f"{label.capitalize()} must be 0-100.")
+    return score
+
+
+def parse_result_scores(calculation_mode, class_score, exam_score, score=None):
+    """
+        Validate the scores of one gradebook row.
+        Returns the score fields for Result, raises ValueError with a readable message.
+    """
+    class_val = _to_score(class_score, 'class score')
+    exam_val = _to_score(exam_score, 'exam score')
+
+    if calculation_mode == 'manual':
+        return {
+            'class_score': class_val,
+            'exam_score': exam_val,
+            'score': _to_score(score, 'total score'),
+            'use_system_calculation': False,
+        }
+
+    return {
+        'class_score': class_val,
+        'exam_score': exam_val,
+        'score': None,
+        'use_system_calculation': True,
+    }
+
+
+def get_class_student_ids(class_level, student_ids):
+    """Return the subset of student_ids (User ids) currently in class_level, in one query"""
+    valid_ids = []
+    for student_id in student_ids:
+        try:
+            valid_ids.append(uuid.UUID(str(student_id)))
+        except ValueError:
+            continue
+
+    return {
+        str(pk) for pk in User.objects.filter(
+            id__in=valid_ids,
+            role='student',
+            student_profile__current_class=class_level,
+        ).values_list('id', flat=True)
+    }
+
+
+@retry_on_locked
+@transaction.atomic
+def save_result(student, subject, term, fields):
+    """
+        Create or update one student's result. When the result is or was published the
+        class positions are recomputed in the same transaction. Returns (result, created).
+    """
+    previous = Result.objects.filter(
+        student=student, subject=subject, term=term
+    ).values_list('is_published', 'class_level_id').first()
+
+    result, created = Result.objects.update_or_create(
+        student=student,
+        subject=subject,
+        term=term,
+        defaults=fields
+    )
+    # Publishing, unpublishing or moving a published result all change the positions
+    if result.is_published or (previous and previous[0]):
+        class_level_ids = {result.class_level_id}
+        if previous:
+            class_level_ids.add(previous[1])
+        compute_positions(term.id, class_level_ids)
+    return result, created
+
+
+@retry_on_locked
+@transaction.atomic
+def write_results(class_level, subject, term, uploaded_by, entries, is_published=False):
+    """
+        Save many results for one (class_level, subject, term) with bulk writes.
+
+        entries maps student User id -> score fields (see parse_result_scores) plus optional remarks.
+        Existing results are loaded in one query, then new rows go through bulk_create
+        and existing rows through bulk_update. Returns {student_id: 'created' | 'updated'}.
+    """
+    if not entries:
+        return {}
+
+    existing = {
+        str(result.student_id): result
+        for result in Result.objects.filter(
+            subject=subject,
+            term=term,
+            student_id__in=list(entries.keys()),
+        )
+    }
+
+    # Aggregates to refresh afterwards, including the old class of a result that moved
+    touched = {(term.id, class_level.id, subject.id)}
+    touched.update((term.id, result.class_level_id, subject.id) for result in existing.values())
+    # Published rows being written (or overwritten) change the class positions
+    rerank = is_published or any(result.is_published for result in existing.values())
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    statuses = {}
+
+    for student_id, fields in entries.items():
+        result = existing.get(student_id)
+        if result is None:
+            result = Result(student_id=student_id, subject=subject, term=term)
+            to_create.append(result)
+            statuses[student_id] = 'created'
+        else:
+            to_update.append(result)
+            statuses[student_id] = 'updated'
+
+        result.class_level = class_level
+        result.uploaded_by = uploaded_by
+        result.class_score = fields['class_score']
+        result.exam_score = fields['exam_score']
+        result.score = fields['score']
+        result.use_system_calculation = fields['use_system_calculation']
+        result.remarks = fields.get('remarks') or None
+        result.is_published = is_published
+        result.last_modified = now
+        result.apply_calculations()
+
+    if to_create:
+        Result.objects.bulk_create(to_create, batch_size=500)
+    if to_update:
+        Result.objects.bulk_update(to_update, RESULT_UPDATE_FIELDS, batch_size=500)
+
+    refresh_aggregates(touched)
+    if rerank:
+        compute_positions(term.id, {class_level_id for _, class_level_id, _ in touched})
+
+    noun = 'result' if len(statuses) == 1 else 'results'
+    record_activity(
+        'result_upload',
+        'Results uploaded',
+        f"{subject.name} - {class_level.name} ({len(statuses)} {noun})",
+        actor=uploaded_by,
+    )
+    return statuses
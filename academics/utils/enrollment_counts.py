@@ -0,0 +1,84 @@
+"""
+    Stored enrollment counters: ClassLevel.student_count (active students in the class) and
+    Subject.student_count (active students in the classes offering the subject).
+
+    Student changes are applied as F() increments in the signal handlers, so concurrent
+    enrollments never lose updates; subject offerings are recounted from the class counters.
+    reconcile_counts() recomputes everything from the source tables.
+"""
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from accounts.models import StudentProfile
+from academics.models import ClassLevel, ClassSubject, Subject
+
+
+def enrollment_deltas(previous, current):
+    """
+        {class_level_id: +1/-1} for a student going from `previous` to `current`,
+        each a (current_class_id, is_active) pair or None for a missing profile
+    """
+    deltas = Counter()
+    if previous and previous[0] and previous[1]:
+        deltas[previous[0]] -= 1
+    if current and current[0] and current[1]:
+        deltas[current[0]] += 1
+    return {class_level_id: delta for class_level_id, delta in deltas.items() if delta}
+
+
+@transaction.atomic
+def adjust_class_counts(deltas):
+    """Apply {class_level_id: delta} to the class counters and the counters of the subjects they offer"""
+    for class_level_id, delta in deltas.items():
+        if not delta:
+            continue
+        ClassLevel.objects.filter(id=class_level_id).update(student_count=F('student_count') + delta)
+        Subject.objects.filter(
+            id__in=ClassSubject.objects.filter(class_level_id=class_level_id).values('subject_id')
+        ).update(student_count=F('student_count') + delta)
+
+
+def _subject_total(subject_id):
+    return ClassLevel.objects.filter(
+        id__in=ClassSubject.objects.filter(subject_id=subject_id).values('class_level_id')
+    ).aggregate(total=Sum('student_count'))['total'] or 0
+
+
+@transaction.atomic
+def refresh_subject_counts(subject_ids):
+    """Recount subjects from the class counters after the classes offering them changed"""
+    for subject_id in {subject_id for subject_id in subject_ids if subject_id}:
+        Subject.objects.filter(id=subject_id).update(student_count=_subject_total(subject_id))
+
+
+@transaction.atomic
+def reconcile_counts(dry_run=False):
+    """
+        Recompute every counter from StudentProfile and ClassSubject.
+        Returns [(label, stored, actual)] for the counters that had drifted.
+    """
+    actual = dict(
+        StudentProfile.objects.filter(is_active=True, current_class__isnull=False)
+        .order_by().values('current_class_id').annotate(count=Count('id'))
+        .values_list('current_class_id', 'count')
+    )
+
+    drift = []
+    for class_level in ClassLevel.objects.select_for_update().only('id', 'name', 'student_count'):
+        count = actual.get(class_level.id, 0)
+        if class_level.student_count != count:
+            drift.append((f"Class {class_level.name}", class_level.student_count, count))
+            if not dry_run:
+                ClassLevel.objects.filter(id=class_level.id).update(student_count=count)
+
+    classes_by_subject = defaultdict(set)
+    for subject_id, class_level_id in ClassSubject.objects.order_by().values_list('subject_id', 'class_level_id').distinct():
+        classes_by_subject[subject_id].add(class_level_id)
+
+    for subject in Subject.objects.select_for_update().only('id', 'code', 'student_count'):
+        count = sum(actual.get(class_level_id, 0) for class_level_id in classes_by_subject[subject.id])
+        if subject.student_count != count:
+            drift.append((f"Subject {subject.code}", subject.student_count, count))
+            if not dry_run:
+                Subject.objects.filter(id=subject.id).update(student_count=count)
+    return drift
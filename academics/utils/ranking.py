@@ -0,0 +1,128 @@
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, FloatField, Window
+from django.db.models.functions import Cast, DenseRank
+from academics.models import Result, TermPosition
+
+
+def _ranked_results(term_id, class_level_ids):
+    """Published, scored results of a term for the given class levels"""
+    return Result.objects.filter(
+        term_id=term_id,
+        class_level_id__in=class_level_ids,
+        is_published=True,
+        score__isnull=False,
+    ).order_by()
+
+
+def _dense_rank(rows, group_key, value_key):
+    """In-Python DENSE_RANK() for databases without window functions: rows get a 'position' key"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[group_key(row)].append(row)
+
+    for group in groups.values():
+        group.sort(key=lambda row: row[value_key], reverse=True)
+        position = 0
+        previous = None
+        for row in group:
+            if row[value_key] != previous:
+                position += 1
+                previous = row[value_key]
+            row['position'] = position
+    return rows
+
+
+def _subject_positions(results):
+    """{result_id: position} ranked per class level and subject"""
+    if connection.features.supports_over_clause:
+        rows = results.annotate(position=Window(
+            DenseRank(),
+            partition_by=[F('class_level_id'), F('subject_id')],
+            # Ordering on a float: SQLite wraps a decimal ORDER BY inside OVER() in an invalid CAST
+            order_by=Cast('score', FloatField()).desc(),
+        )).values_list('id', 'position')
+        return dict(rows)
+
+    rows = _dense_rank(
+        list(results.values('id', 'class_level_id', 'subject_id', 'score')),
+        lambda row: (row['class_level_id'], row['subject_id']),
+        'score',
+    )
+    return {row['id']: row['position'] for row in rows}
+
+
+def _overall_positions(results):
+    """[{student_id, class_level_id, average_score, subject_count, position}] ranked per class level"""
+    averages = results.values('student_id', 'class_level_id').annotate(
+        average_score=Avg('score'),
+        subject_count=Count('id'),
+    )
+    if connection.features.supports_over_clause:
+        return list(averages.annotate(position=Window(
+            DenseRank(),
+            partition_by=[F('class_level_id')],
+            order_by=Avg('score', output_field=FloatField()).desc(),
+        )))
+
+    return _dense_rank(list(averages), lambda row: row['class_level_id'], 'average_score')
+
+
+@transaction.atomic
+def compute_positions(term_id, class_level_ids=None):
+    """
+        Rank a term's published results: each result's position in its class for the subject
+        (Result.subject_position) and each student's overall position in the class (TermPosition).
+        Recomputes whole classes at once; class_level_ids limits which classes, None means all.
+        Returns the number of students ranked.
+    """
+    if class_level_ids is None:
+        class_level_ids = list(
+            Result.objects.filter(term_id=term_id).order_by()
+            .values_list('class_level_id', flat=True).distinct()
+        )
+    class_level_ids = list(class_level_ids)
+    results = _ranked_results(term_id, class_level_ids)
+
+    # Per-subject positions: clear the classes, then write back only the ranked rows
+    Result.objects.filter(
+        term_id=term_id, class_level_id__in=class_level_ids, subject_position__isnull=False
+    ).update(subject_position=None)
+    subject_positions = _subject_positions(results)
+    Result.objects.bulk_update(
+        [Result(id=result_id, subject_position=position) for result_id, position in subject_positions.items()],
+        ['subject_position'],
+        batch_size=500,
+    )
+
+    # Overall positions
+    ranked = _overall_positions(results)
+    class_sizes = defaultdict(int)
+    for row in ranked:
+        class_sizes[row['class_level_id']] += 1
+
+    TermPosition.objects.filter(term_id=term_id, class_level_id__in=class_level_ids).delete()
+    TermPosition.objects.bulk_create([
+        TermPosition(
+            student_id=row['student_id'],
+            term_id=term_id,
+            class_level_id=row['class_level_id'],
+            average_score=Decimal(str(row['average_score'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            subject_count=row['subject_count'],
+            position=row['position'],
+            class_size=class_sizes[row['class_level_id']],
+        )
+        for row in ranked
+    ], batch_size=500)
+    return len(ranked)
+
+
+def compute_positions_for(results):
+    """Re-rank every (term, class level) a Result queryset touches, e.g. after publishing it"""
+    classes_by_term = defaultdict(set)
+    for term_id, class_level_id in results.order_by().values_list('term_id', 'class_level_id').distinct():
+        classes_by_term[term_id].add(class_level_id)
+
+    for term_id, class_level_ids in classes_by_term.items():
+        compute_positions(term_id, class_level_ids)
@@ -0,0 +1,136 @@
+"""
+    Disk cache for generated analysis reports.
+
+    A report is stored under the sha256 of its format, filters, grading scheme and a
+    data-version stamp (latest Result.last_modified and row count for the filters), so
+    any change to the underlying results produces a new key. Hits touch the file's
+    mtime and the oldest files are evicted once the directory exceeds its size budget.
+
+    The Last-Modified date served with a report is when its key last changed, not the
+    latest Result.last_modified: deleting results or changing the grading scheme yields a
+    new key, and so a newer date, without moving the latest last_modified.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from academics.grading import get_scheme_for_filters
+from academics.models import Result
+
+
+REPORT_CACHE_DIR = 'report_cache'
+REPORT_CACHE_VERSION = 1   # Bump when the report layout changes to invalidate every cached file
+
+
+def cache_dir():
+    directory = os.path.join(settings.MEDIA_ROOT, REPORT_CACHE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def cache_budget():
+    """Maximum total size of the cache directory in bytes"""
+    return settings.REPORT_CACHE_MAX_BYTES
+
+
+def report_version(academic_year_id=None, class_level_id=None, term_id=None):
+    """
+        (cache key, last modified datetime) for a report over these filters.
+        One aggregate query over the filtered results.
+    """
+    results = Result.objects.all()
+    if academic_year_id:
+        results = results.filter(term__academic_year_id=academic_year_id)
+    if class_level_id:
+        results = results.filter(class_level_id=class_level_id)
+    if term_id:
+        results = results.filter(term_id=term_id)
+
+    stamp = results.aggregate(last_modified=Max('last_modified'), count=Count('id'))
+    scheme = get_scheme_for_filters(academic_year_id, class_level_id, term_id)
+
+    key_data = [
+        REPORT_CACHE_VERSION,
+        [academic_year_id or None, class_level_id or None, term_id or None],
+        stamp['last_modified'].isoformat() if stamp['last_modified'] else None,
+        stamp['count'],
+        scheme.fingerprint(),
+    ]
+    key = hashlib.sha256(json.dumps(key_data).encode()).hexdigest()
+    return key, _changed_at(key_data[1], key)
+
+
+def _changed_at(filters, key):
+    """
+        When the report for these filters last changed key, at least a second after the
+        previous key's date so HTTP's whole-second dates always move. A lost cache entry
+        starts again from the current time.
+    """
+    cache_key = 'report_changed:' + ':'.join(str(value or '') for value in filters)
+    seen = cache.get(cache_key)
+    if seen and seen[0] == key:
+        return seen[1]
+
+    changed_at = timezone.now().replace(microsecond=0)
+    if seen:
+        changed_at = max(changed_at, seen[1] + timedelta(seconds=1))
+    cache.set(cache_key, (key, changed_at), timeout=None)
+    return changed_at
+
+
+def cached_report(key, extension, render):
+    """
+        Path of the cached file for `key`, calling render(path) to create it on a miss.
+        Files are rendered to a temporary name and renamed into place, so a concurrent
+        reader never sees a half-written report.
+    """
+    directory = cache_dir()
+    path = os.path.join(directory, f"{key}{extension}")
+
+    if os.path.exists(path):
+        try:
+            os.utime(path)   # Mark as recently used
+            return path
+        except FileNotFoundError:
+            pass   # Evicted by another process in the meantime
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        render(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    evict(keep=path)
+    return path
+
+
+def evict(budget=None, keep=None):
+    """Delete least recently used reports until the cache fits in `budget` bytes"""
+    budget = cache_budget() if budget is None else budget
+    directory = cache_dir()
+
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= budget:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
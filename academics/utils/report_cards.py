@@ -0,0 +1,204 @@
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+from concurrent.futures import as_completed
+from datetime import datetime
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from core.process_pool import process_pool
+from academics.models import Result, TermPosition
+
+
+def _number(value):
+    return float(value) if value is not None else None
+
+
+def collect_report_cards(term, class_level):
+    """
+        Everything needed to print the report cards of a class for a term, as plain
+        (picklable) dicts so they can be handed to worker processes.
+        One query for the results and one for the stored positions.
+    """
+    positions = {
+        position.student_id: position
+        for position in TermPosition.objects.filter(term=term, class_level=class_level)
+    }
+
+    results = Result.objects.filter(
+        term=term,
+        class_level=class_level,
+        is_published=True,
+    ).select_related(
+        'student', 'student__student_profile', 'subject'
+    ).order_by('student__last_name', 'student__first_name', 'student_id', 'subject__name')
+
+    cards = {}
+    for result in results:
+        card = cards.get(result.student_id)
+        if card is None:
+            student = result.student
+            profile = getattr(student, 'student_profile', None)
+            position = positions.get(result.student_id)
+            card = cards[result.student_id] = {
+                'student_name': student.get_full_name() or student.username,
+                'student_id': profile.student_id if profile else '',
+                'class_level': class_level.name,
+                'term': term.name,
+                'academic_year': term.academic_year.name if term.academic_year else '',
+                'average_score': _number(position.average_score) if position else None,
+                'position': position.position if position else None,
+                'class_size': position.class_size if position else None,
+                'subjects': [],
+            }
+        card['subjects'].append({
+            'name': result.subject.name,
+            'code': result.subject.code,
+            'class_score': _number(result.class_score),
+            'exam_score': _number(result.exam_score),
+            'score': _number(result.score),
+            'grade': result.grade,
+            'position': result.subject_position,
+            'remarks': result.remarks or '',
+        })
+    return list(cards.values())
+
+
+def _format_score(value):
+    return f"{value:.1f}" if value is not None else '-'
+
+
+def report_card_filename(card):
+    name = re.sub(r'[^A-Za-z0-9]+', '_', card['student_name']).strip('_')
+    return f"{card['student_id'] or 'student'}_{name}.pdf"
+
+
+def render_report_card(card, path):
+    """Render one student's report card PDF to `path`. Runs in a worker process."""
+    doc = SimpleDocTemplate(
+        path,
+        pagesize=A4,
+        rightMargin=54,
+        leftMargin=54,
+        topMargin=54,
+        bottomMargin=54
+    )
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'ReportCardTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=6,
+        alignment=1,  # Center
+        textColor=colors.HexColor('#1e293b')
+    )
+    subtitle_style = ParagraphStyle(
+        'ReportCardSubtitle',
+        parent=styles['Normal'],
+        fontSize=11,
+        alignment=1,
+        spaceAfter=18,
+        textColor=colors.HexColor('#64748b')
+    )
+
+    story = [
+        Paragraph("Terminal Report", title_style),
+        Paragraph(f"{card['term']} - {card['academic_year']}", subtitle_style),
+    ]
+
+    position = '-'
+    if card['position']:
+        position = f"{card['position']} of {card['class_size']}"
+
+    details = Table([
+        ['Name', card['student_name'], 'Student ID', card['student_id']],
+        ['Class', card['class_level'], 'Position', position],
+        ['Average', f"{_format_score(card['average_score'])}%", 'Subjects', str(len(card['subjects']))],
+    ], colWidths=[1 * inch, 2.4 * inch, 1 * inch, 1.9 * inch])
+    details.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0'))
+    ]))
+    story.append(details)
+    story.append(Spacer(1, 20))
+
+    rows = [['Subject', 'Class', 'Exam', 'Total', 'Grade', 'Position', 'Remarks']]
+    for subject in card['subjects']:
+        rows.append([
+            subject['name'],
+            _format_score(subject['class_score']),
+            _format_score(subject['exam_score']),
+            _format_score(subject['score']),
+            subject['grade'] or '-',
+            str(subject['position'] or '-'),
+            Paragraph(escape(subject['remarks']), styles['Normal']),
+        ])
+
+    subjects = Table(rows, colWidths=[1.7 * inch, 0.6 * inch, 0.6 * inch, 0.6 * inch, 0.6 * inch, 0.7 * inch, 1.5 * inch])
+    subjects.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('ALIGN', (1, 0), (5, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0'))
+    ]))
+    story.append(subjects)
+    story.append(Spacer(1, 30))
+    story.append(Paragraph(
+        f"Generated {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+        ParagraphStyle('ReportCardFooter', parent=styles['Normal'], fontSize=8, textColor=colors.HexColor('#94a3b8'))
+    ))
+
+    doc.build(story)
+    return path
+
+
+def build_report_cards(term, class_level, output_path, workers=None, progress=None):
+    """
+        Render the report cards of a class for a term in parallel and bundle them into
+        a ZIP at `output_path`. PDFs go to a temporary directory on disk, never into memory.
+        progress(done, total) is called as cards finish. Returns the number of cards.
+    """
+    cards = collect_report_cards(term, class_level)
+    if not cards:
+        return 0
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(cards)))
+    work_dir = tempfile.mkdtemp(prefix='report_cards_')
+    try:
+        paths = {}
+        with process_pool(max_workers=workers) as pool:
+            futures = []
+            for index, card in enumerate(cards):
+                # Index prefix keeps names unique even when two students share a name and id
+                filename = f"{index + 1:04d}_{report_card_filename(card)}"
+                path = os.path.join(work_dir, filename)
+                paths[path] = filename
+                futures.append(pool.submit(render_report_card, card, path))
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                if progress:
+                    progress(done, len(cards))
+
+        # PDFs are already compressed, store them as-is
+        with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for path, filename in sorted(paths.items(), key=lambda item: item[1]):
+                archive.write(path, arcname=filename)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return len(cards)
@@ -0,0 +1,256 @@
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Max, Min, Q, Sum
+from academics.grading import get_scheme_for_term
+from academics.models import Result, ResultAggregate, Subject
+
+
+AGGREGATE_KEY = ('term_id', 'class_level_id', 'subject_id', 'is_published')
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _build_rows(results, term_id, class_level_id):
+    """Aggregate rows for the results of one term and class level (two GROUP BY queries)"""
+    pass_mark = get_scheme_for_term(term_id, class_level_id).pass_mark
+
+    histograms = defaultdict(dict)
+    for row in results.exclude(grade='').values('subject_id', 'is_published', 'grade').annotate(count=Count('id')):
+        histograms[(row['subject_id'], row['is_published'])][row['grade']] = row['count']
+
+    stats = results.values('subject_id', 'is_published').annotate(
+        result_count=Count('id'),
+        score_count=Count('score'),
+        score_sum=Sum('score'),
+        score_sum_squares=Sum(F('score') * F('score'), output_field=DecimalField(max_digits=18, decimal_places=4)),
+        min_score=Min('score'),
+        max_score=Max('score'),
+        pass_count=Count('id', filter=Q(score__gte=pass_mark)),
+    )
+    return [
+        ResultAggregate(
+            term_id=term_id,
+            class_level_id=class_level_id,
+            grade_histogram=histograms[(row['subject_id'], row['is_published'])],
+            **{**row, 'score_sum': row['score_sum'] or 0, 'score_sum_squares': row['score_sum_squares'] or 0},
+        )
+        for row in stats
+    ]
+
+
+def refresh_aggregates(keys):
+    """
+        Rebuild the aggregates for (term_id, class_level_id, subject_id) keys from the results table.
+        Used after bulk writes (bulk_create/bulk_update/update) which skip the save signals.
+    """
+    subjects_by_group = defaultdict(set)
+    for term_id, class_level_id, subject_id in keys:
+        subjects_by_group[(term_id, class_level_id)].add(subject_id)
+
+    rows = []
+    with transaction.atomic():
+        for (term_id, class_level_id), subject_ids in subjects_by_group.items():
+            ResultAggregate.objects.filter(
+                term_id=term_id, class_level_id=class_level_id, subject_id__in=subject_ids
+            ).delete()
+            results = Result.objects.filter(
+                term_id=term_id, class_level_id=class_level_id, subject_id__in=subject_ids
+            ).order_by()
+            rows.extend(_build_rows(results, term_id, class_level_id))
+        ResultAggregate.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def refresh_aggregates_for(results):
+    """Refresh every aggregate a Result queryset touches (call before and/or after the bulk change)"""
+    return refresh_aggregates(
+        results.order_by().values_list('term_id', 'class_level_id', 'subject_id').distinct()
+    )
+
+
+def rebuild_aggregates(**filters):
+    """Rebuild all aggregates matching `filters` (e.g. term_id=..., term__academic_year_id=...)"""
+    results = Result.objects.filter(**filters).order_by()
+
+    rows = []
+    with transaction.atomic():
+        ResultAggregate.objects.filter(**filters).delete()
+        for term_id, class_level_id in results.values_list('term_id', 'class_level_id').distinct():
+            rows.extend(_build_rows(results.filter(term_id=term_id, class_level_id=class_level_id), term_id, class_level_id))
+        ResultAggregate.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def _apply(row, state, sign, pass_mark):
+    """Add (sign=1) or remove (sign=-1) one result; True when min/max need recomputing"""
+    score, grade = state[4], state[5]
+    row.result_count += sign
+
+    if grade:
+        count = row.grade_histogram.get(grade, 0) + sign
+        if count > 0:
+            row.grade_histogram[grade] = count
+        else:
+            row.grade_histogram.pop(grade, None)
+
+    if score is None:
+        return False
+
+    row.score_count += sign
+    row.score_sum += sign * score
+    row.score_sum_squares += sign * score * score
+    if score >= pass_mark:
+        row.pass_count += sign
+
+    if sign > 0:
+        row.min_score = score if row.min_score is None else min(row.min_score, score)
+        row.max_score = score if row.max_score is None else max(row.max_score, score)
+        return False
+    # Removing the current min or max: the next one can only come from the results table
+    return score in (row.min_score, row.max_score)
+
+
+def update_aggregates(old_state, new_state):
+    """
+        Move one result between aggregates: remove its old state, add its new one.
+        States are Result.aggregate_state tuples, None for "did not exist".
+    """
+    if old_state == new_state:
+        return
+
+    changes = defaultdict(list)
+    if old_state:
+        changes[old_state[:4]].append((old_state, -1))
+    if new_state:
+        changes[new_state[:4]].append((new_state, 1))
+
+    with transaction.atomic():
+        for key, items in changes.items():
+            lookup = dict(zip(AGGREGATE_KEY, key))
+            row = ResultAggregate.objects.select_for_update().filter(**lookup).first()
+
+            if row is None:
+                if any(sign < 0 for _, sign in items):
+                    # Out of step (e.g. rows written before aggregates existed), rebuild this key
+                    refresh_aggregates([key[:3]])
+                    continue
+                row = ResultAggregate(**lookup)
+
+            pass_mark = get_scheme_for_term(lookup['term_id'], lookup['class_level_id']).pass_mark
+            needs_bounds = False
+            for state, sign in items:
+                needs_bounds |= _apply(row, state, sign, pass_mark)
+
+            if row.result_count <= 0:
+                if row.pk:
+                    row.delete()
+                continue
+
+            if needs_bounds:
+                bounds = Result.objects.filter(**lookup).aggregate(min_score=Min('score'), max_score=Max('score'))
+                row.min_score, row.max_score = bounds['min_score'], bounds['max_score']
+
+            try:
+                with transaction.atomic():
+                    row.save()
+            except IntegrityError:
+                # Another request created the row first
+                refresh_aggregates([key[:3]])
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def get_aggregates(academic_year_id=None, class_level_id=None, term_id=None, subject_id=None, is_published=None):
+    """Aggregate rows for the usual analysis filters"""
+    rows = ResultAggregate.objects.select_related('subject', 'class_level', 'term', 'term__academic_year')
+
+    if academic_year_id:
+        rows = rows.filter(term__academic_year_id=academic_year_id)
+    if class_level_id:
+        rows = rows.filter(class_level_id=class_level_id)
+    if term_id:
+        rows = rows.filter(term_id=term_id)
+    if subject_id:
+        rows = rows.filter(subject_id=subject_id)
+    if is_published is not None:
+        rows = rows.filter(is_published=is_published)
+    return rows
+
+
+def aggregates_for(results):
+    """
+        Unsaved aggregate rows computed from a Result queryset, for scopes the stored rows
+        cannot express (e.g. a teacher's own uploads). Two queries per term and class level.
+    """
+    results = results.order_by()
+    rows = []
+    for term_id, class_level_id in results.values_list('term_id', 'class_level_id').distinct():
+        rows.extend(_build_rows(results.filter(term_id=term_id, class_level_id=class_level_id), term_id, class_level_id))
+
+    subjects = Subject.objects.in_bulk({row.subject_id for row in rows})
+    for row in rows:
+        row.subject = subjects[row.subject_id]
+    return rows
+
+
+def count_students(results, group_by=None):
+    """
+        Exact COUNT(DISTINCT student_id) over a Result queryset; the aggregate rows cannot give
+        this once students sit different subjects. With `group_by` (a field or tuple of fields)
+        returns {value or tuple of values: count}.
+    """
+    results = results.order_by()
+    if group_by is None:
+        return results.aggregate(count=Count('student_id', distinct=True))['count']
+
+    fields = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+    counts = results.values(*fields).annotate(count=Count('student_id', distinct=True))
+    return {
+        row[fields[0]] if len(fields) == 1 else tuple(row[field] for field in fields): row['count']
+        for row in counts
+    }
+
+
+def summarize(rows):
+    """Combine aggregate rows into the figures the analysis pages show"""
+    rows = list(rows)
+    result_count = sum(row.result_count for row in rows)
+    score_count = sum(row.score_count for row in rows)
+    score_sum = sum(row.score_sum for row in rows)
+    pass_count = sum(row.pass_count for row in rows)
+    min_scores = [row.min_score for row in rows if row.min_score is not None]
+    max_scores = [row.max_score for row in rows if row.max_score is not None]
+
+    grade_histogram = defaultdict(int)
+    for row in rows:
+        for grade, count in row.grade_histogram.items():
+            grade_histogram[grade] += count
+
+    return {
+        'result_count': result_count,
+        'avg_score': float(score_sum / score_count) if score_count else None,
+        'min_score': float(min(min_scores)) if min_scores else None,
+        'max_score': float(max(max_scores)) if max_scores else None,
+        'pass_count': pass_count,
+        'pass_rate': pass_count * 100.0 / result_count if result_count else None,
+        'grade_histogram': dict(grade_histogram),
+    }
+
+
+def summarize_by(rows, key):
+    """summarize() per group, `key` maps a row to its group (a value or tuple); groups keep first-seen order"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[key(row)].append(row)
+    return {group: summarize(group_rows) for group, group_rows in groups.items()}
+
+
+def grade_distribution(summary, scheme):
+    """[{'grade': ..., 'count': ...}] best grade first, like values('grade').annotate(count=...)"""
+    return scheme.sort_grades([
+        {'grade': grade, 'count': count} for grade, count in summary['grade_histogram'].items()
+    ])
@@ -0,0 +1,153 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from academics.models import Result
+
+
+# (column header, Result.values_list() field)
+RAW_EXPORT_COLUMNS = [
+    ('Student ID', 'student__student_profile__student_id'),
+    ('First Name', 'student__first_name'),
+    ('Last Name', 'student__last_name'),
+    ('Class', 'class_level__name'),
+    ('Subject Code', 'subject__code'),
+    ('Subject', 'subject__name'),
+    ('Academic Year', 'term__academic_year__name'),
+    ('Term', 'term__name'),
+    ('Class Score', 'class_score'),
+    ('Exam Score', 'exam_score'),
+    ('Total Score', 'score'),
+    ('Grade', 'grade'),
+    ('Grade Point', 'grade_point'),
+    ('Subject Position', 'subject_position'),
+    ('Published', 'is_published'),
+    ('Remarks', 'remarks'),
+]
+
+# (key, Result.values_list() field) for the machine-readable NDJSON/CSV export
+API_EXPORT_FIELDS = [
+    ('student_id', 'student__student_profile__student_id'),
+    ('first_name', 'student__first_name'),
+    ('last_name', 'student__last_name'),
+    ('class', 'class_level__name'),
+    ('subject_code', 'subject__code'),
+    ('subject', 'subject__name'),
+    ('academic_year', 'term__academic_year__name'),
+    ('term', 'term__name'),
+    ('class_score', 'class_score'),
+    ('exam_score', 'exam_score'),
+    ('score', 'score'),
+    ('grade', 'grade'),
+    ('grade_point', 'grade_point'),
+    ('subject_position', 'subject_position'),
+    ('published_date', 'published_date'),
+]
+
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BUFFER_SIZE = 64 * 1024   # Bytes of output collected before a chunk is sent
+
+
+# Spreadsheet order for people; the API follows the (student, subject, term) unique index
+# so the database can return the first rows without sorting the whole term first
+RAW_EXPORT_ORDERING = (
+    'term__academic_year__name', 'term__start_date', 'class_level__name', 'subject__name', 'student__last_name', 'id'
+)
+API_EXPORT_ORDERING = ('student_id', 'subject_id')
+
+
+def raw_results(academic_year_id=None, class_level_id=None, term_id=None, subject_id=None,
+                published_only=False, columns=RAW_EXPORT_COLUMNS, ordering=RAW_EXPORT_ORDERING):
+    """
+        Result rows as tuples in `columns` order, read from the database in chunks.
+        Student ID, subject, class and term names are joined in SQL, not looked up per row.
+    """
+    results = Result.objects.all()
+
+    if published_only:
+        results = results.filter(is_published=True)
+    if academic_year_id:
+        results = results.filter(term__academic_year_id=academic_year_id)
+    if class_level_id:
+        results = results.filter(class_level_id=class_level_id)
+    if term_id:
+        results = results.filter(term_id=term_id)
+    if subject_id:
+        results = results.filter(subject_id=subject_id)
+
+    return results.order_by(*ordering).values_list(*(field for _, field in columns)).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def write_raw_workbook(rows, output):
+    """
+        Write rows to a single-sheet workbook at `output` (a path or binary file object).
+        Write-only mode streams rows to disk as they are appended, so memory stays flat.
+    """
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet("Results")
+
+    header = []
+    for title, _ in RAW_EXPORT_COLUMNS:
+        cell = WriteOnlyCell(sheet, value=title)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+
+    for row in rows:
+        sheet.append(row)
+
+    wb.save(output)
+
+
+def _buffered(pieces):
+    """Join small strings into chunks of about STREAM_BUFFER_SIZE so each write to the client is worthwhile"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def iter_ndjson(rows):
+    """One JSON object per line, keyed by API_EXPORT_FIELDS"""
+    keys = [key for key, _ in API_EXPORT_FIELDS]
+    return _buffered(
+        json.dumps(dict(zip(keys, row)), default=_json_value) + '\n'
+        for row in rows
+    )
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """CSV with a header row of API_EXPORT_FIELDS keys"""
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow([key for key, _ in API_EXPORT_FIELDS])
+        for row in rows:
+            yield writer.writerow(row)
+
+    return _buffered(lines())
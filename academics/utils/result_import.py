@@ -0,0 +1,162 @@
+import csv
+import os
+import uuid
+from collections import defaultdict
+from django.conf import settings
+from accounts.models import StudentProfile
+from academics.models import ClassLevel, ClassSubject
+from .bulk_results import parse_result_scores, write_results
+from .spreadsheet import iter_rows
+
+
+IMPORT_REPORT_DIR = 'result_imports'
+DEFAULT_CHUNK_SIZE = 500
+
+
+def error_report_path(report_id):
+    """Location on disk of the rejected-rows CSV for an import"""
+    return os.path.join(settings.MEDIA_ROOT, IMPORT_REPORT_DIR, f"{report_id}.csv")
+
+
+class ErrorReport:
+    """
+        Rejected rows written straight to a CSV file as they are found.
+        The file is only created once the first row is rejected.
+    """
+
+    FIELDS = ['student_id', 'class_score', 'exam_score', 'score']
+
+    def __init__(self, fields=None):
+        self.fields = fields or self.FIELDS
+        self.report_id = None
+        self._file = None
+        self._writer = None
+
+    def add(self, line_number, row, error):
+        if self._writer is None:
+            self.report_id = str(uuid.uuid4())
+            path = error_report_path(self.report_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(['row', *self.fields, 'error'])
+
+        self._writer.writerow([line_number, *(row.get(field, '') for field in self.fields), error])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _load_student_lookup():
+    """student_id -> (user id, current class id) for every active student, in one query"""
+    return {
+        student_id: (str(user_id), class_id)
+        for student_id, user_id, class_id in StudentProfile.objects.filter(
+            is_active=True
+        ).values_list('student_id', 'user_id', 'current_class_id').iterator(chunk_size=2000)
+    }
+
+
+def import_results(file_obj, filename, subject, term, uploaded_by, is_published=False,
+                   chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+        Import results for one subject and term from a CSV/XLSX file.
+
+        Expected columns: student_id, class_score, exam_score and optionally
+        calculation_mode (system | manual), score and remarks. Each student's result
+        is filed under their current class. Valid rows are written in chunks of
+        chunk_size, rejected rows go to a downloadable error report.
+        progress, if given, is called with the running summary after every chunk.
+    """
+    students = _load_student_lookup()
+    class_levels = ClassLevel.objects.in_bulk()
+
+    # Admins can import for any class, teachers only where they teach the subject
+    allowed_class_ids = None
+    if uploaded_by.role == 'teacher':
+        allowed_class_ids = set(ClassSubject.objects.filter(
+            subject=subject,
+            teacher=uploaded_by,
+        ).values_list('class_level_id', flat=True))
+
+    summary = {'total_rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'error_report': None}
+    report = ErrorReport()
+    seen = set()
+    pending = defaultdict(dict)
+    pending_rows = {}
+
+    def flush():
+        for class_id, entries in pending.items():
+            try:
+                statuses = write_results(
+                    class_levels[class_id], subject, term, uploaded_by, entries, is_published=is_published
+                )
+            except Exception as e:
+                for student_user_id in entries:
+                    line_number, row = pending_rows[student_user_id]
+                    report.add(line_number, row, f"Could not save: {str(e)}")
+                    summary['failed'] += 1
+                continue
+
+            for status in statuses.values():
+                summary[status] += 1
+
+        pending.clear()
+        pending_rows.clear()
+
+        if progress is not None:
+            progress(summary)
+
+    try:
+        for line_number, row in iter_rows(file_obj, filename):
+            summary['total_rows'] += 1
+            student_id = str(row.get('student_id') or '').strip()
+
+            error = None
+            if not student_id:
+                error = "Missing student ID."
+            elif student_id not in students:
+                error = "Unknown or inactive student ID."
+            elif student_id in seen:
+                error = "Duplicate row for student."
+            else:
+                student_user_id, class_id = students[student_id]
+                if class_id is None:
+                    error = "Student is not assigned to a class."
+                elif allowed_class_ids is not None and class_id not in allowed_class_ids:
+                    error = "You are not assigned to teach this subject for the student's class."
+
+            if error is None:
+                try:
+                    fields = parse_result_scores(
+                        str(row.get('calculation_mode') or 'system').strip().lower(),
+                        row.get('class_score'),
+                        row.get('exam_score'),
+                        row.get('score'),
+                    )
+                except ValueError as e:
+                    error = str(e)
+                except ArithmeticError:
+                    # A bad cell only rejects its own row, never the whole import
+                    error = "Invalid score."
+
+            if error is not None:
+                report.add(line_number, row, error)
+                summary['failed'] += 1
+                continue
+
+            seen.add(student_id)
+            fields['remarks'] = str(row.get('remarks') or '').strip()
+            pending[class_id][student_user_id] = fields
+            pending_rows[student_user_id] = (line_number, row)
+
+            if len(pending_rows) >= chunk_size:
+                flush()
+
+        flush()
+    finally:
+        report.close()
+
+    summary['error_report'] = report.report_id
+    return summary
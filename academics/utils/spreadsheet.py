@@ -0,0 +1,60 @@
+import csv
+import io
+import os
+import openpyxl
+
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def normalize_header(value):
+    """'Student ID' -> 'student_id'"""
+    return str(value or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _iter_csv(file_obj):
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        keys = [normalize_header(h) for h in header]
+        for line_number, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            yield line_number, dict(zip(keys, row))
+    finally:
+        # Don't let the wrapper close the uploaded file underneath Django
+        text.detach()
+
+
+def _iter_xlsx(file_obj):
+    workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        keys = [normalize_header(h) for h in header]
+        for line_number, row in enumerate(rows, start=2):
+            if not any(cell not in (None, '') for cell in row):
+                continue
+            yield line_number, dict(zip(keys, row))
+    finally:
+        workbook.close()
+
+
+def iter_rows(file_obj, filename):
+    """
+        Yield (row number, row dict keyed by normalized header) for each data row of a CSV or XLSX file.
+        Rows are read lazily so large sheets are never fully loaded into memory.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+
+    if extension == '.csv':
+        return _iter_csv(file_obj)
+    if extension == '.xlsx':
+        return _iter_xlsx(file_obj)
+
+    raise ValueError(f"Unsupported file type. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}")
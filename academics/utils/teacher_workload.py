@@ -0,0 +1,95 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count
+from accounts.models import StudentProfile
+from academics.models import ClassSubject, TeacherWorkload
+
+
+def _build_rows(teacher_ids=None):
+    """
+        Workload rows for the given teachers (all when None) from two queries: the
+        assignments themselves and the active student count of each class involved.
+    """
+    assignments = ClassSubject.objects.filter(teacher__isnull=False).order_by()
+    if teacher_ids is not None:
+        assignments = assignments.filter(teacher_id__in=teacher_ids)
+
+    subjects = defaultdict(set)
+    classes = defaultdict(set)
+    counts = defaultdict(int)
+    for teacher_id, subject_id, class_level_id in assignments.values_list('teacher_id', 'subject_id', 'class_level_id'):
+        counts[teacher_id] += 1
+        subjects[teacher_id].add(subject_id)
+        classes[teacher_id].add(class_level_id)
+
+    class_level_ids = set().union(*classes.values()) if classes else set()
+    class_sizes = dict(
+        StudentProfile.objects.filter(current_class_id__in=class_level_ids, is_active=True)
+        .order_by().values('current_class_id').annotate(count=Count('id'))
+        .values_list('current_class_id', 'count')
+    )
+
+    return [
+        TeacherWorkload(
+            teacher_id=teacher_id,
+            assignments=count,
+            subjects=len(subjects[teacher_id]),
+            classes=len(classes[teacher_id]),
+            # A student has one current class, so class sizes add up to distinct students
+            students=sum(class_sizes.get(class_level_id, 0) for class_level_id in classes[teacher_id]),
+        )
+        for teacher_id, count in counts.items()
+    ]
+
+
+@transaction.atomic
+def refresh_workload(teacher_ids):
+    """Recompute the workload rows of these teachers from ClassSubject"""
+    teacher_ids = {teacher_id for teacher_id in teacher_ids if teacher_id}
+    if not teacher_ids:
+        return 0
+    TeacherWorkload.objects.filter(teacher_id__in=teacher_ids).delete()
+    rows = _build_rows(teacher_ids)
+    TeacherWorkload.objects.bulk_create(rows)
+    return len(rows)
+
+
+def refresh_workload_for_classes(class_level_ids):
+    """Recompute the teachers of these classes, e.g. after students joined or left them"""
+    class_level_ids = {class_level_id for class_level_id in class_level_ids if class_level_id}
+    if not class_level_ids:
+        return 0
+    return refresh_workload(
+        ClassSubject.objects.filter(class_level_id__in=class_level_ids, teacher__isnull=False)
+        .order_by().values_list('teacher_id', flat=True).distinct()
+    )
+
+
+@transaction.atomic
+def rebuild_workload():
+    """Rebuild the whole table"""
+    TeacherWorkload.objects.all().delete()
+    rows = _build_rows()
+    TeacherWorkload.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def get_teacher_workload(limit=6):
+    """Busiest active teachers, in the shape the admin dashboard expects (one indexed read)"""
+    return [
+        {
+            'id': row['teacher_id'],
+            'first_name': row['teacher__first_name'],
+            'last_name': row['teacher__last_name'],
+            'total_assignments': row['assignments'],
+            'total_subjects': row['subjects'],
+            'total_classes': row['classes'],
+            'total_students': row['students'],
+        }
+        for row in TeacherWorkload.objects.filter(
+            teacher__is_active=True
+        ).order_by('-assignments').values(
+            'teacher_id', 'teacher__first_name', 'teacher__last_name',
+            'assignments', 'subjects', 'classes', 'students',
+        )[:limit]
+    ]
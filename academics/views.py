@@ -1,15 +1,33 @@
 # academics/views.py
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse, Http404
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import cache_control
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
-from django.db.models import Q, Avg, Max, Min, Count
+from django.db.models import Q, Count, Sum
 from django.core.paginator import Paginator
 import json
 from accounts.models import User, TeacherProfile
 from .models import Subject, ClassLevel, AcademicYear, Term, ClassSubject, Result
+from .grading import get_scheme_for_filters
+from .utils.bulk_results import parse_result_scores, get_class_student_ids, save_result, write_results
+from .utils.result_import import import_results, error_report_path
+from .utils.result_aggregates import (
+    aggregates_for, count_students, get_aggregates, summarize, summarize_by, grade_distribution, refresh_aggregates_for,
+)
+from .utils.ranking import compute_positions, compute_positions_for
+from .utils.enrollment_counts import refresh_subject_counts
+from .utils.spreadsheet import SUPPORTED_EXTENSIONS
+from .utils.report_cache import report_version, cached_report
+from .utils.result_export import (
+    API_EXPORT_FIELDS, API_EXPORT_ORDERING, raw_results, write_raw_workbook, iter_ndjson, iter_csv,
+)
 import ast
 from django.utils import timezone
 from django.db import models
@@ -26,7 +44,19 @@ from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.chart import BarChart, PieChart, Reference
 from openpyxl.cell.cell import MergedCell
 import openpyxl
-import io
+import os
+import tempfile
+import uuid
+from django.conf import settings
+from core.jobs import enqueue
+from core.activity import record_results_published
+from core.cache import cached_query
+from accounts.utils.typeahead import ROLES as TYPEAHEAD_ROLES, DEFAULT_LIMIT as TYPEAHEAD_LIMIT, typeahead
+
+
+IMPORT_ASYNC_THRESHOLD = 1024 * 1024      # Files larger than 1 MB are imported by the job worker
+BULK_PUBLISH_ASYNC_THRESHOLD = 500        # Bulk publishes above this many results run as a job
+RAW_EXPORT_SPOOL_SIZE = 5 * 1024 * 1024   # Raw exports larger than 5 MB spill from memory to a temp file
 
 
 
@@ -223,10 +253,16 @@ def class_list(request):
             Q(description__icontains=search)
         )
     
-    total_classes = classes.count()
-    active_classes = classes.filter(is_active=True).count()
-    total_capacity = sum(cls.capacity for cls in classes)
-    total_students = sum(cls.current_students_count for cls in classes)
+    totals = classes.aggregate(
+        total_classes=Count('id'),
+        active_classes=Count('id', filter=Q(is_active=True)),
+        total_capacity=Sum('capacity'),
+        total_students=Sum('student_count'),
+    )
+    total_classes = totals['total_classes']
+    active_classes = totals['active_classes']
+    total_capacity = totals['total_capacity'] or 0
+    total_students = totals['total_students'] or 0
     
     paginator = Paginator(classes, 9)
     page_number = request.GET.get('page')
@@ -481,33 +517,62 @@ def get_class_data(request, class_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+@cached_query(User, TeacherProfile)
+def _active_teachers():
+    return list(User.objects.filter(
+        role='teacher',
+        teacher_profile__is_active=True
+    ).values(
+        'id', 'first_name', 'last_name', 'email', 'teacher_profile__employee_id'
+    ))
+
+
+@cached_query(Subject)
+def _active_subjects():
+    return list(Subject.objects.filter(is_active=True).values('id', 'name', 'code', 'category'))
+
+
 @login_required
 @require_http_methods(["GET"])
 def get_teachers_list(request):
     """Get list of teachers for dropdowns"""
     try:
-        teachers = User.objects.filter(
-            role='teacher',
-            teacher_profile__is_active=True
-        ).select_related('teacher_profile').values(
-            'id', 'first_name', 'last_name', 'email', 'teacher_profile__employee_id'
-        )
-        
-        teachers_list = list(teachers)
-        return JsonResponse({'success': True, 'teachers': teachers_list})
+        return JsonResponse({'success': True, 'teachers': _active_teachers()})
         
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+@login_required
+@require_http_methods(["GET"])
+@cache_control(private=True, max_age=30)
+def people_typeahead(request, role):
+    """Top matches for a student or teacher picker: ?q=<name or ID prefix>&limit=&class_level_id="""
+    if request.user.role not in ('admin', 'teacher'):
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+    if role not in TYPEAHEAD_ROLES:
+        return JsonResponse({'success': False, 'error': 'Unknown role'}, status=404)
+
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'success': True, 'results': []})
+
+    try:
+        limit = int(request.GET.get('limit', TYPEAHEAD_LIMIT))
+        class_level_id = request.GET.get('class_level_id')
+        class_level_id = int(class_level_id) if class_level_id else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid parameters'}, status=400)
+
+    return JsonResponse({'success': True, 'results': typeahead(role, query, limit, class_level_id)})
+
+
 @login_required
 @require_http_methods(["GET"])
 def get_subjects_list(request):
     """Get list of subjects for dropdowns"""
     try:
-        subjects = Subject.objects.filter(is_active=True).values('id', 'name', 'code', 'category')
-        subjects_list = list(subjects)
-        return JsonResponse({'success': True, 'subjects': subjects_list})
+        return JsonResponse({'success': True, 'subjects': _active_subjects()})
         
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
@@ -743,6 +808,7 @@ def assign_subjects_to_class(request, class_id):
             )
         
         ClassSubject.objects.bulk_create(class_subjects)
+        refresh_subject_counts(subject.id for subject in subjects)
         
         response_data = {
             'success': True,
@@ -995,9 +1061,14 @@ def results_dashboard(request):
     
     # Base queryset
     if request.user.role == 'teacher':
-        results = Result.objects.filter(
-            Q(uploaded_by=request.user) | Q(subject__teacher=request.user)
-        )
+        # Results of the class/subject pairs the teacher is assigned to
+        assigned = Q(pk__in=[])
+        for assigned_class_id, assigned_subject_id in ClassSubject.objects.filter(
+            teacher=request.user
+        ).values_list('class_level_id', 'subject_id'):
+            assigned |= Q(class_level_id=assigned_class_id, subject_id=assigned_subject_id)
+
+        results = Result.objects.filter(Q(uploaded_by=request.user) | assigned)
     else:
         results = Result.objects.all()
     
@@ -1024,10 +1095,16 @@ def results_dashboard(request):
         subjects = Subject.objects.all()
 
     
-    # Statistics
-    total_results = results.count()
-    published_results = results.filter(is_published=True).count()
-    average_score = results.aggregate(avg=Avg('score'))['avg'] or 0
+    # Statistics: the pre-aggregated rollup rows, or for a teacher rows computed over the
+    # same scope as their results, which the stored rows cannot filter by uploader
+    if request.user.role == 'teacher':
+        aggregates = aggregates_for(results)
+    else:
+        aggregates = list(get_aggregates(academic_year_id, class_level_id, term_id, subject_id))
+    overall = summarize(aggregates)
+    total_results = overall['result_count']
+    published_results = sum(row.result_count for row in aggregates if row.is_published)
+    average_score = overall['avg_score'] or 0
     
     # Recent results
     recent_results = results.select_related(
@@ -1035,14 +1112,17 @@ def results_dashboard(request):
     ).order_by('-date_uploaded')[:10]
     
     # Performance by subject
-    subject_performance = results.values(
-        'subject__name', 'subject__code'
-    ).annotate(
-        avg_score=Avg('score'),
-        count=Count('id'),
-        max_score=Max('score'),
-        min_score=Min('score')
-    ).order_by('-avg_score')
+    subject_performance = sorted([
+        {
+            'subject__name': name,
+            'subject__code': code,
+            'avg_score': summary['avg_score'],
+            'count': summary['result_count'],
+            'max_score': summary['max_score'],
+            'min_score': summary['min_score'],
+        }
+        for (name, code), summary in summarize_by(aggregates, lambda row: (row.subject.name, row.subject.code)).items()
+    ], key=lambda item: item['avg_score'] or 0, reverse=True)
     
     context = {
         'total_results': total_results,
@@ -1216,12 +1296,7 @@ def upload_results_submit(request):
         if is_published:
             result_data['published_date'] = timezone.now()
 
-        result, created = Result.objects.update_or_create(
-            student=student,
-            subject=subject,
-            term=term,
-            defaults=result_data
-        )
+        result, created = save_result(student, subject, term, result_data)
 
         return JsonResponse({
             'success': True,
@@ -1236,6 +1311,223 @@ def upload_results_submit(request):
         }, status=500)
 
 
+@login_required
+@require_http_methods(["POST"])
+def upload_results_bulk(request):
+    """Process a whole gradebook (all students) for one class, subject and term"""
+
+    if request.user.role != 'teacher':
+        return JsonResponse({'success': False, 'error': "Only teachers can upload results."}, status=403)
+
+    try:
+        data = json.loads(request.body)
+    except (ValueError, TypeError):
+        return JsonResponse({'success': False, 'error': "Invalid JSON body."}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': "Invalid JSON body."}, status=400)
+
+    class_level_id = data.get("class_level")
+    subject_id = data.get("subject")
+    term_id = data.get("term")
+    rows = data.get("results") or []
+    is_published = bool(data.get("is_published", False))
+
+    required = {
+        'class_level': class_level_id,
+        'subject': subject_id,
+        'term': term_id,
+    }
+
+    missing = [f for f, v in required.items() if not v]
+    if missing:
+        return JsonResponse({
+            'success': False,
+            'error': f"Missing required fields: {', '.join(missing)}"
+        }, status=400)
+
+    if not isinstance(rows, list) or not rows:
+        return JsonResponse({'success': False, 'error': "No results submitted."}, status=400)
+
+    try:
+        class_level_id, term_id = int(class_level_id), int(term_id)
+        subject_id = uuid.UUID(str(subject_id))
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': "Invalid class level, subject or term."}, status=400)
+
+    class_level = get_object_or_404(ClassLevel, id=class_level_id)
+    subject = get_object_or_404(Subject, id=subject_id)
+    term = get_object_or_404(Term, id=term_id)
+
+    try:
+        # Teacher assignment is checked once for the whole gradebook
+        if not ClassSubject.objects.filter(
+            class_level=class_level,
+            subject=subject,
+            teacher=request.user
+        ).exists():
+            return JsonResponse({
+                'success': False,
+                'error': "You are not assigned to teach this subject for this class."
+            }, status=403)
+
+        submitted_ids = [str(row.get("student")) for row in rows if isinstance(row, dict) and row.get("student")]
+        students_in_class = get_class_student_ids(class_level, submitted_ids)
+
+        entries = {}
+        row_status = []
+
+        for row in rows:
+            student_id = str(row.get("student") or "") if isinstance(row, dict) else ""
+
+            if not student_id:
+                row_status.append({'student': None, 'status': 'error', 'error': "Missing student."})
+                continue
+
+            try:
+                student_id = str(uuid.UUID(student_id))
+            except ValueError:
+                row_status.append({'student': student_id, 'status': 'error', 'error': "Invalid student ID."})
+                continue
+
+            if student_id not in students_in_class:
+                row_status.append({
+                    'student': student_id,
+                    'status': 'error',
+                    'error': f"Student is not in class {class_level.name}."
+                })
+                continue
+
+            if student_id in entries:
+                row_status.append({'student': student_id, 'status': 'error', 'error': "Duplicate row for student."})
+                continue
+
+            try:
+                fields = parse_result_scores(
+                    row.get("calculation_mode", "system"),
+                    row.get("class_score"),
+                    row.get("exam_score"),
+                    row.get("score"),
+                )
+            except ValueError as e:
+                row_status.append({'student': student_id, 'status': 'error', 'error': str(e)})
+                continue
+
+            fields['remarks'] = (row.get("remarks") or "").strip()
+            entries[student_id] = fields
+            row_status.append({'student': student_id, 'status': None})
+
+        saved = write_results(class_level, subject, term, request.user, entries, is_published=is_published)
+
+        for item in row_status:
+            if item['status'] is None:
+                item['status'] = saved[item['student']]
+
+        created = sum(1 for item in row_status if item['status'] == 'created')
+        updated = sum(1 for item in row_status if item['status'] == 'updated')
+        failed = sum(1 for item in row_status if item['status'] == 'error')
+
+        return JsonResponse({
+            'success': True,
+            'created': created,
+            'updated': updated,
+            'failed': failed,
+            'results': row_status,
+            'message': f"{created} created, {updated} updated, {failed} failed."
+        })
+
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f"Unexpected error: {str(e)}"
+        }, status=500)
+
+
+@login_required
+@require_http_methods(["POST"])
+def import_results_file(request):
+    """Import results for a subject and term from an uploaded CSV or XLSX file"""
+
+    if request.user.role not in ('teacher', 'admin'):
+        return JsonResponse({'success': False, 'error': "Only teachers and admins can import results."}, status=403)
+
+    uploaded_file = request.FILES.get("file")
+    subject_id = request.POST.get("subject")
+    term_id = request.POST.get("term")
+    is_published = request.POST.get("is_published") == "on"
+
+    if not all([uploaded_file, subject_id, term_id]):
+        return JsonResponse({'success': False, 'error': "File, subject and term are required."}, status=400)
+
+    if not uploaded_file.name.lower().endswith(SUPPORTED_EXTENSIONS):
+        return JsonResponse({
+            'success': False,
+            'error': f"Unsupported file type. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}"
+        }, status=400)
+
+    subject = get_object_or_404(Subject, id=subject_id)
+    term = get_object_or_404(Term, id=term_id)
+
+    if uploaded_file.size > IMPORT_ASYNC_THRESHOLD or request.POST.get("async") == "1":
+        # Large files are saved to disk and handed over to the job worker
+        extension = os.path.splitext(uploaded_file.name)[1].lower()
+        upload_dir = os.path.join(settings.MEDIA_ROOT, 'job_uploads')
+        os.makedirs(upload_dir, exist_ok=True)
+        path = os.path.join(upload_dir, f"{uuid.uuid4()}{extension}")
+
+        with open(path, 'wb') as destination:
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+
+        job = enqueue('import_results', {
+            'path': path,
+            'filename': uploaded_file.name,
+            'subject': str(subject.id),
+            'term': term.id,
+            'uploaded_by': str(request.user.id),
+            'is_published': is_published,
+        }, user=request.user)
+
+        return JsonResponse({
+            'success': True,
+            'job_id': str(job.id),
+            'status_url': reverse('job_status', args=[job.id]),
+            'message': "Import queued. Check the job status for progress."
+        }, status=202)
+
+    try:
+        summary = import_results(uploaded_file, uploaded_file.name, subject, term, request.user, is_published=is_published)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f"Could not read file: {str(e)}"
+        }, status=400)
+
+    error_report_url = None
+    if summary['error_report']:
+        error_report_url = reverse('download_import_errors', args=[summary['error_report']])
+
+    return JsonResponse({
+        'success': True,
+        **summary,
+        'error_report_url': error_report_url,
+        'message': f"{summary['created']} created, {summary['updated']} updated, {summary['failed']} rejected."
+    })
+
+
+@login_required
+def download_import_errors(request, report_id):
+    """Download the rejected rows of a results import as CSV"""
+
+    if request.user.role not in ('teacher', 'admin'):
+        raise Http404
+
+    path = error_report_path(report_id)
+    if not os.path.exists(path):
+        raise Http404
+
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename="result_import_errors.csv", content_type='text/csv')
+
+
 @login_required
 def get_students_for_results(request):
     """Get students for a specific class to populate results form"""
@@ -1314,6 +1606,11 @@ def publish_results(request, result_id=None):
             
             result.is_published = not result.is_published
             result.save()
+            compute_positions(result.term_id, [result.class_level_id])
+            record_results_published(
+                1, result.is_published, actor=request.user,
+                details=f"{result.subject.name} - {result.class_level.name}",
+            )
             
             action = 'published' if result.is_published else 'unpublished'
             
@@ -1328,13 +1625,31 @@ def publish_results(request, result_id=None):
             result_ids = data.get('result_ids', [])
             publish = data.get('publish', True)
             
+            if len(result_ids) > BULK_PUBLISH_ASYNC_THRESHOLD or data.get('async'):
+                job = enqueue('publish_results', {
+                    'result_ids': [str(result_id) for result_id in result_ids],
+                    'publish': publish,
+                    'uploaded_by': str(request.user.id) if request.user.role == 'teacher' else None,
+                }, user=request.user)
+
+                return JsonResponse({
+                    'success': True,
+                    'job_id': str(job.id),
+                    'status_url': reverse('job_status', args=[job.id]),
+                    'message': f'Publishing {len(result_ids)} results in the background'
+                }, status=202)
+
             results = Result.objects.filter(id__in=result_ids)
             
             # Check permissions for teachers
             if request.user.role == 'teacher':
                 results = results.filter(uploaded_by=request.user)
             
-            updated_count = results.update(is_published=publish)
+            # last_modified is bumped by hand: update() skips auto_now and the report cache keys on it
+            updated_count = results.update(is_published=publish, last_modified=timezone.now())
+            refresh_aggregates_for(results)
+            compute_positions_for(results)
+            record_results_published(updated_count, publish, actor=request.user, details=f"By {request.user.get_full_name() or request.user.username}")
             
             action = 'published' if publish else 'unpublished'
             
@@ -1405,6 +1720,8 @@ def delete_result(request, result_id):
             }, status=403)
         
         result.delete()
+        if result.is_published:
+            compute_positions(result.term_id, [result.class_level_id])
         
         return JsonResponse({
             'success': True,
@@ -1419,6 +1736,81 @@ def delete_result(request, result_id):
 
 
 
+@login_required
+@require_http_methods(["POST"])
+def generate_report_cards(request):
+    """Queue report-card generation for every student in a class for a term"""
+
+    if request.user.role not in ('teacher', 'admin'):
+        return JsonResponse({'success': False, 'error': "Only teachers and admins can generate report cards."}, status=403)
+
+    class_level = get_object_or_404(ClassLevel, id=request.POST.get('class_level'))
+    term = get_object_or_404(Term, id=request.POST.get('term'))
+
+    if not Result.objects.filter(term=term, class_level=class_level, is_published=True).exists():
+        return JsonResponse({
+            'success': False,
+            'error': f"No published results for {class_level.name} in {term.name}."
+        }, status=400)
+
+    job = enqueue('generate_report_cards', {
+        'term': term.id,
+        'class_level': class_level.id,
+    }, user=request.user)
+
+    return JsonResponse({
+        'success': True,
+        'job_id': str(job.id),
+        'status_url': reverse('job_status', args=[job.id]),
+        'message': f"Generating report cards for {class_level.name}. Check the job status for progress."
+    }, status=202)
+
+
+@login_required
+@require_http_methods(["GET"])
+def export_results_stream(request):
+    """
+        Every published result for a term as NDJSON (default) or CSV, for downstream systems.
+        Rows are streamed as they are read, so large terms start downloading immediately.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': "Only admins can export results."}, status=403)
+
+    export_format = request.GET.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return JsonResponse({'success': False, 'error': "Format must be 'ndjson' or 'csv'."}, status=400)
+
+    # Validate filters up front: errors once streaming has started cannot become a 4xx
+    try:
+        term = get_object_or_404(Term, id=request.GET.get('term'))
+        class_level_id = request.GET.get('class_level')
+        subject_id = request.GET.get('subject')
+        if class_level_id:
+            class_level_id = get_object_or_404(ClassLevel, id=class_level_id).id
+        if subject_id:
+            subject_id = get_object_or_404(Subject, id=subject_id).id
+    except (ValueError, ValidationError):
+        return JsonResponse({'success': False, 'error': "Invalid term, class level or subject."}, status=400)
+
+    rows = raw_results(
+        class_level_id=class_level_id,
+        term_id=term.id,
+        subject_id=subject_id,
+        published_only=True,
+        columns=API_EXPORT_FIELDS,
+        ordering=API_EXPORT_ORDERING,
+    )
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(iter_csv(rows), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(iter_ndjson(rows), content_type='application/x-ndjson')
+
+    filename = f"results_{term.id}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 def results_analysis(request):
     """Advanced results analysis"""
@@ -1437,75 +1829,61 @@ def results_analysis(request):
         results = results.filter(class_level_id=class_level_id)
     if term_id:
         results = results.filter(term_id=term_id)
+
+    scheme = get_scheme_for_filters(academic_year_id, class_level_id, term_id)
+
+    # Statistics come from the pre-aggregated rollup rows, not a scan of the results table
+    aggregates = list(get_aggregates(academic_year_id, class_level_id, term_id, is_published=True))
+    overall = summarize(aggregates)
+    class_students = count_students(results, 'class_level__name')
+    trend_students = count_students(results, ('subject__name', 'term__name', 'term__academic_year__name'))
     
     # Comprehensive analysis
-    grade_distribution = results.values('grade').annotate(
-        count=Count('id')
-    ).order_by('grade')
+    grade_distribution_list = grade_distribution(overall, scheme)
     
     # Subject performance (average scores per subject)
-    subject_performance = results.values('subject__name').annotate(
-        avg_score=Avg('score')
-    ).order_by('-avg_score')
-    
-    class_performance = results.values('class_level__name').annotate(
-        avg_score=Avg('score'),
-        total_students=Count('student', distinct=True),
-        pass_rate=Count('id', filter=Q(score__gte=50)) * 100.0 / Count('id')
-    ).order_by('-avg_score')
-    
-    performance_trends = results.values(
-        'subject__name',
-        'term__name',
-        'term__academic_year__name'
-    ).annotate(
-        avg_score=Avg('score'),
-        student_count=Count('student', distinct=True)
-    ).order_by('term__academic_year__name', 'term__name', 'subject__name')
-    
-    top_performers = results.select_related('student', 'subject').order_by('-score')[:10]
+    subject_performance_list = sorted([
+        {'subject__name': name, 'avg_score': summary['avg_score'] or 0}
+        for name, summary in summarize_by(aggregates, lambda row: row.subject.name).items()
+    ], key=lambda item: item['avg_score'], reverse=True)
     
-    # Convert Decimal to float for JSON serialization
-    from decimal import Decimal
-    
-    subject_performance_list = []
-    for item in subject_performance:
-        subject_performance_list.append({
-            'subject__name': item['subject__name'],
-            'avg_score': float(item['avg_score']) if isinstance(item['avg_score'], Decimal) else item['avg_score']
-        })
+    class_performance_list = sorted([
+        {
+            'class_level__name': name,
+            'avg_score': summary['avg_score'] or 0,
+            'total_students': class_students.get(name, 0),
+            'pass_rate': summary['pass_rate'],
+        }
+        for name, summary in summarize_by(aggregates, lambda row: row.class_level.name).items()
+    ], key=lambda item: item['avg_score'], reverse=True)
     
-    class_performance_list = []
-    for item in class_performance:
-        class_performance_list.append({
-            'class_level__name': item['class_level__name'],
-            'avg_score': float(item['avg_score']) if isinstance(item['avg_score'], Decimal) else item['avg_score'],
-            'total_students': item['total_students'],
-            'pass_rate': float(item['pass_rate']) if isinstance(item['pass_rate'], Decimal) else item['pass_rate']
-        })
+    performance_trends_list = sorted([
+        {
+            'subject__name': subject_name,
+            'term__name': term_name,
+            'term__academic_year__name': year_name,
+            'avg_score': summary['avg_score'] or 0,
+            'student_count': trend_students.get((subject_name, term_name, year_name), 0),
+        }
+        for (subject_name, term_name, year_name), summary in summarize_by(
+            aggregates,
+            lambda row: (row.subject.name, row.term.name, row.term.academic_year.name if row.term.academic_year else None),
+        ).items()
+    ], key=lambda item: (item['term__academic_year__name'] or '', item['term__name'], item['subject__name']))
     
-    # Convert performance_trends
-    performance_trends_list = []
-    for item in performance_trends:
-        performance_trends_list.append({
-            'subject__name': item['subject__name'],
-            'term__name': item['term__name'],
-            'term__academic_year__name': item['term__academic_year__name'],
-            'avg_score': float(item['avg_score']) if isinstance(item['avg_score'], Decimal) else item['avg_score'],
-            'student_count': item['student_count']
-        })
+    top_performers = results.select_related('student', 'subject').order_by('-score')[:10]
     
     academic_years = AcademicYear.objects.all()
     class_levels = ClassLevel.objects.all()
     terms = Term.objects.all()
     
     context = {
-        'grade_distribution': list(grade_distribution),
+        'grade_distribution': grade_distribution_list,
         'subject_performance': subject_performance_list,
         'class_performance': class_performance_list,
         'performance_trends': performance_trends_list,
         'top_performers': top_performers,
-        'total_results_analyzed': results.count(),
+        'total_results_analyzed': overall['result_count'],
         'academic_years': academic_years,
         'class_levels': class_levels,
         'terms': terms,
@@ -1548,6 +1926,28 @@ def get_terms_for_academic_year(request):
 
 
 
+def _raw_export_denied(user, class_level_id):
+    """
+        Raw exports include unpublished results: admins may export anything,
+        teachers only a class they are the form teacher of or teach a subject in.
+    """
+    if user.role == 'admin':
+        return None
+    if user.role != 'teacher':
+        return JsonResponse({'success': False, 'error': "Only teachers and admins can export raw results."}, status=403)
+    if not class_level_id:
+        return JsonResponse({'success': False, 'error': "Select one of your classes to export."}, status=400)
+    try:
+        teaches = ClassLevel.objects.filter(
+            Q(form_teacher=user) | Q(classsubject__teacher=user), id=class_level_id
+        ).exists()
+    except (ValueError, ValidationError):
+        teaches = False
+    if not teaches:
+        return JsonResponse({'success': False, 'error': "You can only export results of your own classes."}, status=403)
+    return None
+
+
 @login_required
 def export_analysis_report(request):
     """Export analysis report as PDF or Excel"""
@@ -1555,14 +1955,33 @@ def export_analysis_report(request):
     academic_year_id = request.GET.get('academic_year')
     class_level_id = request.GET.get('class_level')
     term_id = request.GET.get('term')
+    subject_id = request.GET.get('subject')
+
+    if format_type.lower() == 'raw':
+        denied = _raw_export_denied(request.user, class_level_id)
+        if denied:
+            return denied
+
+    if request.GET.get('async') == '1':
+        job = enqueue('export_analysis_report', {
+            'format': format_type.lower() if format_type.lower() in ('excel', 'raw') else 'pdf',
+            'academic_year': academic_year_id,
+            'class_level': class_level_id,
+            'term': term_id,
+            'subject': subject_id,
+        }, user=request.user)
+
+        return JsonResponse({
+            'success': True,
+            'job_id': str(job.id),
+            'status_url': reverse('job_status', args=[job.id]),
+        }, status=202)
     
-    # Get filtered data
-    analysis_data = get_analysis_data(academic_year_id, class_level_id, term_id)
-    
-    if format_type.lower() == 'excel':
-        return export_excel_report(analysis_data, request)
-    else:
-        return export_pdf_report(analysis_data, request)
+    if format_type.lower() == 'raw':
+        return export_raw_results(academic_year_id, class_level_id, term_id, subject_id)
+
+    format_type = 'excel' if format_type.lower() == 'excel' else 'pdf'
+    return export_cached_report(request, format_type, academic_year_id, class_level_id, term_id)
 
 def get_analysis_data(academic_year_id=None, class_level_id=None, term_id=None):
     """Get comprehensive analysis data for export"""
@@ -1575,6 +1994,36 @@ def get_analysis_data(academic_year_id=None, class_level_id=None, term_id=None):
         results = results.filter(class_level_id=class_level_id)
     if term_id:
         results = results.filter(term_id=term_id)
+
+    scheme = get_scheme_for_filters(academic_year_id, class_level_id, term_id)
+
+    # Statistics come from the pre-aggregated rollup rows, not a scan of the results table
+    aggregates = list(get_aggregates(academic_year_id, class_level_id, term_id))
+    overall = summarize(aggregates)
+    subject_students = count_students(results, ('subject__name', 'subject__code'))
+    class_students = count_students(results, 'class_level__name')
+
+    subject_performance = [
+        {
+            'subject__name': name,
+            'subject__code': code,
+            'avg_score': summary['avg_score'] or 0,
+            'total_students': subject_students.get((name, code), 0),
+            'pass_count': summary['pass_count'],
+            'max_score': summary['max_score'] or 0,
+            'min_score': summary['min_score'] or 0,
+        }
+        for (name, code), summary in summarize_by(aggregates, lambda row: (row.subject.name, row.subject.code)).items()
+    ]
+    class_performance = [
+        {
+            'class_level__name': name,
+            'avg_score': summary['avg_score'] or 0,
+            'total_students': class_students.get(name, 0),
+            'pass_rate': summary['pass_rate'],
+        }
+        for name, summary in summarize_by(aggregates, lambda row: row.class_level.name).items()
+    ]
     
     # Comprehensive analysis data
     data = {
@@ -1584,28 +2033,14 @@ def get_analysis_data(academic_year_id=None, class_level_id=None, term_id=None):
             'term': Term.objects.filter(id=term_id).first() if term_id else None,
         },
         'summary': {
-            'total_results': results.count(),
-            'total_students': results.values('student').distinct().count(),
-            'average_score': results.aggregate(avg=Avg('score'))['avg'] or 0,
-            'published_results': results.filter(is_published=True).count(),
+            'total_results': overall['result_count'],
+            'total_students': count_students(results),
+            'average_score': overall['avg_score'] or 0,
+            'published_results': sum(row.result_count for row in aggregates if row.is_published),
         },
-        'grade_distribution': list(results.values('grade').annotate(
-            count=Count('id')
-        ).order_by('grade')),
-        'subject_performance': list(results.values(
-            'subject__name', 'subject__code'
-        ).annotate(
-            avg_score=Avg('score'),
-            total_students=Count('student', distinct=True),
-            pass_count=Count('id', filter=Q(score__gte=50)),
-            max_score=Max('score'),
-            min_score=Min('score')
-        ).order_by('-avg_score')),
-        'class_performance': list(results.values('class_level__name').annotate(
-            avg_score=Avg('score'),
-            total_students=Count('student', distinct=True),
-            pass_rate=Count('id', filter=Q(score__gte=50)) * 100.0 / Count('id')
-        ).order_by('-avg_score')),
+        'grade_distribution': grade_distribution(overall, scheme),
+        'subject_performance': sorted(subject_performance, key=lambda item: item['avg_score'], reverse=True),
+        'class_performance': sorted(class_performance, key=lambda item: item['avg_score'], reverse=True),
         'top_performers': list(results.select_related(
             'student', 'subject', 'class_level'
         ).order_by('-score')[:10].values(
@@ -1622,425 +2057,464 @@ def get_analysis_data(academic_year_id=None, class_level_id=None, term_id=None):
     
     return data
 
-def export_pdf_report(analysis_data, request):
-    """Generate PDF report"""
+def export_raw_results(academic_year_id=None, class_level_id=None, term_id=None, subject_id=None):
+    """One row per result as .xlsx, built in write-only mode and streamed from a spooled temp file"""
+    output = tempfile.SpooledTemporaryFile(max_size=RAW_EXPORT_SPOOL_SIZE)
     try:
-        # Create buffer for PDF
-        buffer = io.BytesIO()
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Get styles
-        styles = getSampleStyleSheet()
-        
-        # Create custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1,  # Center
-            textColor=colors.HexColor('#1e293b')
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.HexColor('#374151')
-        )
-        
-        # Build story (content)
-        story = []
-        
-        # Title
-        title = Paragraph("Academic Results Analysis Report", title_style)
-        story.append(title)
-        
-        # Report metadata
-        metadata_style = ParagraphStyle(
-            'Metadata',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#64748b')
-        )
-        
-        filters_text = "Filters: "
-        filters = []
-        if analysis_data['filters']['academic_year']:
-            filters.append(f"Academic Year: {analysis_data['filters']['academic_year'].name}")
-        if analysis_data['filters']['class_level']:
-            filters.append(f"Class: {analysis_data['filters']['class_level'].name}")
-        if analysis_data['filters']['term']:
-            filters.append(f"Term: {analysis_data['filters']['term'].name}")
-        
-        filters_text += " | ".join(filters) if filters else "All Data"
-        filters_text += f" | Generated: {analysis_data['generated_at'].strftime('%Y-%m-%d %H:%M')}"
-        
-        metadata = Paragraph(filters_text, metadata_style)
-        story.append(metadata)
-        story.append(Spacer(1, 20))
-        
-        # Summary Section
-        story.append(Paragraph("Executive Summary", heading_style))
-        
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Results', f"{analysis_data['summary']['total_results']:,}"],
-            ['Total Students', f"{analysis_data['summary']['total_students']:,}"],
-            ['Average Score', f"{analysis_data['summary']['average_score']:.1f}%"],
-            ['Published Results', f"{analysis_data['summary']['published_results']:,}"],
-        ]
-        
-        summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0'))
-        ]))
-        story.append(summary_table)
-        story.append(Spacer(1, 20))
-        
-        # Grade Distribution
-        story.append(Paragraph("Grade Distribution", heading_style))
-        
-        grade_data = [['Grade', 'Count', 'Percentage']]
-        total_results = analysis_data['summary']['total_results']
-        
-        for grade in analysis_data['grade_distribution']:
-            percentage = (grade['count'] / total_results * 100) if total_results > 0 else 0
-            grade_data.append([
-                grade['grade'],
-                str(grade['count']),
-                f"{percentage:.1f}%"
-            ])
-        
-        grade_table = Table(grade_data, colWidths=[1.5*inch, 1.5*inch, 1.5*inch])
-        grade_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
-        ]))
-        story.append(grade_table)
-        story.append(Spacer(1, 20))
-        
-        # Subject Performance
-        story.append(Paragraph("Subject Performance", heading_style))
-        
-        subject_data = [['Subject', 'Avg Score', 'Students', 'Pass Rate', 'High Score']]
-        
-        for subject in analysis_data['subject_performance']:
-            pass_rate = (subject['pass_count'] / subject['total_students'] * 100) if subject['total_students'] > 0 else 0
-            subject_data.append([
-                subject['subject__name'],
-                f"{subject['avg_score']:.1f}%",
-                str(subject['total_students']),
-                f"{pass_rate:.1f}%",
-                f"{subject['max_score']:.1f}%"
-            ])
-        
-        subject_table = Table(subject_data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch, 1*inch])
-        subject_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f59e0b')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
-        ]))
-        story.append(subject_table)
-        story.append(Spacer(1, 20))
-        
-        # Class Performance
-        story.append(Paragraph("Class Performance", heading_style))
-        
-        class_data = [['Class', 'Avg Score', 'Students', 'Pass Rate']]
-        
-        for class_perf in analysis_data['class_performance']:
-            class_data.append([
-                class_perf['class_level__name'],
-                f"{class_perf['avg_score']:.1f}%",
-                str(class_perf['total_students']),
-                f"{class_perf['pass_rate']:.1f}%"
+        write_raw_workbook(raw_results(academic_year_id, class_level_id, term_id, subject_id), output)
+    except Exception as e:
+        output.close()
+        return HttpResponse(f"Error generating Excel export: {str(e)}", status=500)
+
+    output.seek(0)
+    # FileResponse reads the file in chunks and closes it when the response is done
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename='results_raw_export.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+def analysis_report_file(format_type, academic_year_id=None, class_level_id=None, term_id=None, version=None):
+    """
+        Path of the rendered analysis report from the disk cache, rendering it on a miss.
+        The cache key changes whenever the filtered results do; pass `version` if already computed.
+    """
+    extension, _, render = REPORT_FORMATS[format_type]
+    key, _ = version or report_version(academic_year_id, class_level_id, term_id)
+
+    def render_to(path):
+        render(get_analysis_data(academic_year_id, class_level_id, term_id), path)
+
+    return cached_report(key, extension, render_to)
+
+
+def export_cached_report(request, format_type, academic_year_id=None, class_level_id=None, term_id=None):
+    """Serve the analysis report, answering 304 when the client already has this version"""
+    extension, content_type, _ = REPORT_FORMATS[format_type]
+    version = report_version(academic_year_id, class_level_id, term_id)
+    key, last_modified = version
+    etag = quote_etag(key + extension)
+    # HTTP dates have whole-second precision
+    timestamp = int(last_modified.timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        path = analysis_report_file(format_type, academic_year_id, class_level_id, term_id, version=version)
+    except Exception as e:
+        return HttpResponse(f"Error generating report: {str(e)}", status=500)
+
+    response = FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=f"results_analysis_report{extension}",
+        content_type=content_type
+    )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(timestamp)
+    # Browsers may keep the file but must revalidate it before reuse
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def render_pdf_report(analysis_data, output):
+    """Build the analysis PDF into `output` (a path or binary file object)"""
+    # Create PDF document
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    
+    # Get styles
+    styles = getSampleStyleSheet()
+    
+    # Create custom styles
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1,  # Center
+        textColor=colors.HexColor('#1e293b')
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=12,
+        spaceBefore=20,
+        textColor=colors.HexColor('#374151')
+    )
+    
+    # Build story (content)
+    story = []
+    
+    # Title
+    title = Paragraph("Academic Results Analysis Report", title_style)
+    story.append(title)
+    
+    # Report metadata
+    metadata_style = ParagraphStyle(
+        'Metadata',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#64748b')
+    )
+    
+    filters_text = "Filters: "
+    filters = []
+    if analysis_data['filters']['academic_year']:
+        filters.append(f"Academic Year: {analysis_data['filters']['academic_year'].name}")
+    if analysis_data['filters']['class_level']:
+        filters.append(f"Class: {analysis_data['filters']['class_level'].name}")
+    if analysis_data['filters']['term']:
+        filters.append(f"Term: {analysis_data['filters']['term'].name}")
+    
+    filters_text += " | ".join(filters) if filters else "All Data"
+    filters_text += f" | Generated: {analysis_data['generated_at'].strftime('%Y-%m-%d %H:%M')}"
+    
+    metadata = Paragraph(filters_text, metadata_style)
+    story.append(metadata)
+    story.append(Spacer(1, 20))
+    
+    # Summary Section
+    story.append(Paragraph("Executive Summary", heading_style))
+    
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Results', f"{analysis_data['summary']['total_results']:,}"],
+        ['Total Students', f"{analysis_data['summary']['total_students']:,}"],
+        ['Average Score', f"{analysis_data['summary']['average_score']:.1f}%"],
+        ['Published Results', f"{analysis_data['summary']['published_results']:,}"],
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0'))
+    ]))
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+    
+    # Grade Distribution
+    story.append(Paragraph("Grade Distribution", heading_style))
+    
+    grade_data = [['Grade', 'Count', 'Percentage']]
+    total_results = analysis_data['summary']['total_results']
+    
+    for grade in analysis_data['grade_distribution']:
+        percentage = (grade['count'] / total_results * 100) if total_results > 0 else 0
+        grade_data.append([
+            grade['grade'],
+            str(grade['count']),
+            f"{percentage:.1f}%"
+        ])
+    
+    grade_table = Table(grade_data, colWidths=[1.5*inch, 1.5*inch, 1.5*inch])
+    grade_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
+    ]))
+    story.append(grade_table)
+    story.append(Spacer(1, 20))
+    
+    # Subject Performance
+    story.append(Paragraph("Subject Performance", heading_style))
+    
+    subject_data = [['Subject', 'Avg Score', 'Students', 'Pass Rate', 'High Score']]
+    
+    for subject in analysis_data['subject_performance']:
+        pass_rate = (subject['pass_count'] / subject['total_students'] * 100) if subject['total_students'] > 0 else 0
+        subject_data.append([
+            subject['subject__name'],
+            f"{subject['avg_score']:.1f}%",
+            str(subject['total_students']),
+            f"{pass_rate:.1f}%",
+            f"{subject['max_score']:.1f}%"
+        ])
+    
+    subject_table = Table(subject_data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch, 1*inch])
+    subject_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f59e0b')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
+    ]))
+    story.append(subject_table)
+    story.append(Spacer(1, 20))
+    
+    # Class Performance
+    story.append(Paragraph("Class Performance", heading_style))
+    
+    class_data = [['Class', 'Avg Score', 'Students', 'Pass Rate']]
+    
+    for class_perf in analysis_data['class_performance']:
+        class_data.append([
+            class_perf['class_level__name'],
+            f"{class_perf['avg_score']:.1f}%",
+            str(class_perf['total_students']),
+            f"{class_perf['pass_rate']:.1f}%"
+        ])
+    
+    class_table = Table(class_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+    class_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#8b5cf6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
+    ]))
+    story.append(class_table)
+    story.append(Spacer(1, 20))
+    
+    # Top Performers
+    story.append(Paragraph("Top 10 Performers", heading_style))
+    
+    if analysis_data['top_performers']:
+        top_data = [['Student', 'Student ID', 'Subject', 'Class', 'Score', 'Grade']]
+        
+        for performer in analysis_data['top_performers']:
+            top_data.append([
+                f"{performer['student__first_name']} {performer['student__last_name']}",
+                performer['student__student_profile__student_id'],
+                performer['subject__name'],
+                performer['class_level__name'],
+                f"{performer['score']:.1f}%",
+                performer['grade']
             ])
         
-        class_table = Table(class_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-        class_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#8b5cf6')),
+        top_table = Table(top_data, colWidths=[1.5*inch, 1*inch, 1.2*inch, 1*inch, 0.8*inch, 0.8*inch])
+        top_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ef4444')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
             ('BACKGROUND', (0, 1), (-1, -1), colors.white),
             ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
         ]))
-        story.append(class_table)
-        story.append(Spacer(1, 20))
-        
-        # Top Performers
-        story.append(Paragraph("Top 10 Performers", heading_style))
-        
-        if analysis_data['top_performers']:
-            top_data = [['Student', 'Student ID', 'Subject', 'Class', 'Score', 'Grade']]
-            
-            for performer in analysis_data['top_performers']:
-                top_data.append([
-                    f"{performer['student__first_name']} {performer['student__last_name']}",
-                    performer['student__student_profile__student_id'],
-                    performer['subject__name'],
-                    performer['class_level__name'],
-                    f"{performer['score']:.1f}%",
-                    performer['grade']
-                ])
-            
-            top_table = Table(top_data, colWidths=[1.5*inch, 1*inch, 1.2*inch, 1*inch, 0.8*inch, 0.8*inch])
-            top_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ef4444')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 7),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
-            ]))
-            story.append(top_table)
-        else:
-            story.append(Paragraph("No top performers data available.", styles['Normal']))
-        
-        # Build PDF
-        doc.build(story)
-        
-        # Get PDF value from buffer
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        # Create HTTP response
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="results_analysis_report.pdf"'
-        response.write(pdf)
-        
-        return response
-        
-    except Exception as e:
-        return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
-
-
-def export_excel_report(analysis_data, request):
-    """Generate Excel report"""
-    try:
-        # Create workbook
-        wb = Workbook()
-        
-        # Remove default sheet
-        wb.remove(wb.active)
-        
-        # Summary Sheet
-        summary_sheet = wb.create_sheet("Executive Summary")
-        
-        # Header
-        summary_sheet.merge_cells('A1:D1')
-        summary_sheet['A1'] = "Academic Results Analysis Report"
-        summary_sheet['A1'].font = Font(size=16, bold=True, color="1e293b")
-        summary_sheet['A1'].alignment = Alignment(horizontal='center')
-        
-        # Filters info
-        filters_text = "Filters: "
-        filters = []
-        if analysis_data['filters']['academic_year']:
-            filters.append(f"Academic Year: {analysis_data['filters']['academic_year'].name}")
-        if analysis_data['filters']['class_level']:
-            filters.append(f"Class: {analysis_data['filters']['class_level'].name}")
-        if analysis_data['filters']['term']:
-            filters.append(f"Term: {analysis_data['filters']['term'].name}")
-        
-        filters_text += " | ".join(filters) if filters else "All Data"
-        summary_sheet['A3'] = filters_text
-        summary_sheet['A4'] = f"Generated: {analysis_data['generated_at'].strftime('%Y-%m-%d %H:%M')}"
-        
-        # Summary Table
-        summary_sheet['A6'] = "Metric"
-        summary_sheet['B6'] = "Value"
-        
-        summary_data = [
-            ['Total Results', analysis_data['summary']['total_results']],
-            ['Total Students', analysis_data['summary']['total_students']],
-            ['Average Score', analysis_data['summary']['average_score']],
-            ['Published Results', analysis_data['summary']['published_results']],
-        ]
-        
-        for i, (metric, value) in enumerate(summary_data, start=7):
-            summary_sheet[f'A{i}'] = metric
-            summary_sheet[f'B{i}'] = value
-        
-        # Style summary table
-        for row in summary_sheet['A6:B10']:
-            for cell in row:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
-                cell.border = openpyxl.styles.Border(
-                    left=openpyxl.styles.Side(style='thin'),
-                    right=openpyxl.styles.Side(style='thin'),
-                    top=openpyxl.styles.Side(style='thin'),
-                    bottom=openpyxl.styles.Side(style='thin')
-                )
-        
-        # Grade Distribution Sheet
-        grade_sheet = wb.create_sheet("Grade Distribution")
-        
-        grade_sheet['A1'] = "Grade"
-        grade_sheet['B1'] = "Count"
-        grade_sheet['C1'] = "Percentage"
-        
-        for i, grade in enumerate(analysis_data['grade_distribution'], start=2):
-            percentage = (grade['count'] / analysis_data['summary']['total_results'] * 100) if analysis_data['summary']['total_results'] > 0 else 0
-            grade_sheet[f'A{i}'] = grade['grade']
-            grade_sheet[f'B{i}'] = grade['count']
-            grade_sheet[f'C{i}'] = percentage / 100 
-        
-        # Style grade sheet
-        for row in grade_sheet['A1:C1']:
-            for cell in row:
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.fill = PatternFill(start_color="10b981", end_color="10b981", fill_type="solid")
-        
-        for cell in grade_sheet['C']:
-            if cell.row > 1:
-                cell.number_format = '0.0%'
-        
-        subject_sheet = wb.create_sheet("Subject Performance")
-        
-        subject_headers = ['Subject', 'Code', 'Avg Score', 'Students', 'Pass Count', 'Pass Rate', 'High Score', 'Low Score']
-        for col, header in enumerate(subject_headers, start=1):
-            subject_sheet.cell(row=1, column=col, value=header)
-        
-        for i, subject in enumerate(analysis_data['subject_performance'], start=2):
-            pass_rate = (subject['pass_count'] / subject['total_students']) if subject['total_students'] > 0 else 0
-            subject_sheet.cell(row=i, column=1, value=subject['subject__name'])
-            subject_sheet.cell(row=i, column=2, value=subject['subject__code'])
-            subject_sheet.cell(row=i, column=3, value=subject['avg_score'])
-            subject_sheet.cell(row=i, column=4, value=subject['total_students'])
-            subject_sheet.cell(row=i, column=5, value=subject['pass_count'])
-            subject_sheet.cell(row=i, column=6, value=pass_rate)
-            subject_sheet.cell(row=i, column=7, value=subject['max_score'])
-            subject_sheet.cell(row=i, column=8, value=subject.get('min_score', 0))
-        
-        for col in range(1, len(subject_headers) + 1):
-            cell = subject_sheet.cell(row=1, column=col)
+        story.append(top_table)
+    else:
+        story.append(Paragraph("No top performers data available.", styles['Normal']))
+    
+    # Build PDF
+    doc.build(story)
+
+
+def render_excel_report(analysis_data, output):
+    """Build the analysis workbook and save it to `output` (a path or binary file object)"""
+    # Create workbook
+    wb = Workbook()
+    
+    # Remove default sheet
+    wb.remove(wb.active)
+    
+    # Summary Sheet
+    summary_sheet = wb.create_sheet("Executive Summary")
+    
+    # Header
+    summary_sheet.merge_cells('A1:D1')
+    summary_sheet['A1'] = "Academic Results Analysis Report"
+    summary_sheet['A1'].font = Font(size=16, bold=True, color="1e293b")
+    summary_sheet['A1'].alignment = Alignment(horizontal='center')
+    
+    # Filters info
+    filters_text = "Filters: "
+    filters = []
+    if analysis_data['filters']['academic_year']:
+        filters.append(f"Academic Year: {analysis_data['filters']['academic_year'].name}")
+    if analysis_data['filters']['class_level']:
+        filters.append(f"Class: {analysis_data['filters']['class_level'].name}")
+    if analysis_data['filters']['term']:
+        filters.append(f"Term: {analysis_data['filters']['term'].name}")
+    
+    filters_text += " | ".join(filters) if filters else "All Data"
+    summary_sheet['A3'] = filters_text
+    summary_sheet['A4'] = f"Generated: {analysis_data['generated_at'].strftime('%Y-%m-%d %H:%M')}"
+    
+    # Summary Table
+    summary_sheet['A6'] = "Metric"
+    summary_sheet['B6'] = "Value"
+    
+    summary_data = [
+        ['Total Results', analysis_data['summary']['total_results']],
+        ['Total Students', analysis_data['summary']['total_students']],
+        ['Average Score', analysis_data['summary']['average_score']],
+        ['Published Results', analysis_data['summary']['published_results']],
+    ]
+    
+    for i, (metric, value) in enumerate(summary_data, start=7):
+        summary_sheet[f'A{i}'] = metric
+        summary_sheet[f'B{i}'] = value
+    
+    # Style summary table
+    for row in summary_sheet['A6:B10']:
+        for cell in row:
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color="f8fafc", end_color="f8fafc", fill_type="solid")
+            cell.border = openpyxl.styles.Border(
+                left=openpyxl.styles.Side(style='thin'),
+                right=openpyxl.styles.Side(style='thin'),
+                top=openpyxl.styles.Side(style='thin'),
+                bottom=openpyxl.styles.Side(style='thin')
+            )
+    
+    # Grade Distribution Sheet
+    grade_sheet = wb.create_sheet("Grade Distribution")
+    
+    grade_sheet['A1'] = "Grade"
+    grade_sheet['B1'] = "Count"
+    grade_sheet['C1'] = "Percentage"
+    
+    for i, grade in enumerate(analysis_data['grade_distribution'], start=2):
+        percentage = (grade['count'] / analysis_data['summary']['total_results'] * 100) if analysis_data['summary']['total_results'] > 0 else 0
+        grade_sheet[f'A{i}'] = grade['grade']
+        grade_sheet[f'B{i}'] = grade['count']
+        grade_sheet[f'C{i}'] = percentage / 100 
+    
+    # Style grade sheet
+    for row in grade_sheet['A1:C1']:
+        for cell in row:
             cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="f59e0b", end_color="f59e0b", fill_type="solid")
-        
-        for row in range(2, len(analysis_data['subject_performance']) + 2):
-            subject_sheet.cell(row=row, column=6).number_format = '0.0%'
-            subject_sheet.cell(row=row, column=3).number_format = '0.0'
-            subject_sheet.cell(row=row, column=7).number_format = '0.0'
-            subject_sheet.cell(row=row, column=8).number_format = '0.0'
-        
-        class_sheet = wb.create_sheet("Class Performance")
-        
-        class_headers = ['Class', 'Avg Score', 'Students', 'Pass Rate']
-        for col, header in enumerate(class_headers, start=1):
-            class_sheet.cell(row=1, column=col, value=header)
-        
-        for i, class_perf in enumerate(analysis_data['class_performance'], start=2):
-            class_sheet.cell(row=i, column=1, value=class_perf['class_level__name'])
-            class_sheet.cell(row=i, column=2, value=class_perf['avg_score'])
-            class_sheet.cell(row=i, column=3, value=class_perf['total_students'])
-            class_sheet.cell(row=i, column=4, value=class_perf['pass_rate'] / 100)
-        
-        for col in range(1, len(class_headers) + 1):
-            cell = class_sheet.cell(row=1, column=col)
+            cell.fill = PatternFill(start_color="10b981", end_color="10b981", fill_type="solid")
+    
+    for cell in grade_sheet['C']:
+        if cell.row > 1:
+            cell.number_format = '0.0%'
+    
+    subject_sheet = wb.create_sheet("Subject Performance")
+    
+    subject_headers = ['Subject', 'Code', 'Avg Score', 'Students', 'Pass Count', 'Pass Rate', 'High Score', 'Low Score']
+    for col, header in enumerate(subject_headers, start=1):
+        subject_sheet.cell(row=1, column=col, value=header)
+    
+    for i, subject in enumerate(analysis_data['subject_performance'], start=2):
+        pass_rate = (subject['pass_count'] / subject['total_students']) if subject['total_students'] > 0 else 0
+        subject_sheet.cell(row=i, column=1, value=subject['subject__name'])
+        subject_sheet.cell(row=i, column=2, value=subject['subject__code'])
+        subject_sheet.cell(row=i, column=3, value=subject['avg_score'])
+        subject_sheet.cell(row=i, column=4, value=subject['total_students'])
+        subject_sheet.cell(row=i, column=5, value=subject['pass_count'])
+        subject_sheet.cell(row=i, column=6, value=pass_rate)
+        subject_sheet.cell(row=i, column=7, value=subject['max_score'])
+        subject_sheet.cell(row=i, column=8, value=subject.get('min_score', 0))
+    
+    for col in range(1, len(subject_headers) + 1):
+        cell = subject_sheet.cell(row=1, column=col)
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill(start_color="f59e0b", end_color="f59e0b", fill_type="solid")
+    
+    for row in range(2, len(analysis_data['subject_performance']) + 2):
+        subject_sheet.cell(row=row, column=6).number_format = '0.0%'
+        subject_sheet.cell(row=row, column=3).number_format = '0.0'
+        subject_sheet.cell(row=row, column=7).number_format = '0.0'
+        subject_sheet.cell(row=row, column=8).number_format = '0.0'
+    
+    class_sheet = wb.create_sheet("Class Performance")
+    
+    class_headers = ['Class', 'Avg Score', 'Students', 'Pass Rate']
+    for col, header in enumerate(class_headers, start=1):
+        class_sheet.cell(row=1, column=col, value=header)
+    
+    for i, class_perf in enumerate(analysis_data['class_performance'], start=2):
+        class_sheet.cell(row=i, column=1, value=class_perf['class_level__name'])
+        class_sheet.cell(row=i, column=2, value=class_perf['avg_score'])
+        class_sheet.cell(row=i, column=3, value=class_perf['total_students'])
+        class_sheet.cell(row=i, column=4, value=class_perf['pass_rate'] / 100)
+    
+    for col in range(1, len(class_headers) + 1):
+        cell = class_sheet.cell(row=1, column=col)
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill(start_color="8b5cf6", end_color="8b5cf6", fill_type="solid")
+    
+    for row in range(2, len(analysis_data['class_performance']) + 2):
+        class_sheet.cell(row=row, column=2).number_format = '0.0'
+        class_sheet.cell(row=row, column=4).number_format = '0.0%'
+    
+    if analysis_data['top_performers']:
+        top_sheet = wb.create_sheet("Top Performers")
+        
+        top_headers = ['Rank', 'Student Name', 'Student ID', 'Subject', 'Class', 'Score', 'Grade']
+        for col, header in enumerate(top_headers, start=1):
+            top_sheet.cell(row=1, column=col, value=header)
+        
+        for i, performer in enumerate(analysis_data['top_performers'], start=2):
+            top_sheet.cell(row=i, column=1, value=i-1)
+            top_sheet.cell(row=i, column=2, value=f"{performer['student__first_name']} {performer['student__last_name']}")
+            top_sheet.cell(row=i, column=3, value=performer['student__student_profile__student_id'])
+            top_sheet.cell(row=i, column=4, value=performer['subject__name'])
+            top_sheet.cell(row=i, column=5, value=performer['class_level__name'])
+            top_sheet.cell(row=i, column=6, value=performer['score'])
+            top_sheet.cell(row=i, column=7, value=performer['grade'])
+        
+        for col in range(1, len(top_headers) + 1):
+            cell = top_sheet.cell(row=1, column=col)
             cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="8b5cf6", end_color="8b5cf6", fill_type="solid")
-        
-        for row in range(2, len(analysis_data['class_performance']) + 2):
-            class_sheet.cell(row=row, column=2).number_format = '0.0'
-            class_sheet.cell(row=row, column=4).number_format = '0.0%'
+            cell.fill = PatternFill(start_color="ef4444", end_color="ef4444", fill_type="solid")
         
-        if analysis_data['top_performers']:
-            top_sheet = wb.create_sheet("Top Performers")
-            
-            top_headers = ['Rank', 'Student Name', 'Student ID', 'Subject', 'Class', 'Score', 'Grade']
-            for col, header in enumerate(top_headers, start=1):
-                top_sheet.cell(row=1, column=col, value=header)
-            
-            for i, performer in enumerate(analysis_data['top_performers'], start=2):
-                top_sheet.cell(row=i, column=1, value=i-1)
-                top_sheet.cell(row=i, column=2, value=f"{performer['student__first_name']} {performer['student__last_name']}")
-                top_sheet.cell(row=i, column=3, value=performer['student__student_profile__student_id'])
-                top_sheet.cell(row=i, column=4, value=performer['subject__name'])
-                top_sheet.cell(row=i, column=5, value=performer['class_level__name'])
-                top_sheet.cell(row=i, column=6, value=performer['score'])
-                top_sheet.cell(row=i, column=7, value=performer['grade'])
-            
-            for col in range(1, len(top_headers) + 1):
-                cell = top_sheet.cell(row=1, column=col)
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.fill = PatternFill(start_color="ef4444", end_color="ef4444", fill_type="solid")
+        for row in range(2, len(analysis_data['top_performers']) + 2):
+            top_sheet.cell(row=row, column=6).number_format = '0.0'
+    
+    for sheet in wb.sheetnames:
+        ws = wb[sheet]
+        for col in ws.columns:
+            max_length = 0
+            col_letter = None
             
-            for row in range(2, len(analysis_data['top_performers']) + 2):
-                top_sheet.cell(row=row, column=6).number_format = '0.0'
-        
-        for sheet in wb.sheetnames:
-            ws = wb[sheet]
-            for col in ws.columns:
-                max_length = 0
-                col_letter = None
+            for cell in col:
+                if isinstance(cell, MergedCell):
+                    continue
                 
-                for cell in col:
-                    if isinstance(cell, MergedCell):
-                        continue
-                    
-                    if col_letter is None:
-                        col_letter = cell.column_letter
-                    
-                    try:
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
+                if col_letter is None:
+                    col_letter = cell.column_letter
                 
-                if col_letter:
-                    ws.column_dimensions[col_letter].width = (max_length + 2) * 1.2
-        
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="results_analysis_report.xlsx"'
-        
-        return response
-        
-    except Exception as e:
-        return HttpResponse(f"Error generating Excel report: {str(e)}", status=500)
+                try:
+                    if cell.value and len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            
+            if col_letter:
+                ws.column_dimensions[col_letter].width = (max_length + 2) * 1.2
     
+    wb.save(output)
+    
+
+# format -> (file extension, content type, renderer)
+REPORT_FORMATS = {
+    'pdf': ('.pdf', 'application/pdf', render_pdf_report),
+    'excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', render_excel_report),
+}
+
 
 @login_required
 def terms_list(request):
@@ -2545,3 +3019,4 @@ def get_terms_by_academic_year(request):
             'success': False,
             'error': str(e)
         }, status=500)
+
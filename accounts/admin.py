@@ -3,9 +3,17 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from collections import Counter
+from django.db import transaction
 from django.db.models import Count
 from .models import User, TeacherProfile, StudentProfile, StaffProfile
 from django.contrib.admin import SimpleListFilter
+from academics.utils.enrollment_counts import adjust_class_counts
+from academics.utils.teacher_workload import refresh_workload_for_classes
+from core.cache import bump, model_namespace
+from .utils.dashboard_stats import invalidate_dashboard_stats
+from .utils.people_search import index_users
+from .utils.typeahead import invalidate_index
 
 
 @admin.register(User)
@@ -353,15 +361,38 @@ class StudentProfileAdmin(admin.ModelAdmin):
     
     actions = ['activate_students', 'deactivate_students', 'promote_students']
     
+    @transaction.atomic
+    def _set_active(self, queryset, is_active):
+        """
+            queryset.update() skips the model signals, so everything they maintain for the
+            affected students is refreshed here: enrollment counters, teacher workload,
+            search documents and the cached indexes. Returns the number of students changed.
+        """
+        changed = list(queryset.exclude(is_active=is_active).values_list('id', 'user_id', 'current_class_id'))
+        if not changed:
+            return 0
+        updated = StudentProfile.objects.filter(id__in=[pk for pk, _, _ in changed]).update(is_active=is_active)
+
+        sign = 1 if is_active else -1
+        students_per_class = Counter(class_id for _, _, class_id in changed if class_id)
+        adjust_class_counts({class_id: sign * count for class_id, count in students_per_class.items()})
+        refresh_workload_for_classes(students_per_class)
+
+        index_users(user_id for _, user_id, _ in changed)
+        bump(model_namespace(StudentProfile))
+        invalidate_index('student')
+        invalidate_dashboard_stats()
+        return updated
+
     def activate_students(self, request, queryset):
         """Activate selected students"""
-        updated = queryset.update(is_active=True)
+        updated = self._set_active(queryset, True)
         self.message_user(request, f'{updated} student(s) activated successfully.')
     activate_students.short_description = 'Activate selected students'
     
     def deactivate_students(self, request, queryset):
         """Deactivate selected students"""
-        updated = queryset.update(is_active=False)
+        updated = self._set_active(queryset, False)
         self.message_user(request, f'{updated} student(s) deactivated successfully.')
     deactivate_students.short_description = 'Deactivate selected students'
     
@@ -0,0 +1,14 @@
+import time
+from django.core.management.base import BaseCommand
+from accounts.utils.people_search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the people search documents from users and their profiles"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_index()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} user(s) in {elapsed:.2f}s"))
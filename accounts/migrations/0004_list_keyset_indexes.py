@@ -0,0 +1,25 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_remove_teacherprofile_is_class_teacher'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['created_at', 'id'], name='student_pro_created_ce177b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacherprofile',
+            index=models.Index(fields=['created_at', 'id'], name='teacher_pro_created_e99812_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='auth_user_created_2027e3_idx'),
+        ),
+    ]
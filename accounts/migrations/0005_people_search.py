@@ -0,0 +1,102 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:51
+
+from django.conf import settings
+from django.db import DatabaseError, migrations, models, transaction
+import django.db.models.deletion
+
+
+SQLITE_INDEX = [
+    # External-content FTS5 table over people_search, kept in sync by triggers
+    "CREATE VIRTUAL TABLE people_search_fts USING fts5("
+    "document, content='people_search', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER people_search_ai AFTER INSERT ON people_search BEGIN "
+    "INSERT INTO people_search_fts(rowid, document) VALUES (new.id, new.document); END",
+    "CREATE TRIGGER people_search_ad AFTER DELETE ON people_search BEGIN "
+    "INSERT INTO people_search_fts(people_search_fts, rowid, document) VALUES ('delete', old.id, old.document); END",
+    "CREATE TRIGGER people_search_au AFTER UPDATE ON people_search BEGIN "
+    "INSERT INTO people_search_fts(people_search_fts, rowid, document) VALUES ('delete', old.id, old.document); "
+    "INSERT INTO people_search_fts(rowid, document) VALUES (new.id, new.document); END",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS people_search_au",
+    "DROP TRIGGER IF EXISTS people_search_ad",
+    "DROP TRIGGER IF EXISTS people_search_ai",
+    "DROP TABLE IF EXISTS people_search_fts",
+]
+POSTGRESQL_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX people_search_document_trgm ON people_search USING gin (document gin_trgm_ops)",
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS people_search_document_trgm",
+]
+
+DOCUMENT_FIELDS = [
+    'first_name', 'last_name', 'username', 'email',
+    'student_profile__student_id', 'teacher_profile__employee_id', 'staff_profile__staff_id',
+]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    """
+        Full-text index for the vendor; other databases search the plain table. The index
+        is optional: SQLite before 3.34 has no trigram tokenizer and pg_trgm may not be
+        installable, in which case people_search falls back to icontains.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_INDEX, 'postgresql': POSTGRESQL_INDEX}.get(vendor)
+    if not statements:
+        return
+    try:
+        # Savepoint, so a failed statement doesn't abort the migration's transaction
+        with transaction.atomic(using=schema_editor.connection.alias):
+            _execute(schema_editor, statements)
+    except DatabaseError:
+        pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_DROP)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_DROP)
+
+
+def build_documents(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    PeopleSearch = apps.get_model('accounts', 'PeopleSearch')
+    PeopleSearch.objects.bulk_create([
+        PeopleSearch(user_id=row['id'], document=' '.join(str(row[field]) for field in DOCUMENT_FIELDS if row[field]))
+        for row in User.objects.values('id', *DOCUMENT_FIELDS).iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeopleSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.TextField()),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'People Search Entry',
+                'verbose_name_plural': 'People Search Entries',
+                'db_table': 'people_search',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
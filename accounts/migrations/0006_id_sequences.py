@@ -0,0 +1,47 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+# prefix: (profile model, ID field)
+ID_FIELDS = {
+    'NSA-STU-': ('StudentProfile', 'student_id'),
+    'NSA-TCH-': ('TeacherProfile', 'employee_id'),
+    'NSA-AD-': ('StaffProfile', 'staff_id'),
+}
+
+
+def seed_sequences(apps, schema_editor):
+    """Continue every sequence after the highest ID already issued"""
+    IdSequence = apps.get_model('accounts', 'IdSequence')
+    for prefix, (model_name, field) in ID_FIELDS.items():
+        model = apps.get_model('accounts', model_name)
+        highest = 99999
+        for value in model.objects.filter(**{f"{field}__startswith": prefix}).values_list(field, flat=True).iterator():
+            suffix = value[len(prefix):]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        IdSequence.objects.create(prefix=prefix, last_value=highest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_people_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('prefix', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'ID Sequence',
+                'verbose_name_plural': 'ID Sequences',
+                'db_table': 'id_sequences',
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -49,6 +49,7 @@ class User(AbstractUser):
             models.Index(fields=['email']),
             models.Index(fields=['role']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),   # Keyset pagination of the user lists
         ]
 
     def __str__(self):
@@ -110,6 +111,7 @@ class TeacherProfile(models.Model):
         verbose_name_plural = 'Teacher Profiles'
         indexes = [
             models.Index(fields=['employee_id']),
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
@@ -180,6 +182,7 @@ class StudentProfile(models.Model):
             models.Index(fields=['student_id']),
             models.Index(fields=['current_class']),
             models.Index(fields=['academic_year']),
+            models.Index(fields=['created_at', 'id']),
         ]
         unique_together = ['student_id']
 
@@ -235,4 +238,42 @@ class StaffProfile(models.Model):
         verbose_name_plural = 'Staff Profiles'
 
     def __str__(self):
-        return f"{self.user.get_full_name()} - {self.staff_id}"
\ No newline at end of file
+        return f"{self.user.get_full_name()} - {self.staff_id}"
+
+class PeopleSearch(models.Model):
+    """
+        Search document per user (names, username, email and profile ids), maintained by
+        signals (accounts/utils/people_search.py). Migration 0005 puts a full-text index on
+        it: an FTS5 trigram table on SQLite, a pg_trgm GIN index on PostgreSQL.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='search_entry'
+    )
+    document = models.TextField()
+
+    class Meta:
+        db_table = 'people_search'
+        verbose_name = 'People Search Entry'
+        verbose_name_plural = 'People Search Entries'
+
+    def __str__(self):
+        return self.document
+
+
+class IdSequence(models.Model):
+    """
+        Last number handed out for an ID prefix (NSA-STU-, NSA-TCH-, NSA-AD-). IDs are
+        reserved with a single row-locking UPDATE (accounts/utils/generateID.py).
+    """
+    prefix = models.CharField(max_length=20, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'id_sequences'
+        verbose_name = 'ID Sequence'
+        verbose_name_plural = 'ID Sequences'
+
+    def __str__(self):
+        return f"{self.prefix}{self.last_value}"
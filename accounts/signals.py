@@ -0,0 +1,69 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from academics.models import Subject, ClassLevel, ClassSubject, Term, Result
+from .models import User, TeacherProfile, StudentProfile, StaffProfile
+from .utils.dashboard_stats import invalidate_dashboard_stats
+from .utils.people_search import index_users
+from .utils.typeahead import invalidate_index
+
+# User fields that appear in the people search document
+SEARCH_USER_FIELDS = {'first_name', 'last_name', 'username', 'email'}
+# User fields the typeahead indexes depend on
+TYPEAHEAD_USER_FIELDS = {'first_name', 'last_name', 'role', 'is_active'}
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=StudentProfile)
+@receiver([post_save, post_delete], sender=TeacherProfile)
+@receiver([post_save, post_delete], sender=Subject)
+@receiver([post_save, post_delete], sender=ClassLevel)
+@receiver([post_save, post_delete], sender=ClassSubject)
+@receiver([post_save, post_delete], sender=Term)
+@receiver([post_save, post_delete], sender=Result)
+def clear_dashboard_stats(sender, update_fields=None, **kwargs):
+    """The admin dashboard snapshot is rebuilt on next request"""
+    if update_fields and set(update_fields) == {'last_login'}:
+        return   # Every login saves the user, none of the statistics change
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=User)
+def index_user_for_search(sender, instance, raw, update_fields=None, **kwargs):
+    if raw or (update_fields and not SEARCH_USER_FIELDS & set(update_fields)):
+        return
+    index_users({instance.pk})
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=TeacherProfile)
+@receiver(post_save, sender=StaffProfile)
+def index_profile_for_search(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    index_users({instance.user_id})
+
+
+@receiver(post_delete, sender=StudentProfile)
+@receiver(post_delete, sender=TeacherProfile)
+@receiver(post_delete, sender=StaffProfile)
+def reindex_after_profile_delete(sender, instance, **kwargs):
+    """The user may be in the middle of being deleted too, so never create an entry here"""
+    index_users({instance.user_id}, create=False)
+
+
+@receiver([post_save, post_delete], sender=User)
+def refresh_user_typeahead(sender, update_fields=None, **kwargs):
+    if update_fields and not TYPEAHEAD_USER_FIELDS & set(update_fields):
+        return
+    # Every role: the role itself may have changed
+    invalidate_index()
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def refresh_student_typeahead(sender, **kwargs):
+    invalidate_index('student')
+
+
+@receiver([post_save, post_delete], sender=TeacherProfile)
+def refresh_teacher_typeahead(sender, **kwargs):
+    invalidate_index('teacher')
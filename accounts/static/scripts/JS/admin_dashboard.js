@@ -3,4 +3,31 @@ const now = new Date();
 
 const options = { year: "numeric", month: "long", day: "numeric" };
 
-dateElement.textContent = now.toLocaleDateString("en-US", options);
\ No newline at end of file
+dateElement.textContent = now.toLocaleDateString("en-US", options);
+
+// Refresh the stat cards from the JSON endpoint without reloading the page
+const STATS_REFRESH_INTERVAL = 60000;
+const statsUrl = document.querySelector("script[data-stats-url]")?.dataset.statsUrl;
+
+async function refreshStats() {
+  try {
+    const response = await fetch(statsUrl, { headers: { Accept: "application/json" } });
+    if (!response.ok) return;
+
+    const data = await response.json();
+    if (!data.success) return;
+
+    document.querySelectorAll("[data-stat]").forEach((element) => {
+      const value = data.stats[element.dataset.stat];
+      if (value !== undefined) element.textContent = value;
+    });
+  } catch (error) {
+    console.error("Failed to refresh dashboard statistics:", error);
+  }
+}
+
+if (statsUrl) {
+  setInterval(() => {
+    if (!document.hidden) refreshStats();
+  }, STATS_REFRESH_INTERVAL);
+}
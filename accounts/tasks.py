@@ -0,0 +1,27 @@
+import os
+from django.urls import reverse
+from accounts.models import User
+from core.jobs import register_task, set_progress
+from .utils.student_import import import_students
+
+
+@register_task('import_students')
+def import_students_task(job, path, filename, created_by=None):
+    """Enroll the students of a file that was saved to disk by the upload view"""
+    user = User.objects.filter(id=created_by).first() if created_by else None
+
+    def progress(summary):
+        done = summary['created'] + summary['failed']
+        percent = min(99, int(done * 100 / (summary['total_rows'] or 1)))
+        set_progress(job.id, percent, f"{summary['created']} of {summary['total_rows']} students enrolled")
+
+    try:
+        with open(path, 'rb') as file_obj:
+            summary = import_students(file_obj, filename, created_by=user, progress=progress)
+    finally:
+        os.remove(path)
+
+    summary['error_report_url'] = None
+    if summary['error_report']:
+        summary['error_report_url'] = reverse('download_enrollment_errors', args=[summary['error_report']])
+    return summary
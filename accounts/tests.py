@@ -1,3 +1,218 @@
-from django.test import TestCase
+import csv
+import io
+import shutil
+import tempfile
+from datetime import date
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from academics.models import AcademicYear, ClassLevel, ClassSubject, Subject, TeacherWorkload
+from academics.utils.enrollment_counts import reconcile_counts
+from .models import IdSequence, User, StudentProfile, TeacherProfile
+from .utils.generateID import STUDENT_PREFIX, TEACHER_PREFIX, generate_student_id, reserve_ids
+from .utils.people_search import SEARCH_LIMIT, filter_by_search
+from .views import SEARCH_ORDERING
+from .utils.student_import import import_students
+from academics.utils.result_import import error_report_path
+from .utils.typeahead import typeahead
 
-# Create your tests here.
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='accounts-tests-')
+
+test_settings = override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def create_student(username, class_level=None, **fields):
+    fields.setdefault('email', f'{username}@x.com')
+    user = User.objects.create(username=username, role='student', **fields)
+    StudentProfile.objects.create(user=user, student_id=f'STU-{username}', current_class=class_level)
+    return user
+
+
+def create_teacher(username, **fields):
+    fields.setdefault('email', f'{username}@x.com')
+    user = User.objects.create(username=username, role='teacher', **fields)
+    TeacherProfile.objects.create(user=user, employee_id=f'TCH-{username}')
+    return user
+
+
+@test_settings
+class PeopleSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin1', password='pw', role='admin', email='a@x.com')
+        # More matching students than SEARCH_LIMIT, plus matches in another role
+        for i in range(SEARCH_LIMIT + 50):
+            create_student(f'stu{i}', first_name=f'Kofi{i}', last_name='Mensah')
+        for i in range(10):
+            create_teacher(f'tch{i}', first_name='Ama', last_name='Mensah')
+        cls.exact = create_student('exact', first_name='Yaw', last_name='Boateng')
+
+    def test_list_returns_every_match_of_the_role(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('student_api_list'), {'search': 'Mensah', 'count': '1', 'cursor': ''})
+        self.assertEqual(response.json()['count'], {'value': SEARCH_LIMIT + 50, 'approximate': False})
+
+    def test_api_pages_follow_the_ranking(self):
+        self.client.force_login(self.admin)
+        ranked = filter_by_search(User.objects.all(), 'Mensah').order_by(*SEARCH_ORDERING)
+        expected = [str(pk) for pk in ranked.values_list('pk', flat=True)]
+        seen, cursor = [], ''
+        while cursor is not None:
+            data = self.client.get(reverse('user_api_list'), {'search': 'Mensah', 'per_page': 40, 'cursor': cursor}).json()
+            seen.extend(user['id'] for user in data['users'])
+            cursor = data['next_cursor']
+        self.assertEqual(seen, expected)
+
+        # The exact match comes first although newer students also match
+        data = self.client.get(reverse('user_api_list'), {'search': 'Kofi1', 'cursor': ''}).json()
+        self.assertEqual(data['users'][0]['full_name'], 'Kofi1 Mensah')
+        self.assertEqual(self.client.get(reverse('user_api_list'), {'search': '  '}).json()['users'], [])
+
+    def test_search_runs_against_the_filtered_queryset(self):
+        students = filter_by_search(StudentProfile.objects.all(), 'Mensah', 'user_id')
+        teachers = filter_by_search(TeacherProfile.objects.all(), 'mensah', 'user_id')
+        self.assertEqual(students.count(), SEARCH_LIMIT + 50)
+        self.assertEqual(teachers.count(), 10)
+        # The best matches of the role are ranked, the rest share the rank after them
+        ranks = sorted(students.values_list('search_rank', flat=True))
+        self.assertEqual(ranks[:SEARCH_LIMIT], list(range(SEARCH_LIMIT)))
+        self.assertEqual(set(ranks[SEARCH_LIMIT:]), {SEARCH_LIMIT})
+
+    def test_every_term_must_match(self):
+        users = filter_by_search(User.objects.all(), 'yaw boat')
+        self.assertEqual(list(users), [self.exact])
+        self.assertFalse(filter_by_search(User.objects.all(), 'yaw mensah').exists())
+
+    def test_short_terms_fall_back_to_a_scan(self):
+        users = filter_by_search(User.objects.all(), 'Ya Bo')
+        self.assertEqual(list(users), [self.exact])
+        self.assertFalse(filter_by_search(User.objects.all(), '   ').exists())
+
+    def test_search_follows_profile_changes(self):
+        self.exact.last_name = 'Asante'
+        self.exact.save()
+        self.assertFalse(filter_by_search(User.objects.all(), 'Boateng').exists())
+        self.assertTrue(filter_by_search(User.objects.all(), 'Asante').exists())
+
+
+@test_settings
+class StudentAdminActionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(username='root', password='pw', role='admin', email='r@x.com')
+        cls.class_level = ClassLevel.objects.create(name='JHS 1', code='J1')
+        cls.subject = Subject.objects.create(name='Maths', code='MATH', is_active=True)
+        year = AcademicYear.objects.create(name='2024-2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 30))
+        cls.teacher = create_teacher('tch', first_name='Ama', last_name='Owusu')
+        ClassSubject.objects.create(class_level=cls.class_level, subject=cls.subject, academic_year=year, teacher=cls.teacher)
+        cls.students = [create_student(f'stu{i}', cls.class_level, first_name=f'Kofi{i}') for i in range(3)]
+
+    def run_action(self, action, students):
+        self.client.force_login(self.superuser)
+        return self.client.post(reverse('admin:accounts_studentprofile_changelist'), {
+            'action': action,
+            '_selected_action': [student.student_profile.pk for student in students],
+        })
+
+    def assertCounts(self, expected):
+        self.class_level.refresh_from_db()
+        self.subject.refresh_from_db()
+        self.assertEqual((self.class_level.student_count, self.subject.student_count), (expected, expected))
+
+    def test_actions_keep_enrollment_counters(self):
+        self.assertCounts(3)
+        self.run_action('deactivate_students', self.students[:2])
+        self.assertCounts(1)
+        # Already inactive students are not counted twice
+        self.run_action('deactivate_students', self.students)
+        self.assertCounts(0)
+        self.run_action('activate_students', self.students[:2])
+        self.assertCounts(2)
+        self.assertEqual(reconcile_counts(dry_run=True), [])
+
+    def test_actions_refresh_workload_and_typeahead(self):
+        self.assertEqual(len(typeahead('student', 'kofi')), 3)
+        self.run_action('deactivate_students', self.students[:2])
+        self.assertEqual(TeacherWorkload.objects.get(teacher=self.teacher).students, 1)
+        self.assertEqual([entry['id'] for entry in typeahead('student', 'kofi')], [str(self.students[2].id)])
+
+        self.run_action('activate_students', self.students)
+        self.assertEqual(TeacherWorkload.objects.get(teacher=self.teacher).students, 3)
+        self.assertEqual(len(typeahead('student', 'kofi')), 3)
+
+
+@test_settings
+class StudentImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.class_level = ClassLevel.objects.create(name='JHS 1', code='J1')
+        create_student('taken', email='Taken2@x.com')
+
+    def run_import(self, text):
+        summary = import_students(io.BytesIO(text.encode()), 'students.csv')
+        errors = {}
+        if summary['error_report']:
+            with open(error_report_path(summary['error_report']), newline='') as report:
+                errors = {row['row']: row['error'] for row in csv.DictReader(report)}
+        return summary, errors
+
+    def test_rows_are_validated_like_a_registration(self):
+        summary, errors = self.run_import(
+            "first_name,last_name,email,phone_number,class,parent_phone\n"
+            "Kofi,Mensah,kofi@x.com,+233201234567,JHS 1,\n"
+            "Ama,Owusu,,,JHS 1,\n"
+            "Yaw,Boateng,yaw@x.com,not-a-phone-number-at-all!!,JHS 1,\n"
+            f"{'A' * 151},Asante,long@x.com,,JHS 1,\n"
+            "Efua,Badu,efua@x.com,,JHS 1,012345678901234567890\n"
+            "Kwame,Nkrumah,kwame@x.com,,JHS 9,\n"
+        )
+        self.assertEqual((summary['created'], summary['failed']), (1, 5))
+        self.assertEqual(errors['3'], "First name, last name, and email are required.")
+        self.assertTrue(errors['4'].startswith("Phone number:"))
+        self.assertTrue(errors['5'].startswith("First name:"))
+        self.assertTrue(errors['6'].startswith("Parent phone:"))
+        self.assertEqual(errors['7'], "Unknown class 'JHS 9'.")
+
+        student = StudentProfile.objects.get(user__email='kofi@x.com')
+        self.assertEqual(student.current_class, self.class_level)
+        self.assertTrue(student.student_id)
+        self.class_level.refresh_from_db()
+        self.assertEqual(self.class_level.student_count, 1)
+
+    def test_emails_are_unique_ignoring_case(self):
+        summary, errors = self.run_import(
+            "first_name,last_name,email\n"
+            "Kofi,Mensah,taken2@x.com\n"
+            "Ama,Owusu,ama@x.com\n"
+            "Ama,Owusu,AMA@x.com\n"
+        )
+        self.assertEqual((summary['created'], summary['failed']), (1, 2))
+        self.assertEqual(errors['2'], "A user with this email already exists.")
+        self.assertEqual(errors['4'], "Duplicate email in file.")
+
+
+class ReserveIdTests(TestCase):
+
+    def test_missing_sequence_continues_after_existing_ids(self):
+        IdSequence.objects.all().delete()
+        create_student('old')
+        StudentProfile.objects.update(student_id=f'{STUDENT_PREFIX}100041')
+        self.assertEqual(reserve_ids(STUDENT_PREFIX, 3), [f'{STUDENT_PREFIX}1000{n}' for n in (42, 43, 44)])
+        self.assertEqual(generate_student_id(), f'{STUDENT_PREFIX}100045')
+
+    def test_prefixes_have_their_own_sequences(self):
+        self.assertEqual(reserve_ids(TEACHER_PREFIX), [f'{TEACHER_PREFIX}100000'])
+        self.assertEqual(reserve_ids(STUDENT_PREFIX), [f'{STUDENT_PREFIX}100000'])
+        self.assertEqual(reserve_ids(TEACHER_PREFIX, 0), [])
+        self.assertEqual(reserve_ids(TEACHER_PREFIX), [f'{TEACHER_PREFIX}100001'])
@@ -22,6 +22,8 @@ urlpatterns = [
     
     # Student Profiles
     path('students/create/', views.student_create, name='student_create'),
+    path('students/import/', views.student_import, name='student_import'),
+    path('students/import/<uuid:report_id>/errors/', views.download_enrollment_errors, name='download_enrollment_errors'),
     path('students/<int:student_id>/update/', views.student_update, name='student_update'),
     
     # Staff Profiles
@@ -30,10 +32,14 @@ urlpatterns = [
     # JSON API Endpoints
     path('api/users/', views.user_api_list, name='user_api_list'),
     path('api/users/<uuid:user_id>/', views.user_api_detail, name='user_api_detail'),
+    path('api/teachers/', views.teacher_api_list, name='teacher_api_list'),
+    path('api/students/', views.student_api_list, name='student_api_list'),
+    path('api/admins/', views.admin_api_list, name='admin_api_list'),
     
     # Dashboards
         #Admin
     path('dashboard/admin/', views.admin_dashboard, name='admin_dashboard'),
+    path('api/dashboard/admin/stats/', views.admin_dashboard_stats, name='admin_dashboard_stats'),
     path('dashboard/admin/teachers/', views.teacher_list, name='teachers_list'),
     path('dashboard/admin/students/', views.student_list, name='student_list'),
 
@@ -0,0 +1,139 @@
+"""
+    Admin dashboard statistics.
+
+    Counts that used to be separate queries are folded into one conditional aggregate
+    per table, and the whole snapshot is cached for DASHBOARD_STATS_TTL seconds in the
+    shared cache. accounts.signals bumps the 'dashboard' namespace when a model it
+    summarizes is saved or deleted; bulk updates that bypass signals show up once the
+    TTL expires.
+"""
+from datetime import timedelta
+from django.core.cache import cache
+from core.cache import bump, key
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+from academics.models import Subject, ClassLevel, Term, Result
+from academics.utils.result_aggregates import count_students, get_aggregates, summarize, summarize_by
+from academics.utils.teacher_workload import get_teacher_workload
+from accounts.models import User, TeacherProfile, StudentProfile
+from core.views import get_recent_activities
+
+
+DASHBOARD_STATS_NAMESPACE = 'dashboard'
+DASHBOARD_STATS_TTL = 60   # Seconds
+
+
+def _count(**lookups):
+    return Count('id', filter=Q(**lookups))
+
+
+def compute_dashboard_stats():
+    """Build the admin dashboard snapshot from the database, as JSON-serializable values"""
+    now = timezone.now()
+    month_ago = now - timedelta(days=30)
+
+    users = User.objects.aggregate(
+        total=Count('id'),
+        teachers=_count(role='teacher'),
+        students=_count(role='student'),
+        admins=_count(role='admin'),
+    )
+    students = StudentProfile.objects.aggregate(
+        active=_count(is_active=True),
+        recent=_count(created_at__gte=month_ago),
+    )
+    teachers = TeacherProfile.objects.aggregate(
+        active=_count(is_active=True),
+        **{value: _count(employment_type=value) for value, _ in TeacherProfile.EMPLOYMENT_TYPE_CHOICES}
+    )
+    subjects = Subject.objects.filter(is_active=True).aggregate(
+        total=Count('id'),
+        core=_count(category='core'),
+        elective=_count(category='elective'),
+    )
+
+    class_distribution = list(
+        ClassLevel.objects.filter(is_active=True).values('name', 'student_count').order_by('-student_count')
+    )
+
+    current_term = Term.objects.filter(is_current=True).values('id', 'name').first()
+    recent_results = Result.objects.filter(date_uploaded__gte=month_ago).count()
+
+    # Result statistics come from the pre-aggregated rollup rows
+    result_aggregates = list(get_aggregates())
+    avg_score = summarize(result_aggregates)['avg_score'] or 0
+    subject_students = count_students(Result.objects.all(), 'subject__name')
+
+    top_students = []
+    if current_term:
+        top_students = list(
+            Result.objects.filter(
+                term_id=current_term['id']
+            ).values(
+                'student__id',
+                'student__first_name',
+                'student__last_name',
+                'student__student_profile__student_id',
+                'student__student_profile__current_class__name'
+            ).annotate(
+                avg_score=Avg('score')
+            ).order_by('-avg_score')[:5]
+        )
+
+    subject_stats = sorted([
+        {
+            'name': name,
+            'student_count': subject_students.get(name, 0),
+            'avg_score': summary['avg_score'] or 0,
+            'pass_rate': summary['pass_rate'] or 0,
+        }
+        for name, summary in summarize_by(result_aggregates, lambda row: row.subject.name).items()
+    ], key=lambda item: item['avg_score'], reverse=True)[:4]
+
+    teacher_workload = get_teacher_workload()
+    for teacher in teacher_workload:
+        teacher['id'] = str(teacher['id'])
+
+    return {
+        'total_users': users['total'],
+        'total_teachers': users['teachers'],
+        'total_students': users['students'],
+        'total_staff': users['admins'],
+        'active_students': students['active'],
+        'active_teachers': teachers['active'],
+        'total_subjects': subjects['total'],
+        'total_classes': len(class_distribution),
+
+        'recent_results': recent_results,
+        'avg_score': round(avg_score, 2),
+        'recent_students': students['recent'],
+        'class_distribution': class_distribution,
+        'teacher_employment': [
+            {'employment_type': value, 'count': teachers[value]}
+            for value, _ in TeacherProfile.EMPLOYMENT_TYPE_CHOICES
+            if teachers[value]
+        ],
+        'current_term': current_term,
+
+        'top_students': top_students,
+        'subject_stats': subject_stats,
+        'teacher_workload': teacher_workload,
+        'recent_activities': get_recent_activities(),
+        'core_subjects': subjects['core'],
+        'elective_subjects': subjects['elective'],
+        'generated_at': now.isoformat(),
+    }
+
+
+def get_dashboard_stats(refresh=False):
+    """Cached admin dashboard snapshot; refresh=True rebuilds it regardless of the cache"""
+    cache_key = key(DASHBOARD_STATS_NAMESPACE, 'admin')
+    stats = None if refresh else cache.get(cache_key)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(cache_key, stats, DASHBOARD_STATS_TTL)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    bump(DASHBOARD_STATS_NAMESPACE)
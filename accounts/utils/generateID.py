@@ -1,120 +1,78 @@
-from accounts.models import TeacherProfile, StudentProfile, StaffProfile
-import random
-from django.db import transaction
-from django.db.models import Max
-import time
+"""
+    Profile ID allocation.
+
+    Each prefix has one IdSequence row. Reserving IDs is a single
+    `UPDATE ... SET last_value = last_value + n`, which row-locks the counter until the
+    surrounding transaction ends, so concurrent registrations queue on it instead of
+    racing, and a bulk import can take a whole block of IDs in one statement.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from accounts.models import IdSequence, TeacherProfile, StudentProfile, StaffProfile
+
+
+STUDENT_PREFIX = 'NSA-STU-'
+TEACHER_PREFIX = 'NSA-TCH-'
+STAFF_PREFIX = 'NSA-AD-'
+FIRST_NUMBER = 100000   # IDs have at least six digits
+
+# prefix: (profile model, ID field), used to seed a missing sequence
+ID_FIELDS = {
+    STUDENT_PREFIX: (StudentProfile, 'student_id'),
+    TEACHER_PREFIX: (TeacherProfile, 'employee_id'),
+    STAFF_PREFIX: (StaffProfile, 'staff_id'),
+}
+
+
+def highest_number(prefix):
+    """Largest number already used with `prefix`, or FIRST_NUMBER - 1"""
+    model, field = ID_FIELDS[prefix]
+    highest = FIRST_NUMBER - 1
+    for value in model.objects.filter(**{f"{field}__startswith": prefix}).values_list(field, flat=True).iterator():
+        suffix = value[len(prefix):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def _create_sequence(prefix):
+    try:
+        with transaction.atomic():
+            IdSequence.objects.create(prefix=prefix, last_value=highest_number(prefix))
+    except IntegrityError:
+        pass   # Another process created it first
+
+
+@transaction.atomic
+def reserve_ids(prefix, count=1):
+    """Reserve `count` consecutive IDs for `prefix` and return them in order"""
+    if count < 1:
+        return []
+    if not IdSequence.objects.filter(prefix=prefix).update(last_value=F('last_value') + count):
+        _create_sequence(prefix)
+        IdSequence.objects.filter(prefix=prefix).update(last_value=F('last_value') + count)
+
+    # Still locked by the UPDATE above, so this reads our own increment
+    last_value = IdSequence.objects.values_list('last_value', flat=True).get(prefix=prefix)
+    return [f"{prefix}{number:06d}" for number in range(last_value - count + 1, last_value + 1)]
 
 
 def generate_staff_id():
     """
-        Generate unique Admin ID in the format: NSA-AD-XXXXXX (6 random digits)
+        Next Admin ID in the format: NSA-AD-XXXXXX
     """
-
-    max_attempts = 100
-    for _ in range(max_attempts):
-        # Generate random number between 100000 and 999999 (6 digits)
-        random_number = random.randint(100000, 999999)
-        new_id = f"NSA-AD-{random_number}"
-        
-        # Check if ID already exists
-        if not StaffProfile.objects.filter(staff_id=new_id).exists():
-            return new_id
-    
-    # If we can't find a unique ID after max attempts, use a different approach
-    existing_ids = set(StaffProfile.objects.values_list('staff_id', flat=True))
-    for number in range(100000, 1000000):
-        new_id = f"NSA-AD-{number}"
-        if new_id not in existing_ids:
-            return new_id
-    
-    # This should never happen unless you have 900,000+ admins
-    raise Exception("Cannot generate unique staff ID")
+    return reserve_ids(STAFF_PREFIX)[0]
 
 
 def generate_teacher_id():
     """
-        Generate unique Teacher ID in the format: NSA-TCH-XXXXXX (6 random digits)
+        Next Teacher ID in the format: NSA-TCH-XXXXXX
     """
-
-    max_attempts = 100
-    for _ in range(max_attempts):
-        random_number = random.randint(100000, 999999)
-        new_id = f"NSA-TCH-{random_number}"
-        
-        if not TeacherProfile.objects.filter(employee_id=new_id).exists():
-            return new_id
-    
-    existing_ids = set(TeacherProfile.objects.values_list('employee_id', flat=True))
-    for number in range(100000, 1000000):
-        new_id = f"NSA-TCH-{number}"
-        if new_id not in existing_ids:
-            return new_id
-    
-    raise Exception("Cannot generate unique teacher ID")
-
-
+    return reserve_ids(TEACHER_PREFIX)[0]
 
 
 def generate_student_id():
     """
-        Generate unique Student ID in the format: NSA-STU-XXXXXX (6 digits)
-        Uses sequential numbering with random fallback for guaranteed uniqueness
+        Next Student ID in the format: NSA-STU-XXXXXX
     """
-    # First try: sequential numbering from the last used ID
-    with transaction.atomic():
-        try:
-            # Get the highest student ID currently in the database
-            last_id = StudentProfile.objects.aggregate(
-                max_id=Max('student_id')
-            )['max_id']
-            
-            if last_id:
-                # Extract the number part from the last ID and increment
-                last_num = int(last_id.split('-')[-1])
-                next_num = last_num + 1
-            else:
-                # If no students exist yet, start from 100000
-                next_num = 100000
-            
-            # Make sure we don't exceed 6 digits
-            if next_num > 999999:
-                next_num = 100000  # Reset if we reach the limit
-                
-            new_id = f"NSA-STU-{next_num:06d}"
-            
-            # Double check this ID doesn't already exist
-            if not StudentProfile.objects.filter(student_id=new_id).exists():
-                return new_id
-        except (ValueError, IndexError):
-            # If parsing fails for any reason, move to random generation
-            pass
-    
-    # Second try: random number generation
-    attempts = 0
-    while attempts < 1000:
-        # Generate a random 6-digit number
-        random_num = random.randint(100000, 999999)
-        new_id = f"NSA-STU-{random_num:06d}"
-        
-        # Check if this random ID is available
-        if not StudentProfile.objects.filter(student_id=new_id).exists():
-            return new_id
-        
-        attempts += 1
-        # Add small delay every 100 attempts to avoid tight loops
-        if attempts % 100 == 0:
-            time.sleep(0.01)
-    
-    # Third try: use timestamp as base with offsets
-    timestamp_id = int(time.time()) % 1000000
-    for offset in range(1000):
-        attempt_id = (timestamp_id + offset) % 1000000
-        # Ensure it's always 6 digits
-        if attempt_id < 100000:
-            attempt_id += 100000
-        new_id = f"NSA-STU-{attempt_id:06d}"
-        if not StudentProfile.objects.filter(student_id=new_id).exists():
-            return new_id
-    
-    # If all methods fail, raise an error
-    raise Exception("Cannot generate unique student ID - system overloaded")
\ No newline at end of file
+    return reserve_ids(STUDENT_PREFIX)[0]
@@ -0,0 +1,179 @@
+"""
+    People search over the PeopleSearch documents.
+
+    SQLite matches against an FTS5 trigram table (substring matches like icontains, ranked
+    by bm25) and PostgreSQL uses ILIKE on a pg_trgm GIN index ranked by word similarity.
+    Other databases, terms shorter than a trigram and databases whose migration could not
+    create the index (SQLite before 3.34 has no trigram tokenizer, pg_trgm may not be
+    installable) fall back to icontains on the single documents table.
+"""
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+from accounts.models import PeopleSearch, User
+
+
+SEARCH_LIMIT = 200   # Matches ranked by relevance, best first
+FTS_TABLE = 'people_search_fts'
+
+# (document part, User.values() field)
+DOCUMENT_FIELDS = [
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+    ('username', 'username'),
+    ('email', 'email'),
+    ('student_id', 'student_profile__student_id'),
+    ('employee_id', 'teacher_profile__employee_id'),
+    ('staff_id', 'staff_profile__staff_id'),
+]
+
+_index_available = None
+
+
+def _document(row):
+    return ' '.join(str(row[field]) for _, field in DOCUMENT_FIELDS if row[field])
+
+
+def index_users(user_ids, create=True):
+    """
+        (Re)build the search documents of these users. create=False only rewrites existing
+        entries, for callers that may run while the user itself is being deleted.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return 0
+    documents = {
+        row['id']: _document(row)
+        for row in User.objects.filter(id__in=user_ids).values('id', *(field for _, field in DOCUMENT_FIELDS))
+    }
+    existing = dict(PeopleSearch.objects.filter(user_id__in=documents).values_list('user_id', 'id'))
+
+    for user_id, entry_id in existing.items():
+        PeopleSearch.objects.filter(id=entry_id).update(document=documents[user_id])
+    if create:
+        PeopleSearch.objects.bulk_create([
+            PeopleSearch(user_id=user_id, document=document)
+            for user_id, document in documents.items() if user_id not in existing
+        ], batch_size=500)
+    return len(documents)
+
+
+def rebuild_index():
+    """Rebuild every search document"""
+    PeopleSearch.objects.all().delete()
+    rows = User.objects.values('id', *(field for _, field in DOCUMENT_FIELDS)).iterator(chunk_size=2000)
+
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(PeopleSearch(user_id=row['id'], document=_document(row)))
+        if len(batch) >= 500:
+            PeopleSearch.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    PeopleSearch.objects.bulk_create(batch)
+    return count + len(batch)
+
+
+def _has_index():
+    """Whether the migration managed to create the full-text index on this database"""
+    global _index_available
+    if _index_available is None:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            else:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _index_available = cursor.fetchone() is not None
+    return _index_available
+
+
+def _like_escape(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _indexed_search(terms, query):
+    """
+        (FROM ... WHERE sql, params, ORDER BY sql, params) matching every term through the
+        full-text index, or None when the plain icontains scan has to be used.
+    """
+    if not all(len(term) >= 3 for term in terms):
+        return None
+
+    if connection.vendor == 'sqlite' and _has_index():
+        match = ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return (
+            f"FROM {FTS_TABLE} f JOIN people_search s ON s.id = f.rowid WHERE {FTS_TABLE} MATCH %s",
+            [match], f"bm25({FTS_TABLE})", [],
+        )
+
+    if connection.vendor == 'postgresql' and _has_index():
+        conditions = ' AND '.join(["s.document ILIKE %s"] * len(terms))
+        return (
+            f"FROM people_search s WHERE {conditions}",
+            [f"%{_like_escape(term)}%" for term in terms], "word_similarity(%s, s.document) DESC", [query],
+        )
+
+    return None
+
+
+def _scanned_entries(terms):
+    entries = PeopleSearch.objects.all()
+    for term in terms:
+        entries = entries.filter(document__icontains=term)
+    return entries
+
+
+def search_people(query, limit=SEARCH_LIMIT, within=None):
+    """
+        User ids whose document contains every whitespace-separated term of `query`, best
+        match first. `within` (a queryset of user ids) restricts the search before the limit.
+    """
+    terms = query.split()
+    if not terms:
+        return []
+
+    search = _indexed_search(terms, query)
+    if search is None:
+        entries = _scanned_entries(terms)
+        if within is not None:
+            entries = entries.filter(user_id__in=within)
+        return list(entries.values_list('user_id', flat=True)[:limit])
+
+    sql, params, order, order_params = search
+    if within is not None:
+        within_sql, within_params = within.query.sql_with_params()
+        sql += f" AND s.user_id IN ({within_sql})"
+        params = params + list(within_params)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT s.user_id {sql} ORDER BY {order} LIMIT %s", params + order_params + [limit])
+        user_field = PeopleSearch._meta.get_field('user')
+        return [user_field.to_python(row[0]) for row in cursor.fetchall()]
+
+
+def _matching_user_ids(terms, query):
+    """Every matching user id as a subquery, for an __in filter"""
+    search = _indexed_search(terms, query)
+    if search is None:
+        return _scanned_entries(terms).values('user_id')
+    sql, params, _, _ = search
+    return RawSQL(f"SELECT s.user_id {sql}", params)
+
+
+def filter_by_search(queryset, query, user_field='id'):
+    """
+        Restrict a queryset of users (or of profiles, user_field='user_id') to every match
+        of `query`, annotated with search_rank for ordering: the best SEARCH_LIMIT matches
+        within the queryset rank 0, 1, 2, ..., the rest share the rank after them.
+    """
+    terms = query.split()
+    if not terms:
+        return queryset.none().annotate(search_rank=Value(0, output_field=IntegerField()))
+
+    ranked = search_people(query, within=queryset.order_by().values(user_field))
+    return queryset.filter(**{f"{user_field}__in": _matching_user_ids(terms, query)}).annotate(search_rank=Case(
+        *(When(**{user_field: user_id}, then=Value(rank)) for rank, user_id in enumerate(ranked)),
+        default=Value(len(ranked)),
+        output_field=IntegerField(),
+    ))
@@ -0,0 +1,264 @@
+"""
+    Bulk student enrollment from a CSV/XLSX file.
+
+    The whole sheet is validated first: existing emails are looked up with one IN query
+    per EMAIL_LOOKUP_BATCH addresses and the student IDs of all valid rows are reserved as
+    one block. Passwords are hashed in a process pool (PBKDF2 dominates the cost of an
+    enrollment), then users and profiles are bulk-inserted chunk by chunk. bulk_create
+    bypasses the model signals, so the counters, workload rows, search documents and
+    caches they maintain are refreshed here explicitly.
+"""
+import os
+from collections import Counter
+from datetime import date, datetime
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from accounts.models import User, StudentProfile
+from academics.models import ClassLevel
+from academics.utils.enrollment_counts import adjust_class_counts
+from academics.utils.result_import import ErrorReport
+from academics.utils.spreadsheet import iter_rows
+from academics.utils.teacher_workload import refresh_workload_for_classes
+from core.activity import record_students_enrolled
+from core.process_pool import process_pool
+from .dashboard_stats import invalidate_dashboard_stats
+from .generateID import STUDENT_PREFIX, reserve_ids
+from .people_search import index_users
+from .typeahead import invalidate_index
+
+
+DEFAULT_PASSWORD = 'changeme123'   # Same default as single registrations
+DEFAULT_CHUNK_SIZE = 500
+EMAIL_LOOKUP_BATCH = 1000
+POOL_THRESHOLD = 20   # Fewer passwords than this are hashed in-process
+
+REPORT_FIELDS = ['first_name', 'last_name', 'email', 'class']
+PROFILE_FIELDS = ['parent_full_name', 'parent_phone', 'parent_email', 'parent_address', 'emergency_contact_relation']
+GENDERS = {'m': 'M', 'male': 'M', 'f': 'F', 'female': 'F'}
+
+
+def _text(row, key):
+    value = row.get(key)
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)   # Spreadsheet cells turn phone numbers into floats
+    return str(value).strip()
+
+
+def _parse_date(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError("Date of birth must be YYYY-MM-DD.")
+
+
+def _class_lookup():
+    """Lowercased class name and str(id) -> class id"""
+    lookup = {}
+    for class_id, name in ClassLevel.objects.filter(is_active=True).values_list('id', 'name'):
+        lookup[name.strip().lower()] = class_id
+        lookup[str(class_id)] = class_id
+    return lookup
+
+
+def _existing_emails(emails):
+    """The lowercased addresses among `emails` (lowercased) that a user already has, in any case"""
+    emails = list(emails)
+    existing = set()
+    for start in range(0, len(emails), EMAIL_LOOKUP_BATCH):
+        existing.update(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=emails[start:start + EMAIL_LOOKUP_BATCH])
+            .values_list('email_lower', flat=True)
+        )
+    return existing
+
+
+def _validate_fields(model, values):
+    """
+        Run the model field validators (max_length, phone_regex, choices...) that
+        bulk_create would skip; raises ValueError naming the first bad field
+    """
+    for name, value in values.items():
+        field = model._meta.get_field(name)
+        try:
+            field.clean(value, None)
+        except ValidationError as e:
+            raise ValueError(f"{str(field.verbose_name).capitalize()}: {' '.join(e.messages)}")
+
+
+def _parse_row(row, classes):
+    """Model field values for one row; raises ValueError with a readable message"""
+    first_name = _text(row, 'first_name')
+    last_name = _text(row, 'last_name')
+    email = _text(row, 'email')
+    if not first_name or not last_name or not email:
+        raise ValueError("First name, last name, and email are required.")
+
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError("Invalid email address.")
+
+    class_name = _text(row, 'class') or _text(row, 'current_class') or _text(row, 'class_level')
+    class_id = None
+    if class_name:
+        class_id = classes.get(class_name.lower())
+        if class_id is None:
+            raise ValueError(f"Unknown class '{class_name}'.")
+
+    gender = _text(row, 'gender')
+    if gender:
+        gender = GENDERS.get(gender.lower())
+        if gender is None:
+            raise ValueError("Gender must be M or F.")
+
+    user_fields = {
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': email,
+        'phone_number': _text(row, 'phone_number') or None,
+        'gender': gender or None,
+        'date_of_birth': _parse_date(row.get('date_of_birth')),
+    }
+    profile_fields = {field: _text(row, field) or None for field in PROFILE_FIELDS}
+    _validate_fields(User, user_fields)
+    _validate_fields(StudentProfile, profile_fields)
+
+    return {
+        **user_fields,
+        'password': _text(row, 'password') or DEFAULT_PASSWORD,
+        'current_class_id': class_id,
+        **profile_fields,
+    }
+
+
+def hash_passwords(passwords, workers=None):
+    """make_password for each password, spread over a process pool for large batches"""
+    if len(passwords) < POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(passwords) // POOL_THRESHOLD))
+    with process_pool(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def _write_chunk(entries):
+    """Insert one chunk of (student_id, hashed password, fields) in a single transaction"""
+    users = []
+    profiles = []
+    for student_id, password, fields in entries:
+        user = User(
+            username=student_id,
+            password=password,
+            role='student',
+            **{field: fields[field] for field in (
+                'first_name', 'last_name', 'email', 'phone_number', 'gender', 'date_of_birth'
+            )},
+        )
+        users.append(user)
+        profiles.append(StudentProfile(
+            user=user,
+            student_id=student_id,
+            current_class_id=fields['current_class_id'],
+            **{field: fields[field] for field in PROFILE_FIELDS},
+        ))
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        StudentProfile.objects.bulk_create(profiles)
+        adjust_class_counts(Counter(
+            profile.current_class_id for profile in profiles if profile.current_class_id
+        ))
+    index_users(user.id for user in users)
+
+
+def import_students(file_obj, filename, created_by=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, progress=None):
+    """
+        Enroll the students listed in a CSV/XLSX file.
+
+        Expected columns: first_name, last_name, email and optionally phone_number, gender,
+        date_of_birth, class (name or id), password and the parent/emergency contact fields.
+        Rows without a password get DEFAULT_PASSWORD. Rejected rows go to a downloadable
+        error report. progress, if given, is called with the running summary as work proceeds.
+    """
+    classes = _class_lookup()
+    summary = {'total_rows': 0, 'created': 0, 'failed': 0, 'error_report': None}
+    report = ErrorReport(fields=REPORT_FIELDS)
+
+    def reject(line_number, row, error):
+        report.add(line_number, row, error)
+        summary['failed'] += 1
+
+    try:
+        candidates = []
+        seen_emails = set()
+        for line_number, row in iter_rows(file_obj, filename):
+            summary['total_rows'] += 1
+            try:
+                fields = _parse_row(row, classes)
+            except ValueError as e:
+                reject(line_number, row, str(e))
+                continue
+
+            email = fields['email'].lower()
+            if email in seen_emails:
+                reject(line_number, row, "Duplicate email in file.")
+                continue
+            seen_emails.add(email)
+            candidates.append((line_number, row, fields))
+
+        existing = _existing_emails({fields['email'].lower() for _, _, fields in candidates})
+        valid = []
+        for line_number, row, fields in candidates:
+            if fields['email'].lower() in existing:
+                reject(line_number, row, "A user with this email already exists.")
+            else:
+                valid.append((line_number, row, fields))
+
+        if progress is not None:
+            progress(summary)
+
+        if valid:
+            student_ids = reserve_ids(STUDENT_PREFIX, len(valid))
+            passwords = hash_passwords([fields['password'] for _, _, fields in valid], workers=workers)
+
+            class_ids = set()
+            for start in range(0, len(valid), chunk_size):
+                chunk = valid[start:start + chunk_size]
+                entries = [
+                    (student_ids[start + offset], passwords[start + offset], fields)
+                    for offset, (_, _, fields) in enumerate(chunk)
+                ]
+                try:
+                    _write_chunk(entries)
+                except Exception as e:
+                    for line_number, row, _ in chunk:
+                        reject(line_number, row, f"Could not save: {str(e)}")
+                    continue
+
+                summary['created'] += len(chunk)
+                class_ids.update(fields['current_class_id'] for _, _, fields in chunk)
+                if progress is not None:
+                    progress(summary)
+
+            if summary['created']:
+                refresh_workload_for_classes(class_ids)
+                invalidate_index('student')
+                invalidate_dashboard_stats()
+                record_students_enrolled(summary['created'], actor=created_by, details=f"Imported from {filename}")
+    finally:
+        report.close()
+
+    summary['error_report'] = report.report_id
+    return summary
@@ -0,0 +1,138 @@
+"""
+    In-memory prefix index for the student and teacher pickers.
+
+    Each role keeps a sorted list of (lowercased key, position) pairs, one per first name,
+    last name, full name and ID of every active person, so a lookup is a bisect to the
+    first key with the prefix followed by a short scan, with no database query at all.
+    Indexes are built on first use (or by warm_indexes() at startup) and dropped by the
+    accounts signals when a person changes, in other worker processes through a shared
+    version counter per role. They are rebuilt anyway after TYPEAHEAD_MAX_AGE seconds,
+    which covers bulk updates that bypass the signals.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from django.db import DatabaseError
+from accounts.models import User
+from core.cache import VersionWatch, bump
+
+logger = logging.getLogger(__name__)
+
+TYPEAHEAD_MAX_AGE = 300   # Seconds
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+ROLES = {
+    'student': {
+        'filter': {'role': 'student', 'is_active': True, 'student_profile__is_active': True},
+        'code': 'student_profile__student_id',
+        'class_level': 'student_profile__current_class_id',
+    },
+    'teacher': {
+        'filter': {'role': 'teacher', 'is_active': True, 'teacher_profile__is_active': True},
+        'code': 'teacher_profile__employee_id',
+        'class_level': None,
+    },
+}
+
+
+class PrefixIndex:
+    """Immutable once built; a refresh swaps in a new instance"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.built_at = time.monotonic()
+        keys = []
+        for position, entry in enumerate(entries):
+            for key in {entry['first_name'], entry['last_name'], entry['name'], entry['code']}:
+                if key:
+                    keys.append((key.lower(), position))
+        keys.sort()
+        self.keys = keys
+
+    def search(self, prefix, limit=DEFAULT_LIMIT, class_level_id=None):
+        """Entries with a key starting with `prefix`, in key order, each at most once"""
+        prefix = prefix.lower()
+        matches = []
+        seen = set()
+        for index in range(bisect_left(self.keys, (prefix,)), len(self.keys)):
+            key, position = self.keys[index]
+            if not key.startswith(prefix):
+                break
+            if position in seen:
+                continue
+            entry = self.entries[position]
+            if class_level_id is not None and entry.get('class_level_id') != class_level_id:
+                continue
+            seen.add(position)
+            matches.append(entry)
+            if len(matches) >= limit:
+                break
+        return matches
+
+
+_indexes = {}
+_watches = {role: VersionWatch(f"typeahead.{role}") for role in ROLES}
+_lock = threading.Lock()
+
+
+def _load_entries(role):
+    config = ROLES[role]
+    fields = ['id', 'first_name', 'last_name', config['code']]
+    if config['class_level']:
+        fields.append(config['class_level'])
+
+    entries = []
+    for row in User.objects.filter(**config['filter']).values(*fields).order_by('first_name', 'last_name'):
+        entry = {
+            'id': str(row['id']),
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'name': f"{row['first_name']} {row['last_name']}".strip(),
+            'code': row[config['code']] or '',
+        }
+        if config['class_level']:
+            entry['class_level_id'] = row[config['class_level']]
+        entries.append(entry)
+    return entries
+
+
+def _stale(index):
+    return index is None or time.monotonic() - index.built_at > TYPEAHEAD_MAX_AGE
+
+
+def get_index(role):
+    """The current index for `role`, rebuilt when missing, invalidated or older than TYPEAHEAD_MAX_AGE"""
+    if _watches[role].changed():
+        _indexes.pop(role, None)
+    index = _indexes.get(role)
+    if _stale(index):
+        with _lock:
+            index = _indexes.get(role)
+            if _stale(index):
+                _watches[role].mark()
+                index = PrefixIndex(_load_entries(role))
+                _indexes[role] = index
+    return index
+
+
+def typeahead(role, prefix, limit=DEFAULT_LIMIT, class_level_id=None):
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    return get_index(role).search(prefix, limit, class_level_id)
+
+
+def invalidate_index(role=None):
+    """Drop the index of `role` (every role when None) in every process; the next lookup rebuilds it"""
+    for name in ([role] if role else list(ROLES)):
+        _indexes.pop(name, None)
+        bump(f"typeahead.{name}")
+
+
+def warm_indexes():
+    """Build every index up front so the first keystroke does not pay for it"""
+    for role in ROLES:
+        try:
+            get_index(role)
+        except DatabaseError:
+            logger.warning("Could not warm the %s typeahead index", role, exc_info=True)
@@ -2,29 +2,43 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import login, logout, authenticate, update_session_auth_hash
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, FileResponse, Http404
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.core.paginator import Paginator
 import json
+import math
+import os
+import uuid
+from django.conf import settings
 from .models import User, TeacherProfile, StudentProfile, StaffProfile
-from academics.models import Subject, ClassLevel, Term, Result, AcademicYear, ClassSubject
-from django.utils import timezone
-from datetime import timedelta
+from academics.models import Subject, ClassLevel, Term, Result, AcademicYear, ClassSubject, TermPosition
 from django.db import transaction
 from .utils.generateID import generate_teacher_id, generate_student_id, generate_staff_id
-from core.views import get_recent_activities, get_teacher_workload
-from django.db.models import Case, When, Q, Count, Avg, Max
-from django.db import models, IntegrityError
+from django.db.models import Q, Count, Avg, Max
+from django.db import IntegrityError
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
-from django.utils import timezone
 from .utils.redirect_to_dashboard import redirect_to_dashboard
-from .utils.cache_failed_attempt import cache_failed_attempt
 from .utils.get_client_ip import get_client_ip
+from .utils.dashboard_stats import get_dashboard_stats
+from .utils.people_search import filter_by_search
+from .utils.student_import import import_students
+from academics.utils.result_import import error_report_path
+from academics.utils.spreadsheet import SUPPORTED_EXTENSIONS
+from core import ratelimit
+from core.jobs import enqueue
+from core.pagination import DEFAULT_PAGE_SIZE, InvalidCursor, cursor_paginate
 
 
-LOCKOUT_THRESHOLD = 5      # Max failed attempts
-LOCKOUT_TIMEOUT = 900      # 15 minutes in seconds
+# Token buckets (capacity, seconds to refill completely), taken before any password is hashed
+LOGIN_IP_LIMIT = (20, 900)     # Generous: a school network puts many users behind one IP
+LOGIN_USER_LIMIT = (5, 900)
+
+
+def _login_locked_out(request, decision):
+    minutes = max(1, math.ceil(decision.retry_after / 60))
+    messages.error(request, f'Too many failed login attempts. Please try again in {minutes} minute{"s" if minutes > 1 else ""}.')
+    return render(request, 'accounts/login.html', status=429)
 
 
 @require_http_methods(["GET", "POST"])
@@ -34,13 +48,6 @@ def login_view(request):
     if request.user.is_authenticated:
         return redirect_to_dashboard(request.user)
 
-    ip_address = get_client_ip(request)
-    failed_attempts = cache.get(f'failed_login_attempts_{ip_address}', 0)
-
-    if failed_attempts >= LOCKOUT_THRESHOLD:
-        messages.error(request, 'Too many failed login attempts. Please try again in 15 minutes.')
-        return render(request, 'accounts/login.html')
-
     if request.method == 'POST':
         username = request.POST.get('username', '').strip()
         password = request.POST.get('password', '')
@@ -49,10 +56,20 @@ def login_view(request):
             messages.error(request, 'Please enter both username and password.')
             return render(request, 'accounts/login.html')
 
+        # Every attempt pays up front, so parallel guesses cannot slip past the limit
+        ip_key = f'login:ip:{get_client_ip(request)}'
+        decision = ratelimit.take(ip_key, *LOGIN_IP_LIMIT)
+        if not decision.allowed:
+            return _login_locked_out(request, decision)
+
+        user_key = f'login:user:{username.lower()}'
+        decision = ratelimit.take(user_key, *LOGIN_USER_LIMIT)
+        if not decision.allowed:
+            return _login_locked_out(request, decision)
+
         user_obj = User.objects.filter(username=username).first()
 
         if not user_obj:
-            cache_failed_attempt(ip_address)
             messages.error(request, 'Invalid username or password.')
             return render(request, 'accounts/login.html')
 
@@ -63,13 +80,12 @@ def login_view(request):
         user = authenticate(request, username=username, password=password)
 
         if user is None:
-            attempts = cache_failed_attempt(ip_address)
-            remaining = max(0, LOCKOUT_THRESHOLD - attempts)
-            messages.error(request, f'Invalid username or password. {remaining} attempts remaining.')
+            messages.error(request, f'Invalid username or password. {int(decision.remaining)} attempts remaining.')
             return render(request, 'accounts/login.html')
 
         # Successful login
-        cache.delete(f'failed_login_attempts_{ip_address}')
+        ratelimit.reset(user_key)
+        ratelimit.refund(ip_key, LOGIN_IP_LIMIT[0])
         login(request, user)
         messages.success(request, f'Welcome back, {user.get_full_name() or user.username}!')
         return redirect_to_dashboard(user)
@@ -89,6 +105,123 @@ def is_admin(user):
     return user.is_authenticated and user.role == 'admin'
 
 
+STUDENT_IMPORT_ASYNC_THRESHOLD = 32 * 1024   # Larger enrollment files (a few hundred rows) go to the job worker
+
+# Keyset orderings for the user lists, each backed by an index ending in the primary key
+LIST_ORDERING = ('-created_at', '-id')
+STAFF_LIST_ORDERING = ('-id',)
+SEARCH_ORDERING = ('search_rank', '-pk')   # filter_by_search results, best match first
+
+
+def _ordering_for(queryset, ordering):
+    """Searched querysets page in rank order, the primary key breaking ties between equal ranks"""
+    return SEARCH_ORDERING if 'search_rank' in queryset.query.annotations else ordering
+
+
+def _list_page(request, queryset, ordering=LIST_ORDERING, per_page=20):
+    """
+        Page of a list view: keyset pagination when the request has a `cursor` parameter
+        (empty for the first page), otherwise the numbered Paginator page.
+        Returns (page, is_cursor_page, other GET parameters urlencoded for pager links).
+    """
+    ordering = _ordering_for(queryset, ordering)
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page', None)
+
+    if 'cursor' not in request.GET:
+        return Paginator(queryset, per_page).get_page(request.GET.get('page')), False, params.urlencode()
+
+    try:
+        page = cursor_paginate(queryset, request.GET['cursor'], per_page, ordering, with_count=True)
+    except InvalidCursor:
+        page = cursor_paginate(queryset, None, per_page, ordering, with_count=True)
+    return page, True, params.urlencode()
+
+
+def _api_page(request, queryset, ordering=LIST_ORDERING):
+    """(CursorPage, None) for a JSON list request, or (None, 400 response) for a bad cursor"""
+    try:
+        page = cursor_paginate(
+            queryset,
+            request.GET.get('cursor'),
+            request.GET.get('per_page', DEFAULT_PAGE_SIZE),
+            _ordering_for(queryset, ordering),
+            with_count=request.GET.get('count') in ('1', 'true'),
+        )
+    except (InvalidCursor, ValueError):
+        return None, JsonResponse({'success': False, 'error': "Invalid cursor or per_page."}, status=400)
+    return page, None
+
+
+def _filter_users(params):
+    users = User.objects.all()
+
+    role = params.get('role')
+    if role:
+        users = users.filter(role=role)
+
+    search = params.get('search')
+    if search:
+        users = filter_by_search(users, search).order_by(*SEARCH_ORDERING)
+    return users
+
+
+def _filter_teachers(params):
+    teachers = TeacherProfile.objects.select_related('user')
+
+    emp_type = params.get('employment_type')
+    if emp_type:
+        teachers = teachers.filter(employment_type=emp_type)
+
+    status = params.get('status')
+    if status == 'active':
+        teachers = teachers.filter(is_active=True)
+    elif status == 'inactive':
+        teachers = teachers.filter(is_active=False)
+
+    search = params.get('search')
+    if search:
+        teachers = filter_by_search(teachers, search, 'user_id').order_by(*SEARCH_ORDERING)
+    return teachers
+
+
+def _filter_students(params):
+    students = StudentProfile.objects.select_related('user', 'current_class')
+
+    class_id = params.get('class')
+    if class_id:
+        students = students.filter(current_class_id=class_id)
+
+    status = params.get('status')
+    if status == 'active':
+        students = students.filter(is_active=True)
+    elif status == 'inactive':
+        students = students.filter(is_active=False)
+
+    search = params.get('search')
+    if search:
+        students = filter_by_search(students, search, 'user_id').order_by(*SEARCH_ORDERING)
+    return students
+
+
+def _filter_admins(params):
+    admins = StaffProfile.objects.select_related('user').filter(user__role='admin')
+
+    staff_type = params.get('staff_type')
+    if staff_type:
+        admins = admins.filter(staff_type=staff_type)
+
+    is_active = params.get('is_active')
+    if is_active:
+        admins = admins.filter(user__is_active=is_active.lower() == 'true')
+
+    search = params.get('search')
+    if search:
+        admins = filter_by_search(admins, search, 'user_id').order_by(*SEARCH_ORDERING)
+    return admins
+
+
 @login_required
 @user_passes_test(is_admin)
 @require_http_methods(["POST"])
@@ -172,34 +305,17 @@ def register_teacher(request):
 @login_required
 def user_list(request):
     """List all users with filtering and search"""
-    users = User.objects.select_related(
+    users = _filter_users(request.GET).select_related(
         'teacher_profile', 'student_profile', 'staff_profile'
-    ).all()
-    
-    # Filter by role
-    role = request.GET.get('role')
-    if role:
-        users = users.filter(role=role)
-    
-    # Search
-    search = request.GET.get('search')
-    if search:
-        users = users.filter(
-            Q(username__icontains=search) |
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search) |
-            Q(email__icontains=search)
-        )
-    
-    # Pagination
-    paginator = Paginator(users, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    )
+    page_obj, cursor_mode, page_query = _list_page(request, users)
     
     context = {
         'page_obj': page_obj,
-        'role': role,
-        'search': search,
+        'cursor_mode': cursor_mode,
+        'page_query': page_query,
+        'role': request.GET.get('role'),
+        'search': request.GET.get('search'),
     }
     return render(request, 'accounts/user_list.html', context)
 
@@ -306,53 +422,33 @@ def change_password(request, user_id):
 @login_required
 def teacher_list(request):
     """List all teachers with filtering and pagination"""
-    teachers = TeacherProfile.objects.select_related('user').prefetch_related(
+    teachers = _filter_teachers(request.GET).prefetch_related(
         'subjects',
         'user__class_levels_taught'
     )
     
-
-    emp_type = request.GET.get('employment_type')
-    if emp_type:
-        teachers = teachers.filter(employment_type=emp_type)
-    
-
-    status = request.GET.get('status')
-    if status == 'active':
-        teachers = teachers.filter(is_active=True)
-    elif status == 'inactive':
-        teachers = teachers.filter(is_active=False)
-    
-    search = request.GET.get('search')
-    if search:
-        teachers = teachers.filter(
-            Q(user__first_name__icontains=search) |
-            Q(user__last_name__icontains=search) |
-            Q(employee_id__icontains=search) |
-            Q(user__email__icontains=search)
-        )
-    
-    # Get counts for stats
-    total_teachers = teachers.count()
-    full_time_teachers = teachers.filter(employment_type='full_time').count()
-    part_time_teachers = teachers.filter(employment_type='part_time').count()
-    contract_teachers = teachers.filter(employment_type='contract').count()
+    # Counts for stats in one pass
+    counts = teachers.aggregate(
+        total=Count('id'),
+        full_time=Count('id', filter=Q(employment_type='full_time')),
+        part_time=Count('id', filter=Q(employment_type='part_time')),
+        contract=Count('id', filter=Q(employment_type='contract')),
+    )
     
-    # Pagination
-    paginator = Paginator(teachers, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj, cursor_mode, page_query = _list_page(request, teachers)
     
     context = {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'page_query': page_query,
         'employment_types': TeacherProfile.EMPLOYMENT_TYPE_CHOICES,
-        'emp_type': emp_type,
-        'search': search,
-        'status': status,
-        'total_teachers': total_teachers,
-        'full_time_teachers': full_time_teachers,
-        'part_time_teachers': part_time_teachers,
-        'contract_teachers': contract_teachers,
+        'emp_type': request.GET.get('employment_type'),
+        'search': request.GET.get('search'),
+        'status': request.GET.get('status'),
+        'total_teachers': counts['total'],
+        'full_time_teachers': counts['full_time'],
+        'part_time_teachers': counts['part_time'],
+        'contract_teachers': counts['contract'],
     }
     return render(request, 'pages/admin_dashboard/teachers.html', {'context': context})
 
@@ -645,48 +741,29 @@ def teacher_update(request, teacher_id):
 @login_required
 def student_list(request):
     """List all students with filtering and pagination"""
-    students = StudentProfile.objects.select_related('user', 'current_class')
+    students = _filter_students(request.GET)
     
-    class_id = request.GET.get('class')
-    if class_id:
-        students = students.filter(current_class_id=class_id)
-    
-    status = request.GET.get('status')
-    if status == 'active':
-        students = students.filter(is_active=True)
-    elif status == 'inactive':
-        students = students.filter(is_active=False)
-    
-    search = request.GET.get('search')
-    if search:
-        students = students.filter(
-            Q(user__first_name__icontains=search) |
-            Q(user__last_name__icontains=search) |
-            Q(student_id__icontains=search)
-        )
-    
-    total_students = students.count()
-    active_students = students.filter(is_active=True).count()
-    inactive_students = students.filter(is_active=False).count()
+    counts = students.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        inactive=Count('id', filter=Q(is_active=False)),
+    )
     
-    class_counts = ClassLevel.objects.annotate(
-        student_count=Count('students')
-    ).values('name', 'student_count')
+    class_counts = ClassLevel.objects.values('name', 'student_count')
     
-
-    paginator = Paginator(students, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj, cursor_mode, page_query = _list_page(request, students)
     
     context = {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'page_query': page_query,
         'classes': ClassLevel.objects.all(),
-        'class_id': class_id,
-        'status': status,
-        'search': search,
-        'total_students': total_students,
-        'active_students': active_students,
-        'inactive_students': inactive_students,
+        'class_id': request.GET.get('class'),
+        'status': request.GET.get('status'),
+        'search': request.GET.get('search'),
+        'total_students': counts['total'],
+        'active_students': counts['active'],
+        'inactive_students': counts['inactive'],
         'class_counts': list(class_counts),
     }
     return render(request, 'pages/admin_dashboard/students.html', {'context': context})
@@ -790,6 +867,76 @@ def student_create(request):
     
 
 
+@login_required
+@user_passes_test(is_admin)
+@require_http_methods(["POST"])
+def student_import(request):
+    """Enroll many students at once from an uploaded CSV or XLSX file"""
+    uploaded_file = request.FILES.get("file")
+    if not uploaded_file:
+        return JsonResponse({'success': False, 'error': "A CSV or XLSX file is required."}, status=400)
+
+    if not uploaded_file.name.lower().endswith(SUPPORTED_EXTENSIONS):
+        return JsonResponse({
+            'success': False,
+            'error': f"Unsupported file type. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}"
+        }, status=400)
+
+    if uploaded_file.size > STUDENT_IMPORT_ASYNC_THRESHOLD or request.POST.get("async") == "1":
+        # Hashing the passwords of a large class takes minutes, leave it to the job worker
+        extension = os.path.splitext(uploaded_file.name)[1].lower()
+        upload_dir = os.path.join(settings.MEDIA_ROOT, 'job_uploads')
+        os.makedirs(upload_dir, exist_ok=True)
+        path = os.path.join(upload_dir, f"{uuid.uuid4()}{extension}")
+
+        with open(path, 'wb') as destination:
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+
+        job = enqueue('import_students', {
+            'path': path,
+            'filename': uploaded_file.name,
+            'created_by': str(request.user.id),
+        }, user=request.user)
+
+        return JsonResponse({
+            'success': True,
+            'job_id': str(job.id),
+            'status_url': reverse('job_status', args=[job.id]),
+            'message': "Enrollment queued. Check the job status for progress."
+        }, status=202)
+
+    try:
+        summary = import_students(uploaded_file, uploaded_file.name, created_by=request.user)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f"Could not read file: {str(e)}"
+        }, status=400)
+
+    error_report_url = None
+    if summary['error_report']:
+        error_report_url = reverse('download_enrollment_errors', args=[summary['error_report']])
+
+    return JsonResponse({
+        'success': True,
+        **summary,
+        'error_report_url': error_report_url,
+        'message': f"{summary['created']} students enrolled, {summary['failed']} rejected."
+    })
+
+
+@login_required
+@user_passes_test(is_admin)
+def download_enrollment_errors(request, report_id):
+    """Download the rejected rows of a student import as CSV"""
+    path = error_report_path(report_id)
+    if not os.path.exists(path):
+        raise Http404
+
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename="student_import_errors.csv", content_type='text/csv')
+
+
 @login_required
 @require_http_methods(["GET", "POST"])
 def student_update(request, student_id):
@@ -859,24 +1006,13 @@ def staff_create(request):
 
 @login_required
 def user_api_list(request):
-    """JSON API for user list"""
-    users = User.objects.all()
-    
-    role = request.GET.get('role')
-    if role:
-        users = users.filter(role=role)
-    
-    search = request.GET.get('search')
-    if search:
-        users = users.filter(
-            Q(username__icontains=search) |
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search) |
-            Q(email__icontains=search)
-        )
+    """JSON API for user list, keyset paginated (cursor, per_page, count=1)"""
+    page, error = _api_page(request, _filter_users(request.GET))
+    if error:
+        return error
     
     data = []
-    for user in users[:100]:  # Limit to 100 results
+    for user in page:
         data.append({
             'id': str(user.id),
             'username': user.username,
@@ -886,7 +1022,81 @@ def user_api_list(request):
             'is_active': user.is_active,
         })
     
-    return JsonResponse({'users': data})
+    return JsonResponse({'users': data, **page.as_dict()})
+
+
+@login_required
+def teacher_api_list(request):
+    """JSON API for the teacher list, same filters as teacher_list, keyset paginated"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': "Only admins can list teachers."}, status=403)
+
+    page, error = _api_page(request, _filter_teachers(request.GET))
+    if error:
+        return error
+
+    teachers = [
+        {
+            'id': teacher.id,
+            'user_id': str(teacher.user_id),
+            'employee_id': teacher.employee_id,
+            'full_name': teacher.user.get_full_name(),
+            'email': teacher.user.email,
+            'employment_type': teacher.employment_type,
+            'is_active': teacher.is_active,
+        }
+        for teacher in page
+    ]
+    return JsonResponse({'success': True, 'teachers': teachers, **page.as_dict()})
+
+
+@login_required
+def student_api_list(request):
+    """JSON API for the student list, same filters as student_list, keyset paginated"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': "Only admins can list students."}, status=403)
+
+    page, error = _api_page(request, _filter_students(request.GET))
+    if error:
+        return error
+
+    students = [
+        {
+            'id': student.id,
+            'user_id': str(student.user_id),
+            'student_id': student.student_id,
+            'full_name': student.user.get_full_name(),
+            'class': student.current_class.name if student.current_class else None,
+            'is_active': student.is_active,
+        }
+        for student in page
+    ]
+    return JsonResponse({'success': True, 'students': students, **page.as_dict()})
+
+
+@login_required
+def admin_api_list(request):
+    """JSON API for the admin staff list, same filters as admin_list, keyset paginated"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': "Only admins can list admin staff."}, status=403)
+
+    page, error = _api_page(request, _filter_admins(request.GET), STAFF_LIST_ORDERING)
+    if error:
+        return error
+
+    admins = [
+        {
+            'id': admin.id,
+            'user_id': str(admin.user_id),
+            'staff_id': admin.staff_id,
+            'full_name': admin.user.get_full_name(),
+            'email': admin.user.email,
+            'staff_type': admin.staff_type,
+            'is_active': admin.user.is_active,
+        }
+        for admin in page
+    ]
+    return JsonResponse({'success': True, 'admins': admins, **page.as_dict()})
 
 
 @login_required
@@ -914,101 +1124,17 @@ def user_api_detail(request, user_id):
 @login_required
 def admin_dashboard(request):
     """Admin dashboard with comprehensive statistics and analytics"""
-    
-    total_users = User.objects.count()
-    total_teachers = User.objects.filter(role='teacher').count()
-    total_students = User.objects.filter(role='student').count()
-    total_staff = User.objects.filter(role='admin').count()
-    
-    active_students = StudentProfile.objects.filter(is_active=True).count()
-    active_teachers = TeacherProfile.objects.filter(is_active=True).count()
-    
-    total_subjects = Subject.objects.filter(is_active=True).count()
-    total_classes = ClassLevel.objects.filter(is_active=True).count()
-    
-    current_term = Term.objects.filter(is_current=True).first()
-    recent_results = Result.objects.filter(date_uploaded__gte=timezone.now()-timedelta(days=30)).count()
-    
-    avg_score = Result.objects.aggregate(avg_score=Avg('score'))['avg_score'] or 0
-    
-    recent_students = StudentProfile.objects.filter(
-        created_at__gte=timezone.now()-timedelta(days=30)
-    ).count()
-    
-    class_distribution = ClassLevel.objects.filter(is_active=True).annotate(
-        student_count=Count('students')
-    ).values('name', 'student_count').order_by('-student_count')
-    
-    teacher_employment = TeacherProfile.objects.values('employment_type').annotate(
-        count=Count('id')
-    )
-
-    top_students = []
-    if current_term:
-        top_students = Result.objects.filter(
-            term=current_term
-        ).values(
-            'student__id',
-            'student__first_name',
-            'student__last_name',
-            'student__student_profile__student_id',
-            'student__student_profile__current_class__name'
-        ).annotate(
-            avg_score=Avg('score')
-        ).order_by('-avg_score')[:5]
-    
-    subject_stats = Subject.objects.filter(
-        results__isnull=False
-    ).annotate(
-        student_count=Count('results__student', distinct=True),
-        avg_score=Avg('results__score'),
-        pass_rate=Avg(
-            Case(
-                When(results__score__gte=50, then=1),
-                default=0,
-                output_field=models.FloatField()
-            )
-        ) * 100
-    ).values('name', 'student_count', 'avg_score', 'pass_rate').order_by('-avg_score')[:4]
-    
-    # Teacher workload (based on assigned subjects)
-    # More detailed workload data
-    teacher_workload = get_teacher_workload()
-
-    for teacher in teacher_workload:
-        teacher['id'] = str(teacher['id'])
+    context = get_dashboard_stats()
+    return render(request, 'accounts/admin_dashboard.html', {'context': context})
 
-    recent_activities = get_recent_activities()
 
-    core_subjects = Subject.objects.filter(category='core', is_active=True).count()
-    elective_subjects = Subject.objects.filter(category='elective', is_active=True).count()
-    
-    context = {
-        'total_users': total_users,
-        'total_teachers': total_teachers,
-        'total_students': total_students,
-        'total_staff': total_staff,
-        'active_students': active_students,
-        'active_teachers': active_teachers,
-        'total_subjects': total_subjects,
-        'total_classes': total_classes,
-        
-        'recent_results': recent_results,
-        'avg_score': round(avg_score, 2),
-        'recent_students': recent_students,
-        'class_distribution': list(class_distribution),
-        'teacher_employment': list(teacher_employment),
-        'current_term': current_term,
-        
-        'top_students': list(top_students),
-        'subject_stats': list(subject_stats),
-        'teacher_workload': teacher_workload,
-        'recent_activities': recent_activities,
-        'core_subjects': core_subjects,
-        'elective_subjects': elective_subjects,
-    }
+@login_required
+def admin_dashboard_stats(request):
+    """Dashboard statistics as JSON, so widgets can refresh without reloading the page"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': "Only admins can view dashboard statistics."}, status=403)
 
-    return render(request, 'accounts/admin_dashboard.html', {'context': context})
+    return JsonResponse({'success': True, 'stats': get_dashboard_stats()})
 
 
 @login_required
@@ -1056,7 +1182,7 @@ def student_dashboard(request):
     
     results = Result.objects.filter(
         student=request.user,
-        is_published=False
+        is_published=True
     ).select_related('subject', 'class_level', 'term', 'term__academic_year')
     
     if academic_year_id:
@@ -1067,12 +1193,19 @@ def student_dashboard(request):
     academic_years = AcademicYear.objects.all().order_by('-start_date')
     terms = Term.objects.all().order_by('-academic_year', 'start_date')
     
+    # Class positions are stored when results are published
+    term_positions = {
+        position.term_id: position
+        for position in TermPosition.objects.filter(student=request.user)
+    }
+
     results_by_term = {}
     for result in results:
         term_key = f"{result.term.name} - {result.term.academic_year.name}"
         if term_key not in results_by_term:
             results_by_term[term_key] = {
                 'term': result.term,
+                'position': term_positions.get(result.term_id),
                 'results': []
             }
         results_by_term[term_key]['results'].append(result)
@@ -1211,7 +1344,6 @@ def my_classes(request):
             filter=Q(classsubject__teacher=request.user),
             distinct=True
         ),
-        student_count=Count('students', distinct=True)
     )
 
     context = {
@@ -1541,49 +1673,29 @@ def get_own_profile_data(request):
 @login_required
 def admin_list(request):
     """List all admin staff with filtering and pagination"""
-    # Get filter parameters
-    staff_type = request.GET.get('staff_type')
-    is_active = request.GET.get('is_active')
-    search = request.GET.get('search')
-    page = request.GET.get('page', 1)
+    admins = _filter_admins(request.GET)
     
-    # Start with all admin staff
-    admins = StaffProfile.objects.select_related('user').filter(user__role='admin')
-    
-    if staff_type:
-        admins = admins.filter(staff_type=staff_type)
-    
-    if is_active:
-        is_active_bool = is_active.lower() == 'true'
-        admins = admins.filter(user__is_active=is_active_bool)
-    
-    if search:
-        admins = admins.filter(
-            Q(user__first_name__icontains=search) |
-            Q(user__last_name__icontains=search) |
-            Q(user__email__icontains=search) |
-            Q(staff_id__icontains=search) |
-            Q(user__username__icontains=search)
-        )
-    
-    total_admins = StaffProfile.objects.filter(user__role='admin').count()
-    active_admins = StaffProfile.objects.filter(user__role='admin', user__is_active=True).count()
-    administrative_count = StaffProfile.objects.filter(user__role='admin', staff_type='administrative').count()
-    other_count = StaffProfile.objects.filter(user__role='admin', staff_type='other').count()
+    counts = StaffProfile.objects.filter(user__role='admin').aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(user__is_active=True)),
+        administrative=Count('id', filter=Q(staff_type='administrative')),
+        other=Count('id', filter=Q(staff_type='other')),
+    )
     
-    paginator = Paginator(admins, 20)  # 20 items per page
-    admins_page = paginator.get_page(page)
+    admins_page, cursor_mode, page_query = _list_page(request, admins, STAFF_LIST_ORDERING)
     
     context = {
         'admins': admins_page,
-        'total_admins': total_admins,
-        'active_admins': active_admins,
-        'administrative_count': administrative_count,
-        'other_count': other_count,
+        'cursor_mode': cursor_mode,
+        'page_query': page_query,
+        'total_admins': counts['total'],
+        'active_admins': counts['active'],
+        'administrative_count': counts['administrative'],
+        'other_count': counts['other'],
         'current_filters': {
-            'staff_type': staff_type,
-            'is_active': is_active,
-            'search': search,
+            'staff_type': request.GET.get('staff_type'),
+            'is_active': request.GET.get('is_active'),
+            'search': request.GET.get('search'),
         }
     }
     
@@ -0,0 +1,87 @@
+"""
+    Activity feed — events are appended to ActivityEvent as things happen and the feed
+    reads them back newest first, one indexed range scan per page.
+"""
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.timesince import timesince
+from .models import ActivityEvent
+
+
+# Dashboard icon and background colour per event type
+ACTIVITY_STYLES = {
+    'result_upload': ('bi-upload', '#dbeafe'),
+    'result_publish': ('bi-megaphone', '#fef3c7'),
+    'result_unpublish': ('bi-eye-slash', '#f1f5f9'),
+    'student_enrollment': ('bi-person-plus', '#d1fae5'),
+    'teacher_assignment': ('bi-person-badge', '#ede9fe'),
+}
+
+ACTIVITY_PAGE_SIZE = 20
+MAX_ACTIVITY_PAGE_SIZE = 100
+
+
+def record_activity(event_type, title, details='', actor=None):
+    """Append one event to the feed"""
+    return ActivityEvent.objects.create(
+        event_type=event_type,
+        title=title,
+        details=details[:255],
+        actor=actor,
+    )
+
+
+def record_results_published(count, publish, actor=None, details=''):
+    """Feed entry for a (bulk) publish or unpublish of `count` results"""
+    if not count:
+        return None
+    noun = 'result' if count == 1 else 'results'
+    return record_activity(
+        'result_publish' if publish else 'result_unpublish',
+        f"{count} {noun} {'published' if publish else 'unpublished'}",
+        details,
+        actor=actor,
+    )
+
+
+def record_students_enrolled(count, actor=None, details=''):
+    """Feed entry for a bulk enrollment of `count` students"""
+    if not count:
+        return None
+    return record_activity(
+        'student_enrollment',
+        f"{count} new {'student' if count == 1 else 'students'} enrolled",
+        details,
+        actor=actor,
+    )
+
+
+def activity_dict(event, now=None):
+    icon, color = ACTIVITY_STYLES.get(event.event_type, ('bi-info-circle', '#f1f5f9'))
+    return {
+        'id': event.id,
+        'type': event.event_type,
+        'title': event.title,
+        'details': event.details,
+        'time': timesince(event.created_at, now or timezone.now()) + " ago",
+        'created_at': event.created_at.isoformat(),
+        'icon': icon,
+        'color': color,
+    }
+
+
+def activity_page(before=None, limit=ACTIVITY_PAGE_SIZE, event_type=None):
+    """
+        Up to `limit` events older than the event with id `before` (newest first when None).
+        Returns (events, has_more).
+    """
+    events = ActivityEvent.objects.all()
+    if event_type:
+        events = events.filter(event_type=event_type)
+    if before:
+        cursor = ActivityEvent.objects.filter(id=before).values('created_at')[:1]
+        events = events.filter(Q(created_at__lt=cursor) | Q(created_at=cursor, id__lt=before))
+
+    # One extra row tells whether there is another page
+    rows = list(events.order_by('-created_at', '-id')[:limit + 1])
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,13 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+        SQLite backend whose transactions take the write lock when they start (BEGIN
+        IMMEDIATE). A plain BEGIN only asks for it at the first write, and SQLite fails
+        that request at once if another writer committed in between; an immediate
+        transaction instead waits in line for up to busy_timeout (see core.sqlite).
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -0,0 +1,138 @@
+"""
+    Shared cache helpers: namespaced, versioned keys.
+
+    Every namespace has a version counter in the shared cache, and the keys built for it
+    embed the current version: key('dashboard', 'stats') -> 'dashboard:v17:stats'.
+    bump('dashboard') invalidates every key of the namespace in O(1); the orphaned
+    entries simply age out. Every model has a namespace of its own ('academics.subject')
+    that core.signals bumps whenever an instance is saved or deleted, which is what
+    cached_query() results depend on. Bulk updates bypass signals; call bump() after them.
+
+    Process-local caches (compiled grading schemes, typeahead indexes) use a VersionWatch
+    to notice bumps made by other worker processes.
+"""
+import hashlib
+import time
+from functools import wraps
+from django.core.cache import cache
+from django.db import transaction
+
+
+DEFAULT_TIMEOUT = 300   # Seconds
+
+# High-churn models nothing is cached from; their saves don't bump a version
+UNVERSIONED_MODELS = {'sessions.session', 'admin.logentry', 'core.job', 'core.activityevent', 'core.ratelimitbucket'}
+
+_MISSING = object()
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def _new_version():
+    # Never reuse a number after the counter was evicted, keys of the old run may still exist
+    return int(time.time() * 1000)
+
+
+def versions(*namespaces):
+    """{namespace: current version} in one cache round trip"""
+    found = cache.get_many([_version_key(namespace) for namespace in namespaces])
+    result = {}
+    for namespace in namespaces:
+        value = found.get(_version_key(namespace))
+        if value is None:
+            value = _new_version()
+            if not cache.add(_version_key(namespace), value, timeout=None):
+                value = cache.get(_version_key(namespace), value)
+        result[namespace] = value
+    return result
+
+
+def version(namespace):
+    return versions(namespace)[namespace]
+
+
+def _increment(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), _new_version(), timeout=None)
+
+
+def bump(namespace):
+    """
+        Invalidate every key of `namespace`, in this and every other process, once the
+        current transaction commits (immediately outside one). Bumping earlier would let
+        another process cache the old committed rows under the new version.
+    """
+    transaction.on_commit(lambda: _increment(namespace))
+
+
+def key(namespace, *parts):
+    """Cache key in the current version of `namespace`"""
+    return ':'.join([namespace, f"v{version(namespace)}", *map(str, parts)])
+
+
+def model_namespace(model):
+    return model._meta.label_lower
+
+
+def _digest(args, kwargs):
+    return hashlib.md5(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+
+
+def cached_query(*models, timeout=DEFAULT_TIMEOUT, namespaces=()):
+    """
+        Cache a function's return value in the shared cache until `timeout` or until any
+        of `models` changes (or one of the extra `namespaces` is bumped). Arguments
+        become part of the key through their repr(), so pass plain values, not model
+        instances. The undecorated function stays available as `.uncached`.
+    """
+    dependencies = tuple(model_namespace(model) for model in models) + tuple(namespaces)
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            current = versions(*dependencies)
+            cache_key = ':'.join([
+                'query', name,
+                *(f"{namespace}.{current[namespace]}" for namespace in dependencies),
+                _digest(args, kwargs),
+            ])
+            value = cache.get(cache_key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.set(cache_key, value, timeout)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+class VersionWatch:
+    """
+        Tells a process-local cache when `namespace` was bumped by any process.
+        The shared counter is read at most once every `interval` seconds.
+    """
+
+    def __init__(self, namespace, interval=2):
+        self.namespace = namespace
+        self.interval = interval
+        self._seen = None
+        self._checked = 0
+
+    def mark(self):
+        """Call just before (re)building the local cache"""
+        self._seen = version(self.namespace)
+        self._checked = time.monotonic()
+
+    def changed(self):
+        now = time.monotonic()
+        if self._seen is None or now - self._checked < self.interval:
+            return False
+        self._checked = now
+        return version(self.namespace) != self._seen
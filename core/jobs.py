@@ -0,0 +1,151 @@
+"""
+    Local background job runner.
+
+    Views enqueue work with enqueue(), `manage.py run_jobs` claims queued jobs
+    and runs them in a process pool. Task functions live in each app's tasks.py
+    and are registered with @register_task.
+"""
+import os
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+from .models import Job
+
+
+JOB_FILES_DIR = 'job_files'
+JOB_STALE_AFTER = 300   # Seconds without a heartbeat before a running job counts as abandoned
+JOB_MAX_ATTEMPTS = 2    # Abandoned jobs are queued again until they have been claimed this often
+
+TASKS = {}
+
+
+def register_task(name):
+    """Register a function as a background task under `name`"""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    if not TASKS:
+        autodiscover_modules('tasks')
+    return TASKS[name]
+
+
+def enqueue(task, payload=None, user=None, message='Waiting for a worker'):
+    """Queue a task and return the Job"""
+    return Job.objects.create(
+        task=task,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        message=message,
+    )
+
+
+def set_progress(job_id, progress, message=''):
+    """Update progress from inside a running task"""
+    Job.objects.filter(id=job_id).update(
+        progress=max(0, min(100, int(progress))),
+        message=message[:255],
+        heartbeat_at=timezone.now(),
+    )
+
+
+def job_file_path(job_id, extension):
+    """Absolute path a task should write its output file to"""
+    directory = os.path.join(settings.MEDIA_ROOT, JOB_FILES_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{job_id}{extension}")
+
+
+def claim_next_job():
+    """
+        Atomically move the oldest queued job to running.
+        The conditional UPDATE makes sure two workers never claim the same job.
+    """
+    for job_id in Job.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True)[:5]:
+        now = timezone.now()
+        claimed = Job.objects.filter(id=job_id, status='queued').update(
+            status='running',
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+            message='Running',
+        )
+        if claimed:
+            return job_id
+    return None
+
+
+def heartbeat(job_ids):
+    """Mark running jobs as alive; the worker calls this while they run"""
+    if job_ids:
+        Job.objects.filter(id__in=job_ids, status='running').update(heartbeat_at=timezone.now())
+
+
+def fail_job(job_id, error, message=None):
+    """Record a job as failed, e.g. when the process running it crashed"""
+    return Job.objects.filter(id=job_id).exclude(status__in=('completed', 'failed')).update(
+        status='failed',
+        message=(message or f"Failed: {error}")[:255],
+        error=error,
+        finished_at=timezone.now(),
+    )
+
+
+def recover_stale_jobs(stale_after=JOB_STALE_AFTER, max_attempts=JOB_MAX_ATTEMPTS):
+    """
+        Running jobs whose worker stopped sending heartbeats (it was killed or crashed) go
+        back to the queue, or fail once they have used up their attempts.
+        Returns (requeued, failed).
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status='queued',
+        progress=0,
+        message='Requeued after its worker stopped responding',
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='failed',
+        message='Failed: the worker stopped responding',
+        error=f"No heartbeat for {stale_after} seconds after {max_attempts} attempt(s).",
+        finished_at=timezone.now(),
+    )
+    return requeued, failed
+
+
+def run_job(job_id):
+    """
+        Execute one claimed job. Runs inside a pool worker process.
+        A task returns a dict that is stored as the job result; a 'file' key
+        (absolute path under MEDIA_ROOT) becomes the job's downloadable output.
+    """
+    try:
+        job = Job.objects.get(id=job_id)
+        result = get_task(job.task)(job, **job.payload) or {}
+        result_file = result.pop('file', '')
+        if result_file:
+            result_file = os.path.relpath(result_file, settings.MEDIA_ROOT)
+
+        Job.objects.filter(id=job_id).update(
+            status='completed',
+            progress=100,
+            message='Completed',
+            result=result,
+            result_file=result_file,
+            finished_at=timezone.now(),
+        )
+    except Exception as e:
+        fail_job(job_id, traceback.format_exc(), f"Failed: {str(e)}")
+    finally:
+        connections.close_all()
+
+    return str(job_id)
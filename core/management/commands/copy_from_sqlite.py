@@ -0,0 +1,106 @@
+import time
+from contextlib import contextmanager
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers import sort_dependencies
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+SOURCE_ALIAS = 'sqlite_source'
+
+
+@contextmanager
+def _keep_timestamps(models):
+    """bulk_create would overwrite auto_now/auto_now_add fields with the current time"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy every table of an existing SQLite portal into the configured database "
+        "(e.g. PostgreSQL). Run `migrate` on the target first; its rows are replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Path to the SQLite database file")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Rows read and inserted per batch")
+        parser.add_argument('--no-input', action='store_false', dest='interactive',
+                            help="Do not ask for confirmation")
+
+    def _models(self):
+        app_list = [(config, None) for config in apps.get_app_configs()]
+        models = sort_dependencies(app_list, allow_cycles=True)
+        # Automatic many-to-many tables follow the models they join
+        models += [
+            field.remote_field.through
+            for model in list(models) for field in model._meta.local_many_to_many
+            if field.remote_field.through._meta.auto_created
+        ]
+        return [model for model in models if model._meta.managed and not model._meta.proxy]
+
+    def handle(self, *args, **options):
+        target = connections[DEFAULT_DB_ALIAS]
+        if target.vendor == 'sqlite' and str(target.settings_dict['NAME']) == options['source']:
+            raise CommandError("The source is the configured database.")
+
+        if options['interactive']:
+            answer = input(
+                f"This replaces all data in the '{target.settings_dict['NAME']}' {target.vendor} "
+                f"database with the contents of {options['source']}. Type 'yes' to continue: "
+            )
+            if answer != 'yes':
+                raise CommandError("Copy cancelled.")
+
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings({
+            DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+            SOURCE_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': options['source']},
+        })[SOURCE_ALIAS]
+
+        models = self._models()
+        batch_size = options['batch_size']
+        started = time.monotonic()
+
+        try:
+            # Django creates foreign keys DEFERRABLE, so they are checked at commit and
+            # models that reference each other can be loaded in either order
+            with transaction.atomic(using=DEFAULT_DB_ALIAS), _keep_timestamps(models):
+                tables = [model._meta.db_table for model in models]
+                target.ops.execute_sql_flush(
+                    target.ops.sql_flush(no_style(), tables, reset_sequences=False, allow_cascade=True)
+                )
+
+                for model in models:
+                    count = 0
+                    batch = []
+                    for obj in model._base_manager.using(SOURCE_ALIAS).order_by('pk').iterator(chunk_size=batch_size):
+                        batch.append(obj)
+                        if len(batch) >= batch_size:
+                            model._base_manager.using(DEFAULT_DB_ALIAS).bulk_create(batch)
+                            count += len(batch)
+                            batch = []
+                    model._base_manager.using(DEFAULT_DB_ALIAS).bulk_create(batch)
+                    count += len(batch)
+                    self.stdout.write(f"  {model._meta.label}: {count} row(s)")
+
+                # Copied rows kept their primary keys, move the sequences past them
+                with target.cursor() as cursor:
+                    for statement in target.ops.sequence_reset_sql(no_style(), models):
+                        cursor.execute(statement)
+        finally:
+            connections[SOURCE_ALIAS].close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Copied {len(models)} table(s) in {elapsed:.1f}s"))
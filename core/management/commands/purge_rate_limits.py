@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from core.ratelimit import purge
+
+
+class Command(BaseCommand):
+    help = "Delete rate-limit buckets that have not been used for a while"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=86400,
+                            help="Seconds since last use (default: one day)")
+
+    def handle(self, *args, **options):
+        deleted = purge(options['older_than'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} bucket(s)"))
@@ -0,0 +1,93 @@
+import os
+import time
+import traceback
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from django.core.management.base import BaseCommand
+from core.jobs import JOB_STALE_AFTER, claim_next_job, fail_job, heartbeat, recover_stale_jobs, run_job
+from core.process_pool import process_pool
+
+
+RECOVERY_INTERVAL = 60   # Seconds between checks for abandoned jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs using a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                            help="Number of jobs to run at the same time")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait between checks for new jobs")
+        parser.add_argument('--stale-after', type=int, default=JOB_STALE_AFTER,
+                            help="Seconds without a heartbeat before a running job is requeued or failed")
+        parser.add_argument('--once', action='store_true',
+                            help="Run until the queue is empty, then exit")
+
+    def _recover(self, stale_after):
+        requeued, failed = recover_stale_jobs(stale_after)
+        if requeued or failed:
+            self.stdout.write(f"Recovered abandoned jobs: {requeued} requeued, {failed} failed")
+
+    def _finish(self, future, job_id):
+        """Log a finished job; a crash of the pool process is recorded on the job"""
+        try:
+            future.result()
+            self.stdout.write(f"Finished job {job_id}")
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            fail_job(job_id, traceback.format_exc(), f"Failed: {str(e)}")
+            self.stderr.write(f"Job {job_id} failed in the worker: {e}")
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        poll_interval = options['poll_interval']
+        stale_after = options['stale_after']
+
+        self.stdout.write(f"Job worker started with {workers} process(es)")
+        running = {}   # future -> job id
+        pool = process_pool(max_workers=workers)
+        next_recovery = 0
+
+        try:
+            while True:
+                # Jobs of workers that died (this one included, before a restart) get another go
+                if time.monotonic() >= next_recovery:
+                    self._recover(stale_after)
+                    next_recovery = time.monotonic() + RECOVERY_INTERVAL
+
+                # Fill every free slot with a queued job
+                while len(running) < workers:
+                    job_id = claim_next_job()
+                    if job_id is None:
+                        break
+                    self.stdout.write(f"Starting job {job_id}")
+                    running[pool.submit(run_job, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                try:
+                    for future in done:
+                        self._finish(future, running[future])
+                        del running[future]
+                except BrokenProcessPool:
+                    # A pool process died (e.g. killed for memory): every job in the pool is lost
+                    for job_id in running.values():
+                        fail_job(job_id, traceback.format_exc(), "Failed: the worker process crashed")
+                    running.clear()
+                    pool.shutdown(wait=False)
+                    pool = process_pool(max_workers=workers)
+                    self.stderr.write("A worker process crashed, restarted the pool")
+                heartbeat(list(running.values()))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping job worker, waiting for running jobs...")
+        finally:
+            pool.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS("Job worker stopped"))
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db.models import Count, Max
+
+
+def backfill_events(apps, schema_editor):
+    """Seed the feed with the uploads and enrollments that already exist"""
+    Result = apps.get_model('academics', 'Result')
+    StudentProfile = apps.get_model('accounts', 'StudentProfile')
+    ActivityEvent = apps.get_model('core', 'ActivityEvent')
+
+    events = []
+    uploads = Result.objects.values(
+        'subject__name', 'class_level__name', 'term_id', 'uploaded_by_id'
+    ).annotate(uploaded=Max('date_uploaded'), count=Count('id')).order_by()
+    for row in uploads:
+        noun = 'result' if row['count'] == 1 else 'results'
+        events.append(ActivityEvent(
+            event_type='result_upload',
+            title='Results uploaded',
+            details=f"{row['subject__name']} - {row['class_level__name']} ({row['count']} {noun})",
+            actor_id=row['uploaded_by_id'],
+            created_at=row['uploaded'],
+        ))
+
+    students = StudentProfile.objects.values(
+        'user__first_name', 'user__last_name', 'current_class__name', 'created_at'
+    )
+    for row in students.iterator():
+        name = f"{row['user__first_name']} {row['user__last_name']}".strip()
+        events.append(ActivityEvent(
+            event_type='student_enrollment',
+            title='New student enrolled',
+            details=f"{name} - {row['current_class__name'] or 'N/A'}",
+            created_at=row['created_at'],
+        ))
+
+    events.sort(key=lambda event: event.created_at)
+    ActivityEvent.objects.bulk_create(events, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0001_initial'),
+        ('academics', '0010_positions'),
+        ('accounts', '0003_remove_teacherprofile_is_class_teacher'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('result_upload', 'Results uploaded'), ('result_publish', 'Results published'), ('result_unpublish', 'Results unpublished'), ('student_enrollment', 'Student enrolled'), ('teacher_assignment', 'Teacher assigned')], max_length=30)),
+                ('title', models.CharField(max_length=255)),
+                ('details', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activity_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Activity Event',
+                'verbose_name_plural': 'Activity Events',
+                'db_table': 'activity_events',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['created_at', 'id'], name='activity_ev_created_24a999_idx'), models.Index(fields=['event_type', 'created_at'], name='activity_ev_event_t_a0a379_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
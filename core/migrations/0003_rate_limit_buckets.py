@@ -0,0 +1,27 @@
+# Generated by Django 4.2.26 on 2026-10-18 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_activity_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('updated_at', models.FloatField(help_text='Unix time of the last refill')),
+            ],
+            options={
+                'verbose_name': 'Rate Limit Bucket',
+                'verbose_name_plural': 'Rate Limit Buckets',
+                'db_table': 'rate_limit_buckets',
+                'indexes': [models.Index(fields=['updated_at'], name='rate_limit__updated_2b7965_idx')],
+            },
+        ),
+    ]
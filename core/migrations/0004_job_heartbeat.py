@@ -0,0 +1,23 @@
+# Generated by Django 4.2.26 on 2026-10-18 05:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_rate_limit_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Times a worker has claimed the job'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last sign of life from the worker running the job', null=True),
+        ),
+    ]
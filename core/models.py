@@ -1,3 +1,121 @@
 from django.db import models
+from django.utils import timezone
+import uuid
 
-# Create your models here.
+
+class Job(models.Model):
+    """
+        Background job — long-running work (report exports, result imports, bulk publishes)
+        is queued here and picked up by `manage.py run_jobs`.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete (0-100)")
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(blank=True, null=True)
+    result_file = models.CharField(max_length=255, blank=True, help_text="Output file path relative to MEDIA_ROOT")
+    error = models.TextField(blank=True, null=True)
+
+    created_by = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Times a worker has claimed the job")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(
+        blank=True, null=True, help_text="Last sign of life from the worker running the job"
+    )
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'jobs'
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+
+class ActivityEvent(models.Model):
+    """
+        Append-only log behind the dashboard activity feed. Rows are written by signals
+        and by the bulk result paths (see core.activity), never updated.
+    """
+    EVENT_TYPE_CHOICES = (
+        ('result_upload', 'Results uploaded'),
+        ('result_publish', 'Results published'),
+        ('result_unpublish', 'Results unpublished'),
+        ('student_enrollment', 'Student enrolled'),
+        ('teacher_assignment', 'Teacher assigned'),
+    )
+
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPE_CHOICES)
+    title = models.CharField(max_length=255)
+    details = models.CharField(max_length=255, blank=True)
+
+    actor = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='activity_events'
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'activity_events'
+        verbose_name = 'Activity Event'
+        verbose_name_plural = 'Activity Events'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['event_type', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.title}: {self.details}"
+
+
+class RateLimitBucket(models.Model):
+    """
+        Token bucket for one rate-limit key (e.g. login attempts per IP or per username).
+        Kept in the database so every worker process shares it; see core.ratelimit.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    tokens = models.FloatField()
+    updated_at = models.FloatField(help_text="Unix time of the last refill")
+
+    class Meta:
+        db_table = 'rate_limit_buckets'
+        verbose_name = 'Rate Limit Bucket'
+        verbose_name_plural = 'Rate Limit Buckets'
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.2f}"
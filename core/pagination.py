@@ -0,0 +1,150 @@
+"""
+    Keyset (cursor) pagination.
+
+    Pages are read with `WHERE (created_at, id) < (last seen)` instead of OFFSET, so every
+    page costs the same index range scan however deep it is, and no COUNT(*) is needed.
+    Cursors are signed and opaque to clients. The ordering must end in a unique,
+    non-null field (usually the primary key) and be backed by an index.
+"""
+import json
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+
+
+CURSOR_SALT = 'core.pagination'
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+COUNT_CAP = 10000   # Databases without planner estimates count at most this many rows
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage:
+    """One page of objects plus the tokens to move to the neighbouring pages"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count   # {'value': n, 'approximate': bool} when requested
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def as_dict(self):
+        return {
+            'next_cursor': self.next_cursor,
+            'previous_cursor': self.previous_cursor,
+            'count': self.count,
+        }
+
+
+def _fields(ordering):
+    return [(key.lstrip('-'), key.startswith('-')) for key in ordering]
+
+
+def _encode(direction, obj, fields):
+    values = []
+    for name, _ in fields:
+        value = obj
+        for part in name.split('__'):
+            value = getattr(value, part)
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+    return signing.dumps([direction, values], salt=CURSOR_SALT, compress=True)
+
+
+def _decode(cursor, fields):
+    try:
+        direction, values = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidCursor("Invalid pagination cursor")
+    if direction not in ('next', 'previous') or len(values) != len(fields):
+        raise InvalidCursor("Invalid pagination cursor")
+    return direction, values
+
+
+def _after(fields, values, backwards):
+    """Q for rows strictly after `values` in the ordering (before them when backwards)"""
+    condition = Q()
+    for index, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending != backwards else 'gt'
+        clause = Q(**{f"{name}__{lookup}": values[index]})
+        for previous in range(index):
+            clause &= Q(**{fields[previous][0]: values[previous]})
+        condition |= clause
+    return condition
+
+
+def approximate_count(queryset):
+    """
+        {'value': n, 'approximate': bool}. PostgreSQL reads the planner's row estimate
+        (no scan); other databases count, but stop at COUNT_CAP rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return {'value': int(plan[0]['Plan']['Plan Rows']), 'approximate': True}
+
+    count = queryset.order_by()[:COUNT_CAP + 1].count()
+    return {'value': min(count, COUNT_CAP), 'approximate': count > COUNT_CAP}
+
+
+def cursor_paginate(queryset, cursor=None, per_page=DEFAULT_PAGE_SIZE, ordering=('-created_at', '-id'), with_count=False):
+    """
+        One CursorPage of `queryset` in `ordering`, starting after `cursor` (the first page
+        when empty). Raises InvalidCursor for tokens that were tampered with or belong to
+        a different ordering.
+    """
+    fields = _fields(ordering)
+    per_page = max(1, min(int(per_page), MAX_PAGE_SIZE))
+
+    direction, values = ('next', None) if not cursor else _decode(cursor, fields)
+    backwards = direction == 'previous'
+
+    page = queryset
+    if values is not None:
+        page = page.filter(_after(fields, values, backwards))
+    if backwards:
+        page = page.order_by(*(name if descending else f"-{name}" for name, descending in fields))
+    else:
+        page = page.order_by(*ordering)
+
+    # One extra row tells whether there is a page beyond this one
+    rows = list(page[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = _encode('next', rows[-1], fields)
+        if values is not None and (has_more or not backwards):
+            previous_cursor = _encode('previous', rows[0], fields)
+
+    return CursorPage(
+        rows,
+        next_cursor=next_cursor,
+        previous_cursor=previous_cursor,
+        count=approximate_count(queryset) if with_count else None,
+    )
@@ -0,0 +1,21 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import django
+
+
+def _init_worker():
+    """Make the ORM usable inside a freshly spawned worker process"""
+    django.setup()
+
+
+def process_pool(max_workers=None):
+    """
+        ProcessPoolExecutor whose workers can use Django.
+        Workers are spawned rather than forked so they never share the parent's DB connections.
+        Keep this module free of model imports: workers import it before django.setup().
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+    )
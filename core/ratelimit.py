@@ -0,0 +1,74 @@
+"""
+    Token-bucket rate limiting shared by every worker process.
+
+    A bucket holds up to `capacity` tokens and refills continuously at capacity/period
+    tokens per second. Taking tokens is one conditional UPDATE that refills and debits
+    in the same statement, so concurrent requests (in any process) can never spend the
+    same token twice, and a denied request costs a single indexed UPDATE plus a read.
+"""
+import time
+from collections import namedtuple
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThanOrEqual
+from .models import RateLimitBucket
+
+
+Decision = namedtuple('Decision', ['allowed', 'remaining', 'retry_after'])
+
+
+def _refilled(capacity, rate, now):
+    """The bucket's current token count, as a database expression"""
+    return Least(
+        Value(float(capacity)),
+        F('tokens') + (Value(now) - F('updated_at')) * Value(rate),
+        output_field=FloatField(),
+    )
+
+
+def take(key, capacity, period, cost=1):
+    """
+        Try to take `cost` tokens from the bucket `key`, created full on first use.
+        Returns Decision(allowed, tokens left, seconds until `cost` tokens are available).
+    """
+    rate = capacity / period
+    now = time.time()
+
+    taken = RateLimitBucket.objects.filter(
+        GreaterThanOrEqual(_refilled(capacity, rate, now), cost),
+        key=key,
+    ).update(tokens=_refilled(capacity, rate, now) - cost, updated_at=now)
+
+    bucket = RateLimitBucket.objects.filter(key=key).values_list('tokens', 'updated_at').first()
+    if bucket is None:
+        try:
+            with transaction.atomic():
+                RateLimitBucket.objects.create(key=key, tokens=capacity - cost, updated_at=now)
+        except IntegrityError:
+            return take(key, capacity, period, cost)   # Created by a concurrent request
+        return Decision(True, capacity - cost, 0)
+
+    tokens, updated_at = bucket
+    if taken:
+        return Decision(True, tokens, 0)
+
+    level = min(capacity, tokens + (now - updated_at) * rate)
+    return Decision(False, level, (cost - level) / rate)
+
+
+def refund(key, capacity, amount=1):
+    """Give back tokens, e.g. when the attempt they paid for turned out to be legitimate"""
+    RateLimitBucket.objects.filter(key=key).update(
+        tokens=Least(Value(float(capacity)), F('tokens') + amount, output_field=FloatField())
+    )
+
+
+def reset(key):
+    """Refill a bucket completely"""
+    RateLimitBucket.objects.filter(key=key).delete()
+
+
+def purge(older_than):
+    """Delete buckets untouched for `older_than` seconds; they have refilled anyway if older_than >= period"""
+    return RateLimitBucket.objects.filter(updated_at__lt=time.time() - older_than).delete()[0]
@@ -0,0 +1,51 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import StudentProfile
+from academics.models import ClassSubject, Result
+from .activity import record_activity
+from .cache import UNVERSIONED_MODELS, bump, model_namespace
+
+
+@receiver(post_save, sender=Result)
+def record_result_upload(sender, instance, created, raw, **kwargs):
+    """Single uploads; bulk uploads record one event for the batch (see write_results)"""
+    if raw or not created:
+        return
+    record_activity(
+        'result_upload',
+        'Result uploaded',
+        f"{instance.subject.name} - {instance.class_level.name}",
+        actor=instance.uploaded_by,
+    )
+
+
+@receiver(post_save, sender=StudentProfile)
+def record_student_enrollment(sender, instance, created, raw, **kwargs):
+    if raw or not created:
+        return
+    record_activity(
+        'student_enrollment',
+        'New student enrolled',
+        f"{instance.user.get_full_name()} - {instance.current_class.name if instance.current_class else 'N/A'}",
+    )
+
+
+@receiver(post_save, sender=ClassSubject)
+def record_teacher_assignment(sender, instance, raw, **kwargs):
+    """_previous_teacher_id is set by academics.signals.remember_class_subject_teacher"""
+    if raw or not instance.teacher_id or instance.teacher_id == getattr(instance, '_previous_teacher_id', None):
+        return
+    record_activity(
+        'teacher_assignment',
+        'Teacher assigned',
+        f"{instance.teacher.get_full_name()} to {instance.subject.name} ({instance.class_level.name})",
+    )
+
+
+@receiver([post_save, post_delete])
+def bump_model_version(sender, update_fields=None, **kwargs):
+    """Invalidates the cached_query results that depend on the model"""
+    namespace = model_namespace(sender)
+    if namespace in UNVERSIONED_MODELS or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    bump(namespace)
@@ -0,0 +1,71 @@
+"""
+    SQLite tuning for running the portal with several concurrent writers.
+
+    Every new SQLite connection switches to WAL (readers no longer block the writer or
+    each other), relaxes fsyncs to once per checkpoint (synchronous=NORMAL, still safe
+    against corruption in WAL mode), waits up to SQLITE_BUSY_TIMEOUT ms for the write
+    lock and gets a larger page cache and memory map.
+
+    Waiting only helps transactions that ask for the lock up front, which is why the
+    default SQLite ENGINE is core.backends.sqlite3 (BEGIN IMMEDIATE). A writer that still
+    gets "database is locked" (the timeout ran out, or a plain BEGIN on the stock backend
+    lost the race) can be rerun from the start by retry_on_locked().
+"""
+import functools
+import random
+import time
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+SQLITE_BUSY_TIMEOUT = getattr(settings, 'SQLITE_BUSY_TIMEOUT', 20000)   # Milliseconds
+
+SQLITE_PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', SQLITE_BUSY_TIMEOUT),
+    ('cache_size', -64000),          # Negative is KiB: 64 MB page cache per connection
+    ('mmap_size', 268435456),        # Read through a 256 MB memory map
+    ('temp_store', 'MEMORY'),
+]
+
+LOCKED_ATTEMPTS = 5
+LOCKED_BACKOFF = 0.05   # Seconds, doubled after every failed attempt (plus jitter)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+def _is_locked(error):
+    message = str(error).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def retry_on_locked(func=None, attempts=LOCKED_ATTEMPTS, backoff=LOCKED_BACKOFF):
+    """
+        Rerun `func` when SQLite reports the database as locked. Put it outside
+        @transaction.atomic so each attempt is a fresh transaction; inside an enclosing
+        atomic block the error is raised as usual, the outer block has to be retried.
+    """
+    if func is None:
+        return functools.partial(retry_on_locked, attempts=attempts, backoff=backoff)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if (connection.vendor != 'sqlite' or connection.in_atomic_block
+                        or not _is_locked(e) or attempt == attempts - 1):
+                    raise
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+    return wrapper
@@ -1,3 +1,198 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from academics.models import Subject
+from .cache import bump, cached_query, key, version
+from .jobs import TASKS, claim_next_job, enqueue, recover_stale_jobs, run_job
+from .models import ActivityEvent, Job, RateLimitBucket
+from .pagination import InvalidCursor, cursor_paginate
+from .ratelimit import purge, refund, reset, take
 
-# Create your tests here.
+
+test_settings = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+
+
+@cached_query(Subject)
+def _subject_codes():
+    return sorted(Subject.objects.values_list('code', flat=True))
+
+
+@test_settings
+class CacheVersionTests(TestCase):
+
+    def test_bump_waits_for_commit(self):
+        before = version('things')
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump('things')
+            self.assertEqual(version('things'), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(version('things'), before)
+
+    def test_keys_change_with_the_version(self):
+        old_key = key('things', 'a', 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump('things')
+        self.assertNotEqual(key('things', 'a', 1), old_key)
+        self.assertTrue(key('things', 'a', 1).endswith(':a:1'))
+
+    def test_cached_query_follows_model_changes(self):
+        self.assertEqual(_subject_codes(), [])
+        # Served from the cache until the model's version is bumped
+        Subject.objects.bulk_create([Subject(name='Maths', code='MATH')])
+        self.assertEqual(_subject_codes(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Subject.objects.create(name='English', code='ENG')
+        self.assertEqual(_subject_codes(), ['ENG', 'MATH'])
+
+
+def _answer(job, value):
+    return {'answer': value}
+
+
+def _explode(job):
+    raise RuntimeError("boom")
+
+
+@mock.patch.dict(TASKS, {'tests.answer': _answer, 'tests.explode': _explode})
+class JobRunnerTests(TestCase):
+
+    def run_queued(self, task, payload=None):
+        job = enqueue(task, payload)
+        self.assertEqual(claim_next_job(), job.id)
+        run_job(job.id)
+        job.refresh_from_db()
+        return job
+
+    def test_completed_job_stores_its_result(self):
+        job = self.run_queued('tests.answer', {'value': 42})
+        self.assertEqual((job.status, job.progress, job.result), ('completed', 100, {'answer': 42}))
+        self.assertEqual(job.attempts, 1)
+
+    def test_failures_are_recorded_on_the_job(self):
+        job = self.run_queued('tests.explode')
+        self.assertEqual((job.status, job.message), ('failed', "Failed: boom"))
+        self.assertIn('RuntimeError', job.error)
+
+        job = self.run_queued('tests.unknown')
+        self.assertEqual(job.status, 'failed')
+
+    def test_missing_job_does_not_raise(self):
+        run_job(uuid.uuid4())
+
+    def test_abandoned_jobs_are_requeued_then_failed(self):
+        stale = timezone.now() - timedelta(minutes=10)
+        retry = Job.objects.create(task='tests.answer', status='running', attempts=1, heartbeat_at=stale)
+        give_up = Job.objects.create(task='tests.answer', status='running', attempts=2, heartbeat_at=stale)
+        alive = Job.objects.create(task='tests.answer', status='running', attempts=1, heartbeat_at=timezone.now())
+
+        self.assertEqual(recover_stale_jobs(stale_after=300, max_attempts=2), (1, 1))
+        statuses = dict(Job.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[retry.id], statuses[give_up.id], statuses[alive.id]],
+            ['queued', 'failed', 'running'],
+        )
+        self.assertEqual(claim_next_job(), retry.id)
+        self.assertEqual(Job.objects.get(id=retry.id).attempts, 2)
+
+
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Pairs share a timestamp so the id has to break the tie
+        start = timezone.now() - timedelta(hours=1)
+        cls.events = [
+            ActivityEvent.objects.create(
+                event_type='result_upload', title=f'Event {i}', created_at=start + timedelta(minutes=i // 2)
+            )
+            for i in range(7)
+        ]
+        cls.newest_first = sorted(cls.events, key=lambda event: (event.created_at, event.id), reverse=True)
+
+    def walk(self, direction, cursor=None):
+        pages = []
+        while True:
+            page = cursor_paginate(ActivityEvent.objects.all(), cursor, per_page=3)
+            pages.append([event.title for event in page])
+            cursor = page.next_cursor if direction == 'next' else page.previous_cursor
+            if cursor is None:
+                return pages, page
+
+    def test_pages_cover_every_row_once(self):
+        pages, last = self.walk('next')
+        titles = [event.title for event in self.newest_first]
+        self.assertEqual(pages, [titles[:3], titles[3:6], titles[6:]])
+        self.assertFalse(last.has_next)
+
+        # Walking back from the last page returns the same pages in reverse
+        pages, first = self.walk('previous', last.previous_cursor)
+        self.assertEqual(pages, [titles[3:6], titles[:3]])
+        self.assertFalse(first.has_previous)
+
+    def test_rows_added_while_paging_are_not_repeated(self):
+        page = cursor_paginate(ActivityEvent.objects.all(), per_page=3)
+        ActivityEvent.objects.create(event_type='result_upload', title='Newer')
+        following = cursor_paginate(ActivityEvent.objects.all(), page.next_cursor, per_page=3)
+        self.assertEqual([event.title for event in following], [event.title for event in self.newest_first[3:6]])
+
+    def test_count_and_page_size_limits(self):
+        page = cursor_paginate(ActivityEvent.objects.all(), per_page=1000, with_count=True)
+        self.assertEqual(len(page), 7)
+        self.assertEqual(page.count, {'value': 7, 'approximate': False})
+
+    def test_bad_cursors_are_rejected(self):
+        cursor = cursor_paginate(ActivityEvent.objects.all(), per_page=3).next_cursor
+        for bad in (cursor[:-2] + 'xx', 'garbage'):
+            with self.assertRaises(InvalidCursor):
+                cursor_paginate(ActivityEvent.objects.all(), bad)
+        # A cursor only fits the ordering it was made for
+        with self.assertRaises(InvalidCursor):
+            cursor_paginate(ActivityEvent.objects.all(), cursor, ordering=('-id',))
+
+
+@mock.patch('core.ratelimit.time.time')
+class RateLimitTests(TestCase):
+
+    def test_bucket_empties_and_refills(self, clock):
+        clock.return_value = 1000.0
+        decisions = [take('login:ip', capacity=3, period=60) for _ in range(4)]
+        self.assertEqual([decision.allowed for decision in decisions], [True, True, True, False])
+        self.assertAlmostEqual(decisions[-1].retry_after, 20)
+
+        # One token comes back every 20 seconds, never more than the capacity
+        clock.return_value = 1020.0
+        self.assertTrue(take('login:ip', capacity=3, period=60).allowed)
+        self.assertFalse(take('login:ip', capacity=3, period=60).allowed)
+        clock.return_value = 5000.0
+        self.assertEqual(take('login:ip', capacity=3, period=60).remaining, 2)
+
+    def test_buckets_are_separate(self, clock):
+        clock.return_value = 1000.0
+        take('login:a', capacity=1, period=60)
+        self.assertFalse(take('login:a', capacity=1, period=60).allowed)
+        self.assertTrue(take('login:b', capacity=1, period=60).allowed)
+
+    def test_refund_and_reset(self, clock):
+        clock.return_value = 1000.0
+        for _ in range(2):
+            take('login:ip', capacity=2, period=60)
+        refund('login:ip', capacity=2)
+        self.assertTrue(take('login:ip', capacity=2, period=60).allowed)
+        self.assertFalse(take('login:ip', capacity=2, period=60).allowed)
+
+        reset('login:ip')
+        self.assertEqual(take('login:ip', capacity=2, period=60), (True, 1, 0))
+
+    def test_purge_drops_idle_buckets(self, clock):
+        clock.return_value = 1000.0
+        take('login:old', capacity=1, period=60)
+        clock.return_value = 2000.0
+        take('login:new', capacity=1, period=60)
+        self.assertEqual(purge(older_than=500), 1)
+        self.assertEqual(list(RateLimitBucket.objects.values_list('key', flat=True)), ['login:new'])
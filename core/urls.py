@@ -4,5 +4,8 @@ from . import views
 
 urlpatterns = [
     path("", views.home_page, name="home"),
-    path("contact/", views.contact_page)
+    path("contact/", views.contact_page),
+    path("jobs/<uuid:job_id>/", views.job_status, name="job_status"),
+    path("jobs/<uuid:job_id>/download/", views.job_download, name="job_download"),
+    path("activity/", views.activity_feed, name="activity_feed"),
 ]
@@ -1,14 +1,13 @@
-from django.shortcuts import render
+import os
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render, get_object_or_404
+from django.http import JsonResponse, FileResponse, Http404
 from django.http.response import HttpResponse
-from accounts.models import StudentProfile, TeacherProfile
-from academics.models import Result, ClassSubject
-from django.utils.timesince import timesince
+from django.urls import reverse
+from .models import Job
+from .activity import ACTIVITY_PAGE_SIZE, MAX_ACTIVITY_PAGE_SIZE, activity_dict, activity_page
 from django.utils import timezone
-from django.core.cache import cache
-from accounts.models import User
-from django.db.models import Count, Q
-from collections import defaultdict
-from collections import defaultdict
 
 # Create your views here.
 
@@ -23,162 +22,81 @@ def contact_page(request):
 
 
 
+def _get_user_job(request, job_id):
+    """Jobs are visible to the user who queued them and to admins"""
+    job = get_object_or_404(Job, id=job_id)
+    if request.user.role != 'admin' and job.created_by_id != request.user.id:
+        raise Http404
+    return job
+
+
+@login_required
+def job_status(request, job_id):
+    """JSON status of a background job, polled by the frontend"""
+    job = _get_user_job(request, job_id)
+
+    return JsonResponse({
+        'success': True,
+        'job': {
+            'id': str(job.id),
+            'task': job.task,
+            'status': job.status,
+            'progress': job.progress,
+            'message': job.message,
+            'result': job.result,
+            'is_finished': job.is_finished,
+            'download_url': reverse('job_download', args=[job.id]) if job.result_file else None,
+            'created_at': job.created_at.isoformat(),
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        }
+    })
+
+
+@login_required
+def job_download(request, job_id):
+    """Download the file produced by a finished job"""
+    job = _get_user_job(request, job_id)
+
+    if job.status != 'completed' or not job.result_file:
+        raise Http404
+
+    path = os.path.join(settings.MEDIA_ROOT, job.result_file)
+    if not os.path.exists(path):
+        raise Http404
+
+    filename = (job.result or {}).get('filename') or os.path.basename(path)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename)
+
+
+
 def get_recent_activities(limit=10):
-    """Build a recent activity feed dynamically."""
-
-    cache_key = f'recent_activities_{limit}'
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
-    
-    activities = []
-
-    # Recently uploaded results
-    for result in Result.objects.select_related('student', 'subject', 'class_level').order_by('-date_uploaded')[:5]:
-        activities.append({
-            'type': 'result_upload',
-            'title': 'Results uploaded',
-            'details': f"{result.subject.name} - {result.class_level.name}",
-            'time': timesince(result.date_uploaded, timezone.now()) + " ago",
-            'icon': 'bi-upload',
-            'color': '#dbeafe'
-        })
-
-    #Recently enrolled students
-    for student in StudentProfile.objects.select_related('current_class').order_by('-created_at')[:5]:
-        activities.append({
-            'type': 'student_enrollment',
-            'title': 'New student enrolled',
-            'details': f"{student.user.get_full_name()} - {student.current_class.name if student.current_class else 'N/A'}",
-            'time': timesince(student.created_at, timezone.now()) + " ago",
-            'icon': 'bi-person-plus',
-            'color': '#d1fae5'
-        })
-
-    # Recently assigned teachers to classes
-    for cs in ClassSubject.objects.select_related('class_level', 'teacher', 'subject').order_by('-id')[:5]:
-        if cs.teacher:
-            activities.append({
-                'type': 'teacher_assignment',
-                'title': 'Teacher assigned',
-                'details': f"{cs.teacher.get_full_name()} to {cs.subject.name} ({cs.class_level.name})",
-                'time': "recently",  # You can add timestamp if you track assignment creation
-                'icon': 'bi-person-badge',
-                'color': '#ede9fe'
-            })
-
-            
-    cache.set(cache_key, activities, 60)
-    # Sort activities by time (newest first)
-    activities_sorted = sorted(activities, key=lambda x: x['time'], reverse=False)
-
-    return activities_sorted[:limit]
-
-
-
-
-
-def get_teacher_workload():
-    """Get teacher workload data - handles both relationship scenarios"""
-    
-    # Method 1: Try via User -> ClassSubject relationship (using the correct related_name)
-    try:
-        teacher_workload = User.objects.filter(
-            role='teacher',
-            is_active=True
-        ).annotate(
-            total_assignments=Count('assigned_class_subjects', distinct=True),
-            total_subjects=Count('assigned_class_subjects__subject', distinct=True),
-            total_classes=Count('assigned_class_subjects__class_level', distinct=True)
-        ).values(
-            'id',
-            'first_name',
-            'last_name', 
-            'total_assignments',
-            'total_subjects',
-            'total_classes'
-        ).order_by('-total_assignments')[:6]
-        
-        # Convert to list and filter out teachers with no assignments
-        workload_list = list(teacher_workload)
-        workload_list = [teacher for teacher in workload_list if teacher['total_assignments'] > 0]
-        
-        if workload_list:
-            print(f" Method 1 successful: Found {len(workload_list)} teachers with assignments")
-            print(workload_list)
-            return workload_list
-        else:
-            print(" Method 1: No teachers with assignments found")
-    except Exception as e:
-        print(f" Method 1 failed: {e}")
-    
-    # Method 2: Direct query from ClassSubject (most reliable)
-    try:
-        class_assignments = ClassSubject.objects.filter(
-            teacher__isnull=False,
-            teacher__is_active=True
-        ).select_related('teacher', 'subject', 'class_level')
-        
-        print(f"Method 2: Found {class_assignments.count()} ClassSubject records with teachers")
-        
-        workload_data = defaultdict(lambda: {
-            'id': None,
-            'first_name': '',
-            'last_name': '',
-            'total_assignments': 0,
-            'total_subjects': set(),
-            'total_classes': set()
-        })
-        
-        for assignment in class_assignments:
-            teacher_id = assignment.teacher.id
-            workload_data[teacher_id]['id'] = teacher_id
-            workload_data[teacher_id]['first_name'] = assignment.teacher.first_name
-            workload_data[teacher_id]['last_name'] = assignment.teacher.last_name
-            workload_data[teacher_id]['total_assignments'] += 1
-            workload_data[teacher_id]['total_subjects'].add(assignment.subject.id)
-            workload_data[teacher_id]['total_classes'].add(assignment.class_level.id)
-        
-        # Convert to list format
-        result = []
-        for teacher_id, data in workload_data.items():
-            result.append({
-                'id': data['id'],
-                'first_name': data['first_name'],
-                'last_name': data['last_name'],
-                'total_assignments': data['total_assignments'],
-                'total_subjects': len(data['total_subjects']),
-                'total_classes': len(data['total_classes'])
-            })
-        
-        result = sorted(result, key=lambda x: x['total_assignments'], reverse=True)[:6]
-        
-        if result:
-            print(f" Method 2 successful: Found {len(result)} teachers with assignments")
-            return result
-        else:
-            print(" Method 2: No teachers with assignments found")
-            
-    except Exception as e:
-        print(f" Method 2 failed: {e}")
-    
-    # Method 3: Fallback - check if there are any ClassSubject records at all
+    """Latest entries of the activity feed, newest first"""
+    now = timezone.now()
+    events, _ = activity_page(limit=limit)
+    return [activity_dict(event, now) for event in events]
+
+
+@login_required
+def activity_feed(request):
+    """
+        Activity feed as JSON, newest first. Pass the returned `next_before` as `before`
+        to page back through older events.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': "Only admins can view the activity feed."}, status=403)
+
     try:
-        total_class_subjects = ClassSubject.objects.count()
-        class_subjects_with_teachers = ClassSubject.objects.filter(teacher__isnull=False).count()
-        total_teachers = User.objects.filter(role='teacher', is_active=True).count()
-        
-        print(f" Debug Info:")
-        print(f"   - Total ClassSubject records: {total_class_subjects}")
-        print(f"   - ClassSubject records with teachers: {class_subjects_with_teachers}")
-        print(f"   - Total active teachers: {total_teachers}")
-        
-        # If there are ClassSubject records but no teachers assigned
-        if total_class_subjects > 0 and class_subjects_with_teachers == 0:
-            print("💡 Hint: ClassSubject records exist but no teachers are assigned to them")
-            
-    except Exception as e:
-        print(f"❌ Method 3 failed: {e}")
-    
-    # Return empty list if all methods fail
-    return []
\ No newline at end of file
+        limit = min(max(int(request.GET.get('limit', ACTIVITY_PAGE_SIZE)), 1), MAX_ACTIVITY_PAGE_SIZE)
+        before = int(request.GET['before']) if request.GET.get('before') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': "limit and before must be integers."}, status=400)
+
+    events, has_more = activity_page(before=before, limit=limit, event_type=request.GET.get('type') or None)
+    now = timezone.now()
+
+    return JsonResponse({
+        'success': True,
+        'activities': [activity_dict(event, now) for event in events],
+        'has_more': has_more,
+        'next_before': events[-1].id if has_more else None,
+    })
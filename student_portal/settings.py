@@ -86,12 +86,75 @@ WSGI_APPLICATION = 'student_portal.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE=sqlite (default) keeps the single-file database. DB_ENGINE=postgresql reads
+# DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT, keeps connections open for
+# DB_CONN_MAX_AGE seconds and checks them before reuse. Behind PgBouncer in transaction
+# pooling mode set DB_DISABLE_SERVER_SIDE_CURSORS=True (exports then fetch in client-side
+# chunks) and DB_CONN_MAX_AGE=0 if the pooler already keeps the server connections.
+
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite")
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DB_NAME", "student_portal"),
+            'USER': os.getenv("DB_USER", "student_portal"),
+            'PASSWORD': os.getenv("DB_PASSWORD", ""),
+            'HOST': os.getenv("DB_HOST", "localhost"),
+            'PORT': os.getenv("DB_PORT", "5432"),
+            'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv("DB_DISABLE_SERVER_SIDE_CURSORS", "False") == "True",
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+            },
+        }
+    }
+else:
+    # Django's SQLite backend with write transactions that queue for the lock (BEGIN
+    # IMMEDIATE); core.sqlite switches every connection to WAL and tunes it
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': os.getenv("DB_NAME", BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# Milliseconds an SQLite writer waits for the lock before "database is locked"
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 20000))
+
+
+# Cache
+# Shared by every worker process. CACHE_BACKEND is 'file' (default), 'db' (run
+# `manage.py createcachetable` first), 'redis' (needs the redis package; CACHE_LOCATION is
+# the redis:// URL) or 'locmem' (single process only, e.g. tests).
+
+CACHE_BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+CACHE_DEFAULT_LOCATIONS = {
+    'file': str(BASE_DIR / 'cache'),
+    'db': 'django_cache',
+    'redis': 'redis://127.0.0.1:6379/1',
+    'locmem': 'student-portal',
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv("CACHE_LOCATION", CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]),
+        'KEY_PREFIX': os.getenv("CACHE_KEY_PREFIX", "student_portal"),
+        'TIMEOUT': 300,
     }
 }
+if CACHE_BACKEND != 'redis':
+    # Culling threshold of the Django-managed backends; Redis evicts by its own policy
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
 
 
 # Password validation
@@ -135,6 +198,9 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR / 'media/')
 
+# Size budget for cached analysis reports under MEDIA_ROOT/report_cache (least recently used are evicted)
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
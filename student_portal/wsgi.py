@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_portal.settings')
 
 application = get_wsgi_application()
+
+# Build the in-memory typeahead indexes before the first request arrives
+from accounts.utils.typeahead import warm_indexes
+
+warm_indexes()